@@ -0,0 +1,119 @@
+"""Micro-benchmark of turning an ElevenLabs transcription response into a handler result.
+
+Compares the previous path (parse into ElevenLabs client models, dump them to indented JSON, validate the dump again)
+with the current one (keep the response body as is, validate it once into plain models).
+Both include serializing the result for the Restate journal.
+
+Usage:
+
+    uv run python benchmarks/response_conversion.py --words 1000
+"""
+
+import argparse
+import json
+import statistics
+import time
+from collections.abc import Callable
+from typing import List
+
+from elevenlabs import SpeechToTextChunkResponseModel, SpeechToTextWordResponseModel
+from elevenlabs.core.unchecked_base_model import construct_type
+from pydantic import Field
+
+from restate_elevenlabs import SpeechToTextConvertResponse
+
+
+class LegacySpeechToTextConvertResponse(SpeechToTextConvertResponse):
+    """The response model as it was when words were ElevenLabs client models."""
+
+    words: List[SpeechToTextWordResponseModel] | None = Field(default=None)  # type: ignore[assignment]
+
+
+def response_body(words: int, characters: bool) -> bytes:
+    return json.dumps(
+        {
+            "language_code": "eng",
+            "language_probability": 0.98,
+            "text": " ".join(f"word{i}" for i in range(words)),
+            "words": [
+                {
+                    "text": f"word{i}",
+                    "start": i * 0.5,
+                    "end": i * 0.5 + 0.4,
+                    "type": "word",
+                    "speaker_id": f"speaker_{i % 2}",
+                    "logprob": -0.05,
+                    "characters": [
+                        {
+                            "text": c,
+                            "start": i * 0.5 + j * 0.05,
+                            "end": i * 0.5 + (j + 1) * 0.05,
+                        }
+                        for j, c in enumerate(f"word{i}")
+                    ]
+                    if characters
+                    else None,
+                }
+                for i in range(words)
+            ],
+            "transcription_id": "benchmark",
+        }
+    ).encode()
+
+
+def legacy(body: bytes) -> bytes:
+    # What the ElevenLabs client does with the HTTP response
+    response = construct_type(
+        type_=SpeechToTextChunkResponseModel,
+        object_=json.loads(body),
+    )
+
+    data = response.model_dump_json(indent=4).encode()  # type: ignore[attr-defined]
+    result = LegacySpeechToTextConvertResponse.model_validate_json(data)
+
+    return result.model_dump_json().encode()
+
+
+def current(body: bytes) -> bytes:
+    result = SpeechToTextConvertResponse.model_validate_json(body)
+
+    return result.model_dump_json().encode()
+
+
+def measure(fn: Callable[[bytes], bytes], body: bytes, repeat: int) -> list[float]:
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(body)
+        timings.append(time.perf_counter() - start)
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--words", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-characters", action="store_true")
+    args = parser.parse_args()
+
+    body = response_body(args.words, not args.no_characters)
+
+    assert json.loads(legacy(body)) == json.loads(current(body))
+
+    print(f"{args.words} words, {len(body) / 1024 / 1024:.1f} MiB response body")
+
+    results = {
+        name: statistics.median(measure(fn, body, args.repeat))
+        for name, fn in (("legacy", legacy), ("current", current))
+    }
+
+    for name, seconds in results.items():
+        print(f"{name:>8}: {seconds * 1000:10.1f} ms")
+
+    print(f" speedup: {results['legacy'] / results['current']:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""End-to-end benchmark of the service handlers.
+
+Handlers created by `create_service` are invoked against a local fake ElevenLabs HTTP server
+and an in-memory object store holding synthetic audio files.
+Steps run inline, with their results serialized the same way Restate journals them.
+
+Each scenario runs in its own process (so that peak RSS is attributed correctly) and reports
+throughput, p50/p99 latency, peak RSS and the time spent in each stage
+(the step stage includes loading and persisting files).
+
+Usage:
+
+    uv run python benchmarks/service.py --requests 50 --concurrency 8 --audio-size 8 --words 2000
+    uv run python benchmarks/service.py --scenario file --json
+    uv run python benchmarks/service.py --max-p99-ms 2000 --max-rss-mib 400
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import obstore
+from elevenlabs import AsyncElevenLabs
+from obstore.store import MemoryStore
+from restate.serde import DefaultSerde
+
+from restate_elevenlabs import AsyncExecutor, create_service
+from restate_elevenlabs.obstore import AsyncFileLoader, AsyncFilePersister
+
+SCENARIOS = {
+    "url": (
+        "speechToTextConvertUrl",
+        {"url": "https://example.com/audio.wav", "output": {"return": True}},
+    ),
+    "url-async": (
+        "speechToTextConvertUrlAsync",
+        {"url": "https://example.com/audio.wav"},
+    ),
+    "file": (
+        "speechToTextConvertFile",
+        {"file": "audio/{index}.wav", "output": {"return": True}},
+    ),
+    "file-stream": (
+        "speechToTextConvertFile",
+        {"file": "audio/{index}.wav", "output": {"return": True}},
+    ),
+    "file-async": (
+        "speechToTextConvertFileAsync",
+        {"file": "audio/{index}.wav"},
+    ),
+    "persist": (
+        "speechToTextConvertUrl",
+        {
+            "url": "https://example.com/audio.wav",
+            "output": {"destination": "transcripts/{index}.json", "reference": True},
+        },
+    ),
+    "persist-gzip": (
+        "speechToTextConvertUrl",
+        {
+            "url": "https://example.com/audio.wav",
+            "output": {
+                "destination": "transcripts/{index}.json.gz",
+                "reference": True,
+                "format": "columnar",
+                "compression": "gzip",
+            },
+        },
+    ),
+}
+
+
+class Stages:
+    """Accumulates the time spent in each stage of a request."""
+
+    def __init__(self):
+        self.totals: dict[str, float] = defaultdict(float)
+
+    @contextmanager
+    def measure(self, stage: str):
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.totals[stage] += time.perf_counter() - start
+
+
+class TimedLoader(AsyncFileLoader):
+    def __init__(self, stages: Stages, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.stages = stages
+
+    async def load(self, ref, dst):
+        with self.stages.measure("load"):
+            await super().load(ref, dst)
+
+    async def open(self, ref):
+        with self.stages.measure("load"):
+            return await super().open(ref)
+
+
+class TimedPersister(AsyncFilePersister):
+    def __init__(self, stages: Stages, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.stages = stages
+
+    async def persist(self, ref, src):
+        with self.stages.measure("persist"):
+            await super().persist(ref, src)
+
+    async def persist_stream(self, ref, src):
+        with self.stages.measure("persist"):
+            await super().persist_stream(ref, src)
+
+
+class Context:
+    """Runs steps inline, serializing results like the Restate journal does."""
+
+    def __init__(self, stages: Stages):
+        self.stages = stages
+
+    async def run_typed(
+        self,
+        name: str,
+        action: Callable[..., Awaitable[Any]],
+        options: Any = None,
+        /,
+        **kwargs: Any,
+    ) -> Any:
+        with self.stages.measure("step"):
+            result = await action(**kwargs)
+
+        with self.stages.measure("journal"):
+            hint = action.__annotations__.get("return")
+            DefaultSerde(hint).serialize(result)
+
+        return result
+
+
+def transcript(words: int) -> bytes:
+    return json.dumps(
+        {
+            "language_code": "eng",
+            "language_probability": 0.98,
+            "text": " ".join(f"word{i}" for i in range(words)),
+            "words": [
+                {
+                    "text": f"word{i}",
+                    "start": i * 0.5,
+                    "end": i * 0.5 + 0.4,
+                    "type": "word",
+                    "speaker_id": f"speaker_{i % 2}",
+                    "logprob": -0.05,
+                    "characters": [
+                        {
+                            "text": c,
+                            "start": i * 0.5 + j * 0.05,
+                            "end": i * 0.5 + (j + 1) * 0.05,
+                        }
+                        for j, c in enumerate(f"word{i}")
+                    ],
+                }
+                for i in range(words)
+            ],
+            "transcription_id": "benchmark",
+        }
+    ).encode()
+
+
+def start_server(body: bytes, latency: float) -> ThreadingHTTPServer:
+    webhook = json.dumps(
+        {"message": "ok", "request_id": "benchmark", "transcription_id": "benchmark"}
+    ).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            request = self._read_body()
+
+            if latency:
+                time.sleep(latency)
+
+            response = webhook if b'name="webhook"' in request else body
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+
+        def _read_body(self) -> bytes:
+            if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            chunks = []
+            while size := int(self.rfile.readline().split(b";")[0], 16):
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            self.rfile.readline()
+
+            return b"".join(chunks)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+async def run_scenario(name: str, args: argparse.Namespace) -> dict[str, Any]:
+    server = start_server(transcript(args.words), args.latency / 1000)
+    host, port = server.server_address[:2]
+
+    store = MemoryStore()
+    audio = os.urandom(args.audio_size * 1024 * 1024)
+    for index in range(args.requests):
+        await obstore.put_async(store, f"audio/{index}.wav", audio)
+
+    stages = Stages()
+    executor = AsyncExecutor(
+        AsyncElevenLabs(api_key="benchmark", base_url=f"http://{host}:{port}"),
+        TimedLoader(stages, store),
+        TimedPersister(stages, store),
+        stream=name == "file-stream",
+    )
+    handlers: dict[str, Callable[..., Awaitable[Any]]] = {
+        handler_name: handler.fn
+        for handler_name, handler in create_service(executor).handlers.items()
+    }
+
+    handler_name, template = SCENARIOS[name]
+    handler = handlers[handler_name]
+    request_type = handler.__annotations__["request"]
+
+    def request(index: int) -> Any:
+        payload = json.loads(json.dumps(template).replace("{index}", str(index)))
+        payload["options"] = {"model_id": "scribe_v1"}
+
+        return request_type.model_validate(payload)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+
+    async def call(index: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await handler(Context(stages), request(index))
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call(index) for index in range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    server.shutdown()
+
+    latencies.sort()
+
+    return {
+        "scenario": name,
+        "requests": args.requests,
+        "throughput": args.requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "stages_ms": {
+            stage: total / args.requests * 1000
+            for stage, total in stages.totals.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenario", choices=["all", *SCENARIOS], default="all")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--audio-size", type=int, default=4, help="audio file size in MiB"
+    )
+    parser.add_argument("--words", type=int, default=1000, help="words per transcript")
+    parser.add_argument(
+        "--latency", type=float, default=0, help="fake API latency in ms"
+    )
+    parser.add_argument(
+        "--max-p99-ms",
+        type=float,
+        help="fail if the p99 latency of a scenario is higher than this",
+    )
+    parser.add_argument(
+        "--max-rss-mib",
+        type=float,
+        help="fail if the peak RSS of a scenario is higher than this",
+    )
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    if args.scenario != "all":
+        result = asyncio.run(run_scenario(args.scenario, args))
+        print(json.dumps(result) if args.json else result)
+
+        check([result], args)
+
+        return
+
+    results = []
+    for scenario in SCENARIOS:
+        # Limits are checked once every scenario has run
+        output = subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--scenario",
+                scenario,
+                "--requests",
+                str(args.requests),
+                "--concurrency",
+                str(args.concurrency),
+                "--audio-size",
+                str(args.audio_size),
+                "--words",
+                str(args.words),
+                "--latency",
+                str(args.latency),
+                "--json",
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(json.loads(output))
+
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print_results(results)
+
+    check(results, args)
+
+
+def print_results(results: list[dict[str, Any]]):
+    print(
+        f"{'scenario':<14}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'RSS MiB':>10}  stages (ms/request)"
+    )
+    for result in results:
+        stages = ", ".join(
+            f"{stage} {value:.1f}" for stage, value in result["stages_ms"].items()
+        )
+        print(
+            f"{result['scenario']:<14}{result['throughput']:>10.1f}{result['p50_ms']:>10.1f}"
+            f"{result['p99_ms']:>10.1f}{result['peak_rss_mib']:>10.1f}  {stages}"
+        )
+
+
+def check(results: list[dict[str, Any]], args: argparse.Namespace):
+    failures = [
+        f"{result['scenario']}: p99 latency is {result['p99_ms']:.1f} ms (max {args.max_p99_ms} ms)"
+        for result in results
+        if args.max_p99_ms is not None and result["p99_ms"] > args.max_p99_ms
+    ]
+    failures += [
+        f"{result['scenario']}: peak RSS is {result['peak_rss_mib']:.1f} MiB (max {args.max_rss_mib} MiB)"
+        for result in results
+        if args.max_rss_mib is not None and result["peak_rss_mib"] > args.max_rss_mib
+    ]
+
+    if failures:
+        raise SystemExit("\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
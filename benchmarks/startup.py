@@ -0,0 +1,219 @@
+"""Startup benchmark: the time it takes to import the service (before it can answer its first Restate request).
+
+Each module is imported in a fresh interpreter with `python -X importtime`, several times, keeping the fastest run.
+Reports the total import time, the wall time of the process and the slowest dependencies,
+and checks that modules meant to be imported on first use (eg. the ElevenLabs client) are not imported at startup.
+
+Importing `src.main` builds the whole app from the environment (the same as granian does),
+so set the environment variables of the deployment being measured.
+Only the ElevenLabs client and the Prometheus client are deferred:
+obstore, structlog and the settings are imported, and the object store, loader and persister built, at startup.
+
+Usage:
+
+    uv run python benchmarks/startup.py
+    uv run python benchmarks/startup.py --module restate_elevenlabs --runs 10 --max-ms 500
+    uv run python benchmarks/startup.py --save var/importtime --json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+DEFAULT_MODULES = ["restate_elevenlabs", "src.main"]
+
+# Imported on first use (the ElevenLabs client and the Prometheus client): importing them at startup is a regression
+DEFAULT_LAZY = ["elevenlabs.base_client", "prometheus_client"]
+
+
+@dataclass
+class Import:
+    name: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+
+def run(module: str) -> tuple[float, str]:
+    """Import a module in a fresh interpreter, returning the wall time and the `-X importtime` output."""
+
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": _pythonpath()},
+    )
+    wall = time.perf_counter() - start
+
+    if process.returncode:
+        raise SystemExit(f"Importing {module} failed:\n{process.stderr}")
+
+    return wall, process.stderr
+
+
+def parse(output: str) -> list[Import]:
+    imports = []
+
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+
+        # Header
+        if not self_us.strip().isdigit():
+            continue
+
+        imports.append(
+            Import(
+                name=name.strip(),
+                depth=(len(name) - len(name.lstrip()) - 1) // 2,
+                self_us=int(self_us),
+                cumulative_us=int(cumulative_us),
+            )
+        )
+
+    return imports
+
+
+def measure(
+    module: str,
+    runs: int,
+    baseline: set[str],
+    lazy: list[str],
+    top: int,
+) -> tuple[dict[str, Any], str]:
+    best: tuple[int, float, list[Import], str] | None = None
+
+    for _ in range(runs):
+        wall, output = run(module)
+        imports = parse(output)
+
+        # Modules imported by the interpreter itself (site, encodings, ...) are not part of the import
+        total = sum(
+            item.cumulative_us
+            for item in imports
+            if item.depth == 0 and item.name not in baseline
+        )
+
+        if best is None or total < best[0]:
+            best = (total, wall, imports, output)
+
+    assert best is not None
+    total, wall, imports, output = best
+
+    names = {item.name for item in imports}
+    slowest = sorted(
+        (item for item in imports if item.name not in baseline and item.name != module),
+        key=lambda item: item.cumulative_us,
+        reverse=True,
+    )
+
+    result = {
+        "module": module,
+        "import_ms": total / 1000,
+        "wall_ms": wall * 1000,
+        "modules": len(names - baseline),
+        "eager": [name for name in lazy if name in names],
+        "slowest": [
+            {
+                "name": item.name,
+                "cumulative_ms": item.cumulative_us / 1000,
+                "self_ms": item.self_us / 1000,
+            }
+            for item in slowest[:top]
+        ],
+    }
+
+    return result, output
+
+
+def _pythonpath() -> str:
+    # `restate_elevenlabs` lives in src/, `src.main` is imported from the project root (like granian does)
+    root = Path(__file__).resolve().parent.parent
+    paths = [str(root / "src"), str(root)]
+
+    if "PYTHONPATH" in os.environ:
+        paths.append(os.environ["PYTHONPATH"])
+
+    return os.pathsep.join(paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--module",
+        action="append",
+        dest="modules",
+        help=f"module to import (can be repeated, default: {', '.join(DEFAULT_MODULES)})",
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument(
+        "--lazy",
+        action="append",
+        help=f"module that must not be imported at startup (can be repeated, default: {', '.join(DEFAULT_LAZY)})",
+    )
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        help="fail if importing a module takes longer than this",
+    )
+    parser.add_argument(
+        "--save",
+        type=Path,
+        help="directory to save the -X importtime output of the fastest runs to",
+    )
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    baseline = {item.name for item in parse(run("sys")[1])}
+    lazy = args.lazy or DEFAULT_LAZY
+
+    results = []
+    for module in args.modules or DEFAULT_MODULES:
+        result, output = measure(module, args.runs, baseline, lazy, args.top)
+        results.append(result)
+
+        if args.save:
+            args.save.mkdir(parents=True, exist_ok=True)
+            (args.save / f"{module}.importtime.txt").write_text(output)
+
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for result in results:
+            print(
+                f"{result['module']}: {result['import_ms']:.1f} ms import, "
+                f"{result['wall_ms']:.1f} ms process, {result['modules']} modules"
+            )
+            print(f"  {'cumulative ms':>14}{'self ms':>10}  module")
+            for item in result["slowest"]:
+                print(
+                    f"  {item['cumulative_ms']:>14.1f}{item['self_ms']:>10.1f}  {item['name']}"
+                )
+
+    failures = [
+        f"{result['module']} imports {name} at startup"
+        for result in results
+        for name in result["eager"]
+    ]
+    failures += [
+        f"{result['module']} takes {result['import_ms']:.1f} ms to import (max {args.max_ms} ms)"
+        for result in results
+        if args.max_ms is not None and result["import_ms"] > args.max_ms
+    ]
+
+    if failures:
+        raise SystemExit("\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
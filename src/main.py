@@ -2,21 +2,36 @@ from __future__ import annotations
 
 import logging
 from datetime import timedelta
-from typing import TYPE_CHECKING, cast
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
 
 import obstore
 import pydantic_obstore
 import restate
 import structlog
-import workstate
-import workstate.obstore
-from elevenlabs import ElevenLabs
-from pydantic import Field
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-from .restate_elevenlabs import Executor, create_service
+from .restate_elevenlabs import (
+    AsyncExecutor,
+    AudioStage,
+    Cache,
+    FfmpegTranscoder,
+    MemoryCache,
+    Metrics,
+    RateLimiter,
+    Scheduler,
+    Transcoder,
+    create_service,
+)
+from .restate_elevenlabs.obstore import (
+    AsyncFileLoader,
+    AsyncFilePersister,
+    ObjectStoreCache,
+)
 
 if TYPE_CHECKING:
+    from elevenlabs import AsyncElevenLabs
     from obstore.store import ClientConfig
 
 
@@ -24,13 +39,194 @@ class ObstoreSettings(pydantic_obstore.Config):
     url: str | None = None
 
 
+class CacheSettings(BaseModel):
+    enabled: bool = False
+
+    url: str | None = Field(
+        default=None,
+        description="Object store prefix to keep cached transcriptions under (in-memory LRU cache if not set)",
+    )
+
+    max_size: int = Field(
+        default=256 * 1024 * 1024,
+        description="Maximum size of the in-memory cache in bytes",
+    )
+
+
+class StageSettings(BaseModel):
+    directory: Path | None = Field(
+        default=None,
+        description="Directory to cache downloaded files in, so that retries and repeated transcriptions do not download them again (disabled if not set, incompatible with stream_files)",
+    )
+
+    max_size: int = Field(
+        default=10 * 1024 * 1024 * 1024,
+        description="Maximum size of the cached files in bytes",
+    )
+
+
+class RateLimitSettings(BaseModel):
+    max_concurrency: int | None = Field(
+        default=None,
+        ge=1,
+        description="Maximum number of concurrent ElevenLabs calls per process (disabled if neither this nor rate is set)",
+    )
+
+    rate: float | None = Field(
+        default=None,
+        gt=0,
+        description="Maximum number of ElevenLabs calls per second per process",
+    )
+
+    burst: int | None = Field(
+        default=None,
+        ge=1,
+        description="Number of calls allowed in a burst above the rate",
+    )
+
+
+class SchedulerSettings(BaseModel):
+    max_concurrency: int | None = Field(
+        default=None,
+        ge=1,
+        description="Maximum number of transcriptions running at the same time per process (scheduling is disabled if not set)",
+    )
+
+    tenant_concurrency: int | None = Field(
+        default=None,
+        ge=1,
+        description="Maximum number of transcriptions of a tenant running at the same time per process",
+    )
+
+    tenant_quotas: dict[str, int] = Field(
+        default={},
+        description="Per-tenant overrides of the tenant concurrency",
+    )
+
+    interactive_weight: float = Field(
+        default=8,
+        gt=0,
+        description="Share of capacity of interactive transcriptions while batch transcriptions are queued",
+    )
+
+    batch_weight: float = Field(
+        default=1,
+        gt=0,
+        description="Share of capacity of batch transcriptions while interactive transcriptions are queued",
+    )
+
+
+class TranscodeSettings(BaseModel):
+    enabled: bool = Field(
+        default=False,
+        description="Decode files to 16kHz mono PCM locally before uploading them (lower ElevenLabs latency)",
+    )
+
+    ffmpeg: str = Field(default="ffmpeg", description="The ffmpeg executable")
+
+
+class PresignSettings(BaseModel):
+    enabled: bool = Field(
+        default=False,
+        description="Let ElevenLabs download S3, GCS and Azure files through presigned URLs instead of uploading them",
+    )
+
+    expires_in: timedelta = Field(
+        default=timedelta(hours=1),
+        description="The validity of presigned URLs",
+    )
+
+
+class HttpSettings(BaseModel):
+    max_connections: int | None = Field(
+        default=100,
+        ge=1,
+        description="Maximum number of connections to ElevenLabs (unlimited if null)",
+    )
+
+    max_keepalive_connections: int | None = Field(
+        default=20,
+        ge=0,
+        description="Maximum number of idle connections kept open for reuse (unlimited if null)",
+    )
+
+    keepalive_expiry: float | None = Field(
+        default=60,
+        ge=0,
+        description="Time an idle connection is kept open for in seconds",
+    )
+
+    http2: bool = Field(
+        default=False,
+        description="Use HTTP/2 (multiplexes concurrent calls over fewer connections)",
+    )
+
+    connect_timeout: float | None = Field(
+        default=10,
+        gt=0,
+        description="Timeout of establishing a connection in seconds",
+    )
+
+    read_timeout: float | None = Field(
+        default=240,
+        gt=0,
+        description="Timeout of waiting for a response in seconds (covers transcribing the audio)",
+    )
+
+    write_timeout: float | None = Field(
+        default=60,
+        gt=0,
+        description="Timeout of sending a chunk of the request in seconds",
+    )
+
+    pool_timeout: float | None = Field(
+        default=None,
+        gt=0,
+        description="Timeout of waiting for a connection from the pool in seconds",
+    )
+
+    upload_chunk_size: int = Field(
+        default=256 * 1024,
+        ge=1024,
+        description="Size of the chunks local files and transcoded audio are read in while being uploaded in bytes "
+        "(streamed downloads are forwarded in the chunks they arrive in)",
+    )
+
+
+class MetricsSettings(BaseModel):
+    enabled: bool = Field(
+        default=False,
+        description="Serve Prometheus metrics (stage latencies, bytes transferred, errors) next to the service",
+    )
+
+    path: str = Field(default="/metrics", description="The path metrics are served at")
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_nested_delimiter="__")  # pyright: ignore[reportUnannotatedClassAttribute]
 
     obstore: ObstoreSettings = Field(default_factory=ObstoreSettings)
+    cache: CacheSettings = Field(default_factory=CacheSettings)
+    stage: StageSettings = Field(default_factory=StageSettings)
+    rate_limit: RateLimitSettings = Field(default_factory=RateLimitSettings)
+    scheduler: SchedulerSettings = Field(default_factory=SchedulerSettings)
+    transcode: TranscodeSettings = Field(default_factory=TranscodeSettings)
+    presign: PresignSettings = Field(default_factory=PresignSettings)
+    metrics: MetricsSettings = Field(default_factory=MetricsSettings)
+    http: HttpSettings = Field(default_factory=HttpSettings)
 
     service_name: str = "ElevenLabs"
 
+    stream_files: bool = Field(
+        default=False,
+        description="Stream object store files straight into the upload instead of staging them on disk",
+    )
+
+    single_flight: bool = Field(
+        default=True,
+        description="Share one transcription between identical requests running at the same time in a process",
+    )
+
     inactivity_timeout: timedelta | None = Field(
         alias="restate_inactivity_timeout",
         default=timedelta(minutes=10),
@@ -38,7 +234,15 @@ class Settings(BaseSettings):
     abort_timeout: timedelta | None = Field(alias="restate_abort_timeout", default=None)
     identity_keys: list[str] = Field(alias="restate_identity_keys", default=[])
 
+    webhook_secret: str | None = Field(
+        alias="elevenlabs_webhook_secret",
+        default=None,
+        description="Secret of the ElevenLabs speech to text webhook (enables the webhook and await handlers)",
+    )
+
 
+# The settings, object store, loader and persister are built at import (granian serves the app without a lifespan),
+# only the ElevenLabs client is created on first use: building the others is cheap and makes no network calls.
 settings = Settings()  # pyright: ignore[reportCallIssue]
 
 # logging.basicConfig(level=logging.INFO)
@@ -56,23 +260,124 @@ if settings.obstore.client_options:
 if settings.obstore.url:
     store = obstore.store.from_url(settings.obstore.url, client_options=client_options)
 
-loader = workstate.obstore.FileLoader(
+loader = AsyncFileLoader(
     store,
     client_options=client_options,
-    logger=structlog.get_logger("workstate"),
+    logger=structlog.get_logger("obstore"),
 )
 
-persister = workstate.obstore.FilePersister(
+persister = AsyncFilePersister(
     store,
     client_options=client_options,
-    logger=structlog.get_logger("workstate"),
+    logger=structlog.get_logger("obstore"),
 )
 
-executor = Executor(
-    ElevenLabs(),
+cache: Cache | None = None
+
+if settings.cache.enabled and settings.cache.url:
+    cache = ObjectStoreCache(
+        obstore.store.from_url(settings.cache.url, client_options=client_options),
+        logger=structlog.get_logger("obstore"),
+    )
+elif settings.cache.enabled:
+    cache = MemoryCache(settings.cache.max_size)
+
+limiter: RateLimiter | None = None
+
+if settings.rate_limit.max_concurrency or settings.rate_limit.rate:
+    limiter = RateLimiter(
+        max_concurrency=settings.rate_limit.max_concurrency,
+        rate=settings.rate_limit.rate,
+        burst=settings.rate_limit.burst,
+    )
+
+scheduler: Scheduler | None = None
+
+if settings.scheduler.max_concurrency:
+    scheduler = Scheduler(
+        max_concurrency=settings.scheduler.max_concurrency,
+        tenant_concurrency=settings.scheduler.tenant_concurrency,
+        tenant_quotas=settings.scheduler.tenant_quotas,
+        weights={
+            "interactive": settings.scheduler.interactive_weight,
+            "batch": settings.scheduler.batch_weight,
+        },
+    )
+
+transcoder: Transcoder | None = None
+
+if settings.transcode.enabled:
+    transcoder = FfmpegTranscoder(
+        settings.transcode.ffmpeg,
+        logger=structlog.get_logger("transcode"),
+    )
+
+metrics: Metrics | None = None
+
+if settings.metrics.enabled:
+    from .restate_elevenlabs.prometheus import PrometheusMetrics
+
+    metrics = PrometheusMetrics()
+
+stage: AudioStage | None = None
+
+if settings.stage.directory:
+    stage = AudioStage(
+        settings.stage.directory,
+        max_size=settings.stage.max_size,
+        logger=structlog.get_logger("staging"),
+        metrics=metrics,
+    )
+
+
+def create_elevenlabs() -> AsyncElevenLabs:
+    """Create the ElevenLabs client (called by the executor when it first needs it, keeping the SDK out of startup)."""
+
+    import httpx
+    from elevenlabs import AsyncElevenLabs
+
+    http_timeout = httpx.Timeout(
+        connect=settings.http.connect_timeout,
+        read=settings.http.read_timeout,
+        write=settings.http.write_timeout,
+        pool=settings.http.pool_timeout,
+    )
+
+    # One client shared by every call of the process, so that connections are reused
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.http.max_connections,
+            max_keepalive_connections=settings.http.max_keepalive_connections,
+            keepalive_expiry=settings.http.keepalive_expiry,
+        ),
+        timeout=http_timeout,
+        http2=settings.http.http2,
+        follow_redirects=True,
+    )
+
+    return AsyncElevenLabs(
+        httpx_client=http_client,
+        # The client passes its timeout to every request (overriding the timeouts of the httpx client),
+        # but it accepts anything httpx does
+        timeout=cast(Any, http_timeout),
+    )
+
+
+executor = AsyncExecutor(
+    create_elevenlabs,
     loader,
     persister,
     logger=structlog.get_logger("elevenlabs"),
+    stream=settings.stream_files,
+    cache=cache,
+    limiter=limiter,
+    transcoder=transcoder,
+    metrics=metrics,
+    single_flight=settings.single_flight,
+    presign=settings.presign.expires_in if settings.presign.enabled else None,
+    scheduler=scheduler,
+    stage=stage,
+    chunk_size=settings.http.upload_chunk_size,
 )
 
 service = create_service(
@@ -80,6 +385,20 @@ service = create_service(
     service_name=settings.service_name,
     inactivity_timeout=settings.inactivity_timeout,
     abort_timeout=settings.abort_timeout,
+    metrics=metrics,
+    webhook_secret=settings.webhook_secret,
 )
 
 app = restate.app(services=[service], identity_keys=settings.identity_keys)
+
+if metrics is not None:
+    import prometheus_client
+
+    restate_app = app
+    metrics_app = prometheus_client.make_asgi_app()
+
+    async def app(scope: Any, receive: Any, send: Any):
+        if scope["type"] == "http" and scope["path"] == settings.metrics.path:
+            return await metrics_app(scope, receive, send)
+
+        return await restate_app(scope, receive, send)
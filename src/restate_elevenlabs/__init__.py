@@ -1,24 +1,70 @@
+from .cache import Cache, MemoryCache
 from .executor import (
+    AsyncExecutor,
+    AsyncLoader,
+    AsyncPersister,
     Executor,
+    Loader,
+    Persister,
+    load_response,
 )
+from .files import AsyncFile
+from .limiter import RateLimiter
+from .metrics import Metrics
 from .model import (
     SpeechToTextConvertAsyncResponse,
+    SpeechToTextConvertBatchRequest,
+    SpeechToTextConvertBatchResponse,
     SpeechToTextConvertFileAsyncRequest,
     SpeechToTextConvertFileRequest,
     SpeechToTextConvertResponse,
+    SpeechToTextConvertResultReference,
     SpeechToTextConvertUrlAsyncRequest,
     SpeechToTextConvertUrlRequest,
+    SpeechToTextConvertVariantsRequest,
+    SpeechToTextConvertVariantsResponse,
+    SpeechToTextGetTranscriptRequest,
+    SpeechToTextWaitTranscriptRequest,
+    TextToSpeechConvertRequest,
+    TextToSpeechConvertResponse,
 )
 from .restate import create_service, register_service
+from .scheduler import Scheduler
+from .staging import AudioStage
+from .transcode import FfmpegTranscoder, Transcoder
 
 __all__ = [
+    "AsyncExecutor",
+    "AsyncFile",
+    "AsyncLoader",
+    "AsyncPersister",
+    "AudioStage",
+    "Cache",
     "Executor",
+    "FfmpegTranscoder",
+    "Loader",
+    "MemoryCache",
+    "Metrics",
+    "Persister",
+    "RateLimiter",
+    "Scheduler",
     "SpeechToTextConvertAsyncResponse",
+    "SpeechToTextConvertBatchRequest",
+    "SpeechToTextConvertBatchResponse",
     "SpeechToTextConvertFileAsyncRequest",
     "SpeechToTextConvertFileRequest",
     "SpeechToTextConvertResponse",
+    "SpeechToTextConvertResultReference",
     "SpeechToTextConvertUrlAsyncRequest",
     "SpeechToTextConvertUrlRequest",
+    "SpeechToTextConvertVariantsRequest",
+    "SpeechToTextConvertVariantsResponse",
+    "SpeechToTextGetTranscriptRequest",
+    "SpeechToTextWaitTranscriptRequest",
+    "TextToSpeechConvertRequest",
+    "TextToSpeechConvertResponse",
+    "Transcoder",
     "create_service",
+    "load_response",
     "register_service",
 ]
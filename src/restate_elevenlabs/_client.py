@@ -0,0 +1,245 @@
+"""Speech to text calls returning the response body unparsed.
+
+The ElevenLabs client parses responses into its own models in pure Python,
+which takes seconds for long transcriptions with character level timestamps.
+These functions send the same request through the HTTP layer of the client (authentication, retries, timeouts),
+but hand back the JSON body as is.
+"""
+
+from __future__ import annotations
+
+import json
+import mimetypes
+import secrets
+from collections.abc import AsyncIterator
+from json import JSONDecodeError
+from typing import TYPE_CHECKING, Any, cast
+
+from elevenlabs.core import ApiError, RequestOptions
+from elevenlabs.core.jsonable_encoder import jsonable_encoder
+
+from .files import AsyncFile
+
+if TYPE_CHECKING:
+    import httpx
+    from elevenlabs import AsyncElevenLabs, ElevenLabs
+
+# Same sentinel as the one used by the ElevenLabs client
+OMIT = cast(Any, ...)
+
+
+def speech_to_text_convert(client: ElevenLabs, **kwargs: Any) -> bytes:
+    response = client._client_wrapper.httpx_client.request(**_request(**kwargs))
+
+    return _content(response)
+
+
+async def speech_to_text_convert_async(
+    client: AsyncElevenLabs,
+    **kwargs: Any,
+) -> bytes:
+    response = await client._client_wrapper.httpx_client.request(**_request(**kwargs))
+
+    return _content(response)
+
+
+def speech_to_text_get_transcript(
+    client: ElevenLabs,
+    transcription_id: str,
+    request_options: RequestOptions | None = None,
+) -> bytes:
+    response = client._client_wrapper.httpx_client.request(
+        **_transcript_request(transcription_id, request_options)
+    )
+
+    return _content(response)
+
+
+async def speech_to_text_get_transcript_async(
+    client: AsyncElevenLabs,
+    transcription_id: str,
+    request_options: RequestOptions | None = None,
+) -> bytes:
+    response = await client._client_wrapper.httpx_client.request(
+        **_transcript_request(transcription_id, request_options)
+    )
+
+    return _content(response)
+
+
+def _request(
+    file: Any = OMIT,
+    additional_formats: Any = OMIT,
+    enable_logging: bool | None = None,
+    request_options: RequestOptions | None = None,
+    **data: Any,
+) -> dict[str, Any]:
+    if isinstance(file, AsyncFile):
+        return _stream_request(
+            file,
+            additional_formats,
+            enable_logging,
+            request_options,
+            **data,
+        )
+
+    files: dict[str, Any] = {}
+
+    if file is not OMIT and file is not None:
+        files["file"] = file
+
+    if additional_formats is not OMIT:
+        files["additional_formats"] = (
+            None,
+            json.dumps(jsonable_encoder(additional_formats)),
+            "application/json",
+        )
+
+    return dict(
+        path="v1/speech-to-text",
+        method="POST",
+        params={"enable_logging": enable_logging},
+        data=data,
+        files=files,
+        request_options=request_options,
+        omit=OMIT,
+        force_multipart=True,
+    )
+
+
+def _stream_request(
+    file: AsyncFile,
+    additional_formats: Any,
+    enable_logging: bool | None,
+    request_options: RequestOptions | None,
+    **data: Any,
+) -> dict[str, Any]:
+    """Build a request streaming the file into a multipart body.
+
+    The HTTP client reads multipart files synchronously (on the event loop for async clients),
+    so the body is encoded here instead, from the chunks of the file.
+    """
+
+    boundary = secrets.token_hex(16)
+
+    if request_options is not None:
+        data = {**data, **(request_options.get("additional_body_parameters") or {})}
+
+    fields = {
+        name: value
+        for name, value in data.items()
+        if value is not OMIT and value is not None
+    }
+
+    head = bytearray()
+
+    for name, value in jsonable_encoder(fields).items():
+        for item in value if isinstance(value, list) else [value]:
+            head += _part_header(boundary, name)
+            head += _form_value(item).encode() + b"\r\n"
+
+    if additional_formats is not OMIT:
+        head += _part_header(boundary, "additional_formats", None, "application/json")
+        head += json.dumps(jsonable_encoder(additional_formats)).encode() + b"\r\n"
+
+    head += _part_header(
+        boundary,
+        "file",
+        file.name,
+        mimetypes.guess_type(file.name)[0] or "application/octet-stream",
+    )
+    tail = f"\r\n--{boundary}--\r\n".encode()
+
+    headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    if file.size is not None:
+        headers["Content-Length"] = str(len(head) + file.size + len(tail))
+
+    return dict(
+        path="v1/speech-to-text",
+        method="POST",
+        params={"enable_logging": enable_logging},
+        content=_stream_body(bytes(head), file, tail),
+        headers=headers,
+        # The body can only be sent once: failed calls are retried by Restate
+        request_options=cast(
+            RequestOptions,
+            {**(request_options or {}), "max_retries": 0},
+        ),
+        omit=OMIT,
+    )
+
+
+async def _stream_body(
+    head: bytes, file: AsyncFile, tail: bytes
+) -> AsyncIterator[bytes]:
+    yield head
+
+    async for chunk in file:
+        yield chunk
+
+    yield tail
+
+
+def _part_header(
+    boundary: str,
+    name: str,
+    filename: str | None = None,
+    content_type: str | None = None,
+) -> bytes:
+    header = f'--{boundary}\r\nContent-Disposition: form-data; name="{_quote(name)}"'
+
+    if filename is not None:
+        header += f'; filename="{_quote(filename)}"'
+
+    if content_type is not None:
+        header += f"\r\nContent-Type: {content_type}"
+
+    return f"{header}\r\n\r\n".encode()
+
+
+def _quote(value: str) -> str:
+    # Same escaping as the HTTP client (and browsers)
+    return (
+        value.replace("\\", "\\\\")
+        .replace('"', "%22")
+        .replace("\r", "%0D")
+        .replace("\n", "%0A")
+    )
+
+
+def _form_value(value: Any) -> str:
+    # Same encoding of form values as the HTTP client
+    if value is True:
+        return "true"
+
+    if value is False:
+        return "false"
+
+    return str(value)
+
+
+def _transcript_request(
+    transcription_id: str,
+    request_options: RequestOptions | None,
+) -> dict[str, Any]:
+    return dict(
+        path=f"v1/speech-to-text/transcripts/{jsonable_encoder(transcription_id)}",
+        method="GET",
+        request_options=request_options,
+    )
+
+
+def _content(response: httpx.Response) -> bytes:
+    if 200 <= response.status_code < 300:
+        return response.content
+
+    try:
+        body = response.json()
+    except JSONDecodeError:
+        body = response.text
+
+    raise ApiError(
+        status_code=response.status_code,
+        headers=dict(response.headers),
+        body=body,
+    )
@@ -0,0 +1,137 @@
+import io
+import os
+import queue
+import threading
+from collections.abc import Iterable
+from typing import cast
+
+DEFAULT_READ_AHEAD = 4
+
+
+class ReadAheadReader(io.RawIOBase):
+    """Forward-only reader over a chunk iterator.
+
+    Chunks are fetched by a background thread into a bounded queue,
+    so reads are mostly served from memory while the chunks are still being produced.
+
+    If the size is known, the reader reports it through seek/tell
+    (so that HTTP clients can send a Content-Length instead of falling back to chunked encoding),
+    but it cannot be rewound once reading has started.
+    Otherwise the reader is not seekable.
+    """
+
+    _EOF = object()
+
+    def __init__(
+        self,
+        chunks: Iterable[bytes],
+        size: int | None,
+        name: str,
+        read_ahead: int = DEFAULT_READ_AHEAD,
+    ):
+        super().__init__()
+
+        self.name = name
+
+        self._size = size
+        self._pos = 0  # position requested by seek
+        self._read = 0  # position actually consumed from the stream
+        self._buffer = memoryview(b"")
+
+        self._queue: queue.Queue[object] = queue.Queue(maxsize=read_ahead)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._fill, args=(chunks,), daemon=True)
+        self._thread.start()
+
+    def _fill(self, chunks: Iterable[bytes]):
+        try:
+            for chunk in chunks:
+                if not self._put(chunk):
+                    return
+
+            self._put(self._EOF)
+        except BaseException as err:
+            self._put(err)
+
+    def _put(self, item: object) -> bool:
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+
+                return True
+            except queue.Full:
+                continue
+
+        return False
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return self._size is not None
+
+    def tell(self) -> int:
+        if self._size is None:
+            raise io.UnsupportedOperation("Stream is not seekable")
+
+        return self._pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if self._size is None:
+            raise io.UnsupportedOperation("Stream is not seekable")
+
+        if whence == os.SEEK_SET:
+            self._pos = offset
+        elif whence == os.SEEK_CUR:
+            self._pos += offset
+        elif whence == os.SEEK_END:
+            self._pos = self._size + offset
+        else:
+            raise ValueError(f"invalid whence ({whence})")
+
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        if self._pos != self._read:
+            # Not io.UnsupportedOperation: callers (eg. httpx) swallow that when rewinding
+            raise OSError("Stream cannot be rewound once reading has started")
+
+        while not self._buffer:
+            item = self._queue.get()
+
+            if item is self._EOF:
+                self._queue.put(item)
+
+                return 0
+
+            if isinstance(item, BaseException):
+                raise item
+
+            self._buffer = memoryview(cast(bytes, item))
+
+        n = min(len(buffer), len(self._buffer))
+        buffer[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+
+        self._pos += n
+        self._read += n
+
+        return n
+
+    def close(self):
+        self._stopped.set()
+
+        # Unblock the producer if it is waiting for room in the queue
+        while not self._queue.empty():
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+        # Wake up a consumer blocked on the queue (eg. a thread copying from the reader)
+        try:
+            self._queue.put_nowait(self._EOF)
+        except queue.Full:
+            pass
+
+        super().close()
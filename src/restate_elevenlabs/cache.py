@@ -0,0 +1,87 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Protocol
+
+from .model import SpeechToTextConvertRequestOptions
+
+
+# Request options that change the request sent to ElevenLabs
+_REQUEST_OPTIONS_KEYED = frozenset(
+    {
+        "additional_headers",
+        "additional_query_parameters",
+        "additional_body_parameters",
+    }
+)
+
+
+class Cache(Protocol):
+    """Stores serialized transcription results by cache key."""
+
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes): ...
+
+
+class MemoryCache:
+    """In-process LRU cache bounded by the total size of the stored values."""
+
+    def __init__(self, max_size: int = 256 * 1024 * 1024):
+        self.max_size = max_size
+
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+
+    async def get(self, key: str) -> bytes | None:
+        value = self._entries.get(key)
+
+        if value is not None:
+            self._entries.move_to_end(key)
+
+        return value
+
+    async def set(self, key: str, value: bytes):
+        if len(value) > self.max_size:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous)
+
+        self._entries[key] = value
+        self._size += len(value)
+
+        while self._size > self.max_size:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+
+def cache_key(source: str, options: SpeechToTextConvertRequestOptions) -> str:
+    """Compute the cache key of a transcription.
+
+    `source` identifies the audio (URL, object version or content hash).
+    Options are normalized so that unset values and transport settings (timeout, retries) do not affect the key,
+    while the request options that change the request sent to ElevenLabs (headers, query and body parameters) do.
+    """
+
+    normalized = options.model_dump(
+        mode="json",
+        exclude_none=True,
+        exclude={"request_options"},
+    )
+
+    request_options = {
+        name: value
+        for name, value in (options.request_options or {}).items()
+        if name in _REQUEST_OPTIONS_KEYED and value
+    }
+
+    payload = json.dumps(
+        {"source": source, "options": normalized, "request_options": request_options},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+
+    return hashlib.sha256(payload.encode()).hexdigest()
@@ -0,0 +1,187 @@
+import gzip
+import sys
+import zlib
+from collections.abc import Iterator
+from typing import Any
+
+import pydantic_core
+
+from .model import (
+    SpeechToTextConvertOutputCompression,
+    SpeechToTextConvertOutputFormat,
+    SpeechToTextConvertResponse,
+    SpeechToTextConvertResponseWord,
+)
+
+if sys.version_info >= (3, 14):
+    from compression import zstd
+else:
+    zstd = None
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def zstd_available() -> bool:
+    return zstd is not None
+
+
+def encode_response(
+    data: bytes,
+    format: SpeechToTextConvertOutputFormat = "json",
+    compression: SpeechToTextConvertOutputCompression | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Encode a transcription (serialized as JSON) in chunks.
+
+    Compressed output is produced incrementally, so it can be streamed into a (multipart) upload.
+    """
+
+    if format == "columnar":
+        data = pydantic_core.to_json(
+            _to_columnar(SpeechToTextConvertResponse.model_validate_json(data))
+        )
+
+    view = memoryview(data)
+    chunks = (view[i : i + chunk_size] for i in range(0, len(view), chunk_size))
+
+    if compression is None:
+        yield from (bytes(chunk) for chunk in chunks)
+
+        return
+
+    compressor = _compressor(compression)
+
+    for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+
+    if compressed := compressor.flush():
+        yield compressed
+
+
+def decode_response(
+    data: bytes,
+    format: SpeechToTextConvertOutputFormat = "json",
+    compression: SpeechToTextConvertOutputCompression | None = None,
+) -> SpeechToTextConvertResponse:
+    """Decode a transcription encoded by `encode_response`."""
+
+    if compression == "gzip":
+        data = gzip.decompress(data)
+    elif compression == "zstd":
+        data = _zstd().decompress(data)
+
+    if format == "columnar":
+        return _from_columnar(pydantic_core.from_json(data))
+
+    return SpeechToTextConvertResponse.model_validate_json(data)
+
+
+def _zstd() -> Any:
+    if zstd is None:
+        raise ValueError("zstd compression requires Python 3.14 or later")
+
+    return zstd
+
+
+def _compressor(compression: SpeechToTextConvertOutputCompression) -> Any:
+    if compression == "gzip":
+        # wbits=31: gzip container (same as the gzip module)
+        return zlib.compressobj(wbits=31)
+
+    return _zstd().ZstdCompressor()
+
+
+# Word attributes stored as columns (characters are stored separately)
+_WORD_COLUMNS = ("text", "start", "end", "type", "speaker_id", "logprob")
+_CHARACTER_COLUMNS = ("text", "start", "end")
+
+
+def _to_columnar(response: SpeechToTextConvertResponse) -> dict[str, Any]:
+    """Store words (and characters) as arrays of attributes instead of arrays of objects.
+
+    Characters of word `i` are at `characters.offsets[i]:characters.offsets[i + 1]`.
+    Channels of multichannel transcriptions are stored the same way.
+    """
+
+    result = response.model_dump(
+        mode="json",
+        exclude={"words", "transcripts", "reference"},
+    )
+    result.update(_words_to_columnar(response.words))
+
+    if response.transcripts is not None:
+        result["transcripts"] = [
+            transcript.model_dump(mode="json", exclude={"words"})
+            | _words_to_columnar(transcript.words)
+            for transcript in response.transcripts
+        ]
+
+    return result
+
+
+def _words_to_columnar(
+    words: list[SpeechToTextConvertResponseWord] | None,
+) -> dict[str, Any]:
+    if words is None:
+        return {}
+
+    columns = _WORD_COLUMNS
+
+    # Only merged multichannel transcriptions tell the channel of words
+    if any(word.channel_index is not None for word in words):
+        columns += ("channel_index",)
+
+    word_values: dict[str, list[Any]] = {column: [] for column in columns}
+    characters: dict[str, list[Any]] = {column: [] for column in _CHARACTER_COLUMNS}
+    offsets = [0]
+
+    for word in words:
+        for column in columns:
+            word_values[column].append(getattr(word, column))
+
+        for character in word.characters or []:
+            for column in _CHARACTER_COLUMNS:
+                characters[column].append(getattr(character, column))
+
+        offsets.append(len(characters["text"]))
+
+    result: dict[str, Any] = {}
+
+    if offsets[-1]:
+        result["characters"] = {"offsets": offsets, **characters}
+
+    result["words"] = word_values
+
+    return result
+
+
+def _from_columnar(data: dict[str, Any]) -> SpeechToTextConvertResponse:
+    _words_from_columnar(data)
+
+    for transcript in data.get("transcripts") or []:
+        _words_from_columnar(transcript)
+
+    return SpeechToTextConvertResponse.model_validate(data)
+
+
+def _words_from_columnar(data: dict[str, Any]):
+    words = data.pop("words", None)
+    characters = data.pop("characters", None)
+
+    if words is None:
+        return
+
+    data["words"] = [
+        {column: values[i] for column, values in words.items()}
+        for i in range(len(words["text"]))
+    ]
+
+    if characters is not None:
+        offsets = characters["offsets"]
+
+        for i, word in enumerate(data["words"]):
+            word["characters"] = [
+                {column: characters[column][j] for column in _CHARACTER_COLUMNS}
+                for j in range(offsets[i], offsets[i + 1])
+            ] or None
@@ -1,29 +1,107 @@
+import asyncio
+import base64
+import hashlib
+import heapq
+import json
 import logging
 import tempfile
+from collections import Counter
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterator
+from contextlib import (
+    AbstractAsyncContextManager,
+    ExitStack,
+    asynccontextmanager,
+    contextmanager,
+    nullcontext,
+)
+from datetime import timedelta
 from pathlib import Path, PurePosixPath
-from typing import Any, Optional, Protocol, TypeVar, cast
-
-from elevenlabs import (
-    ElevenLabs,
-    SpeechToTextChunkResponseModel,
-    SpeechToTextWebhookResponseModel,
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Optional,
+    Protocol,
+    TypeVar,
+    cast,
+    runtime_checkable,
 )
+from urllib.parse import urlsplit, urlunsplit
+
+from elevenlabs import SpeechToTextWebhookResponseModel
 from elevenlabs.core import ApiError
 from pydantic import AnyUrl, BaseModel
 from restate.exceptions import TerminalError
 
+from ._client import (
+    speech_to_text_convert,
+    speech_to_text_convert_async,
+    speech_to_text_get_transcript,
+    speech_to_text_get_transcript_async,
+)
+from .cache import Cache, cache_key
+from .encoding import decode_response, encode_response
+from .files import DEFAULT_CHUNK_SIZE, AsyncFile
+from .limiter import RateLimiter, parse_retry_after
+from .metrics import (
+    CACHE_TRANSCRIPTION,
+    DIRECTION_DOWNLOAD,
+    DIRECTION_PERSIST,
+    OPERATION_ELEVENLABS,
+    STAGE_CACHE,
+    STAGE_CONVERT,
+    STAGE_LOAD,
+    STAGE_PERSIST,
+    STAGE_QUEUE,
+    Metrics,
+    measure_call,
+    measure_request,
+    measure_stage,
+    record_response,
+)
 from .model import (
+    SpeechToTextConvertAdditionalFormatReference,
+    SpeechToTextConvertAsyncRequestOptions,
     SpeechToTextConvertAsyncResponse,
     SpeechToTextConvertFileAsyncRequest,
     SpeechToTextConvertFileRequest,
+    SpeechToTextConvertFileSegment,
+    SpeechToTextConvertFileSegmentation,
+    SpeechToTextConvertFileSegments,
+    SpeechToTextConvertFileStaged,
+    SpeechToTextConvertRequestOptions,
+    SpeechToTextConvertRequestOutput,
     SpeechToTextConvertRequestOutputMixin,
+    SpeechToTextConvertRequestScheduling,
     SpeechToTextConvertResponse,
+    SpeechToTextConvertResponseWord,
+    SpeechToTextConvertResultReference,
     SpeechToTextConvertUrlAsyncRequest,
     SpeechToTextConvertUrlRequest,
+    SpeechToTextConvertVariantsRequest,
+    SpeechToTextConvertWebhookRequest,
+    SpeechToTextGetTranscriptRequest,
+    TextToSpeechConvertRequest,
+    TextToSpeechConvertRequestOptions,
+    TextToSpeechConvertResponse,
 )
+from .scheduler import Scheduler
+from .singleflight import SingleFlight
+from .staging import AudioStage
+from .transcode import PCM_FILE_FORMAT, Transcoder
+
+if TYPE_CHECKING:
+    # Importing the clients imports every API of the SDK: they are only created (and imported) by the caller
+    from elevenlabs import AsyncElevenLabs, ElevenLabs
 
 _logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+SpeechToTextConvertOptionsT = TypeVar(
+    "SpeechToTextConvertOptionsT",
+    bound=SpeechToTextConvertRequestOptions,
+)
+
 
 class Loader(Protocol):
     def load(self, ref: AnyUrl | PurePosixPath, dst: Path): ...
@@ -37,75 +115,231 @@ class Persister(Protocol):
     ): ...
 
 
+class AsyncLoader(Protocol):
+    async def load(self, ref: AnyUrl | PurePosixPath, dst: Path): ...
+
+
+@runtime_checkable
+class StreamLoader(Protocol):
+    """Loader that can hand out a reader while the download is still in progress."""
+
+    def open(self, ref: AnyUrl | PurePosixPath) -> BinaryIO: ...
+
+
+@runtime_checkable
+class AsyncStreamLoader(Protocol):
+    """Async counterpart of `StreamLoader`: the file is streamed into the upload as its chunks are downloaded."""
+
+    async def open(self, ref: AnyUrl | PurePosixPath) -> AsyncFile: ...
+
+
+@runtime_checkable
+class AsyncVersionedLoader(Protocol):
+    """Loader that can tell the current version (eg. ETag) of an object without downloading it."""
+
+    async def version(self, ref: AnyUrl | PurePosixPath) -> str | None: ...
+
+
+@runtime_checkable
+class AsyncRangeLoader(Protocol):
+    """Loader that can read part of an object without downloading all of it."""
+
+    async def size(self, ref: AnyUrl | PurePosixPath) -> int: ...
+
+    async def read_range(
+        self,
+        ref: AnyUrl | PurePosixPath,
+        start: int,
+        end: int,
+    ) -> bytes: ...
+
+
+@runtime_checkable
+class AsyncSigningLoader(Protocol):
+    """Loader that can hand out temporary URLs of objects, so that ElevenLabs can download them directly."""
+
+    async def sign(
+        self,
+        ref: AnyUrl | PurePosixPath,
+        expires_in: timedelta,
+    ) -> str | None:
+        """Return a presigned URL of the object (or None if its store cannot sign URLs)."""
+        ...
+
+
+class AsyncPersister(Protocol):
+    async def persist(
+        self,
+        ref: AnyUrl | PurePosixPath,
+        src: bytes | bytearray | memoryview,
+    ): ...
+
+
+@runtime_checkable
+class AsyncStreamPersister(Protocol):
+    """Persister that can write a file while its content is still being produced (eg. using a multipart upload)."""
+
+    async def persist_stream(
+        self,
+        ref: AnyUrl | PurePosixPath,
+        src: AsyncIterable[bytes],
+    ): ...
+
+
 class Executor:
     def __init__(
         self,
-        elevenlabs: ElevenLabs,
+        elevenlabs: "ElevenLabs | Callable[[], ElevenLabs]",
         loader: Loader,
         persister: Persister,
         logger: logging.Logger = _logger,
+        stream: bool = False,
+        transcoder: Transcoder | None = None,
+        metrics: Metrics | None = None,
     ):
-        self.elevenlabs = elevenlabs
+        if stream and not isinstance(loader, StreamLoader):
+            raise TypeError("Streaming requires a loader implementing StreamLoader")
+
+        self._elevenlabs = elevenlabs
         self.loader = loader
         self.persister = persister
         self.logger = logger
+        self.stream = stream
+        self.transcoder = transcoder
+        self.metrics = metrics
+
+    @property
+    def elevenlabs(self) -> "ElevenLabs":
+        """The ElevenLabs client (created on first use if the executor was given a factory)."""
+
+        if callable(self._elevenlabs):
+            self._elevenlabs = self._elevenlabs()
+
+        return self._elevenlabs
+
+    @contextmanager
+    def _open(
+        self,
+        ref: AnyUrl | PurePosixPath,
+        transcode: bool = False,
+    ) -> Iterator[BinaryIO]:
+        if self.stream:
+            with ExitStack() as stack:
+                with measure_stage(self.metrics, STAGE_LOAD):
+                    file = stack.enter_context(
+                        cast(StreamLoader, self.loader).open(ref)
+                    )
+
+                if transcode:
+                    assert self.transcoder is not None
+
+                    with self.transcoder.open(file) as pcm:
+                        yield pcm
+                else:
+                    yield file
+
+            return
+
+        with tempfile.NamedTemporaryFile(delete=True) as temp_file:
+            with measure_stage(self.metrics, STAGE_LOAD):
+                self.loader.load(ref, Path(temp_file.name))
+
+            if transcode:
+                assert self.transcoder is not None
+
+                with self.transcoder.open(Path(temp_file.name)) as pcm:
+                    yield pcm
+
+                return
+
+            with open(temp_file.name, "rb") as file:
+                yield file
 
     def _handle_response(
         self,
         request: SpeechToTextConvertRequestOutputMixin,
-        response: BaseModel,
-    ) -> bool:
-        return_ = (
-            bool(request.output.destination)
-            if request.output.return_ is None
-            else request.output.return_
-        )
+        data: bytes,
+    ) -> SpeechToTextConvertResponse:
+        reference = None
+
+        if request.output.merge_channels:
+            data = _merge_channels(data)
 
         if request.output.destination:
-            self.persister.persist(
-                request.output.destination,
-                response.model_dump_json(indent=4).encode(),
+            with measure_stage(self.metrics, STAGE_PERSIST):
+                if request.output.separate_additional_formats:
+                    data, files = _split_additional_formats(request.output, data)
+
+                    for destination, content in files:
+                        self.persister.persist(destination, content)
+
+                        if self.metrics is not None:
+                            self.metrics.transfer(DIRECTION_PERSIST, len(content))
+
+                encoded = b"".join(
+                    encode_response(
+                        data,
+                        request.output.format,
+                        request.output.compression,
+                    )
+                )
+
+                self.persister.persist(request.output.destination, encoded)
+
+            if self.metrics is not None:
+                self.metrics.transfer(DIRECTION_PERSIST, len(encoded))
+
+            reference = _build_reference(
+                request.output,
+                data,
+                len(encoded),
+                _digest(encoded),
             )
 
-        return return_
+        with measure_stage(self.metrics, STAGE_CONVERT):
+            return _build_response(request, data, reference)
+
+    def _call(self, call: Callable[..., T], **kwargs: Any) -> T:
+        with (
+            measure_call(self.metrics, OPERATION_ELEVENLABS),
+            measure_request(self.metrics, kwargs.get("file")) as file,
+        ):
+            if file is not None:
+                kwargs["file"] = file
+
+            try:
+                return call(**kwargs)
+            except ApiError as err:
+                if _is_terminal(err):
+                    raise _convert_api_error(err) from err
+
+                raise err
+
+    def _convert(
+        self,
+        options: SpeechToTextConvertRequestOptions,
+        **kwargs: Any,
+    ) -> bytes:
+        """Transcribe synchronously, returning the JSON response of ElevenLabs as is."""
+
+        data = self._call(
+            speech_to_text_convert,
+            client=self.elevenlabs,
+            **kwargs,
+            **_convert_options(options),
+        )
+        record_response(self.metrics, data)
+
+        return data
 
     def speech_to_text_convert_url(
         self, request: SpeechToTextConvertUrlRequest
     ) -> SpeechToTextConvertResponse:
         self.logger.info("Transcribing URL", extra={"url": str(request.url)})
 
-        try:
-            response = self.elevenlabs.speech_to_text.convert(
-                cloud_storage_url=request.url,
-                #
-                model_id=request.options.model_id,
-                enable_logging=request.options.enable_logging,
-                language_code=optional(request.options.language_code),
-                tag_audio_events=optional(request.options.tag_audio_events),
-                num_speakers=optional(request.options.num_speakers),
-                timestamps_granularity=optional(request.options.timestamps_granularity),
-                diarize=optional(request.options.diarize),
-                diarization_threshold=optional(request.options.diarization_threshold),
-                additional_formats=optional(request.options.additional_formats),
-                file_format=optional(request.options.file_format),
-                temperature=optional(request.options.temperature),
-                seed=optional(request.options.seed),
-                # use_multi_channel=optional(request.options.use_multi_channel), # Multi channel response is not handled at the moment
-                request_options=request.options.request_options,
-            )
-            assert isinstance(response, SpeechToTextChunkResponseModel)
-
-            return_ = self._handle_response(request, response)
+        data = self._convert(request.options, cloud_storage_url=request.url)
 
-            if return_:
-                return SpeechToTextConvertResponse.model_validate(response.model_dump())
-
-            return SpeechToTextConvertResponse()
-        except ApiError as err:
-            if _is_terminal(err):
-                raise _convert_api_error(err) from err
-
-            raise err
+        return self._handle_response(request, data)
 
     def speech_to_text_convert_url_async(
         self,
@@ -113,138 +347,899 @@ class Executor:
     ) -> SpeechToTextConvertAsyncResponse:
         self.logger.info("Transcribing URL", extra={"url": str(request.url)})
 
-        try:
-            response = self.elevenlabs.speech_to_text.convert(
-                cloud_storage_url=request.url,
-                #
-                webhook=True,
-                webhook_id=request.options.webhook_id,
-                webhook_metadata=request.options.webhook_metadata,
-                #
-                model_id=request.options.model_id,
-                enable_logging=request.options.enable_logging,
-                language_code=optional(request.options.language_code),
-                tag_audio_events=optional(request.options.tag_audio_events),
-                num_speakers=optional(request.options.num_speakers),
-                timestamps_granularity=optional(request.options.timestamps_granularity),
-                diarize=optional(request.options.diarize),
-                diarization_threshold=optional(request.options.diarization_threshold),
-                additional_formats=optional(request.options.additional_formats),
-                file_format=optional(request.options.file_format),
-                temperature=optional(request.options.temperature),
-                seed=optional(request.options.seed),
-                # use_multi_channel=optional(request.options.use_multi_channel), # Multi channel response is not handled at the moment
-                request_options=request.options.request_options,
-            )
-            assert isinstance(response, SpeechToTextWebhookResponseModel)
-
-            return SpeechToTextConvertAsyncResponse.model_validate(
-                response.model_dump(),
-            )
-        except ApiError as err:
-            if _is_terminal(err):
-                raise _convert_api_error(err) from err
+        response = self._call(
+            self.elevenlabs.speech_to_text.convert,
+            cloud_storage_url=request.url,
+            **_convert_options(request.options),
+        )
+        assert isinstance(response, SpeechToTextWebhookResponseModel)
 
-            raise err
+        return SpeechToTextConvertAsyncResponse.model_validate(
+            response,
+            from_attributes=True,
+        )
 
     def speech_to_text_convert_file(
         self, request: SpeechToTextConvertFileRequest
     ) -> SpeechToTextConvertResponse:
         self.logger.info("Transcribing file", extra={"file": str(request.file)})
 
+        options, transcode = _transcode_options(self.transcoder, request.options)
+
+        with self._open(request.file, transcode) as file:
+            data = self._convert(options, file=file)
+
+        return self._handle_response(request, data)
+
+    def speech_to_text_convert_file_async(
+        self,
+        request: SpeechToTextConvertFileAsyncRequest,
+    ) -> SpeechToTextConvertAsyncResponse:
+        self.logger.info("Transcribing file", extra={"file": str(request.file)})
+
+        options, transcode = _transcode_options(self.transcoder, request.options)
+
+        with self._open(request.file, transcode) as file:
+            response = self._call(
+                self.elevenlabs.speech_to_text.convert,
+                file=file,
+                **_convert_options(options),
+            )
+        assert isinstance(response, SpeechToTextWebhookResponseModel)
+
+        return SpeechToTextConvertAsyncResponse.model_validate(
+            response,
+            from_attributes=True,
+        )
+
+    def speech_to_text_convert_webhook(
+        self,
+        request: SpeechToTextConvertWebhookRequest,
+    ) -> SpeechToTextConvertResponse:
+        """Handle a transcription received through a webhook according to the output configuration of the request."""
+
+        self.logger.info(
+            "Handling webhook transcription",
+            extra={"transcription_id": request.transcription.transcription_id},
+        )
+
+        return self._handle_response(request, _dump_response(request.transcription))
+
+    def speech_to_text_get_transcript(
+        self,
+        request: SpeechToTextGetTranscriptRequest,
+    ) -> SpeechToTextConvertResponse:
+        self.logger.info(
+            "Fetching transcript",
+            extra={"transcription_id": request.transcription_id},
+        )
+
+        data = self._call(
+            speech_to_text_get_transcript,
+            client=self.elevenlabs,
+            transcription_id=request.transcription_id,
+            request_options=request.request_options,
+        )
+        record_response(self.metrics, data)
+
+        return self._handle_response(request, data)
+
+
+class AsyncExecutor:
+    """Non-blocking counterpart of `Executor` built on `AsyncElevenLabs`.
+
+    Handlers await these methods directly on the event loop instead of
+    occupying a worker thread for the duration of the transcription.
+    """
+
+    def __init__(
+        self,
+        elevenlabs: "AsyncElevenLabs | Callable[[], AsyncElevenLabs]",
+        loader: AsyncLoader,
+        persister: AsyncPersister,
+        logger: logging.Logger = _logger,
+        stream: bool = False,
+        cache: Cache | None = None,
+        limiter: RateLimiter | None = None,
+        transcoder: Transcoder | None = None,
+        metrics: Metrics | None = None,
+        single_flight: bool = False,
+        presign: timedelta | None = None,
+        scheduler: Scheduler | None = None,
+        stage: AudioStage | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        if stream and not isinstance(loader, AsyncStreamLoader):
+            raise TypeError(
+                "Streaming requires a loader implementing AsyncStreamLoader"
+            )
+
+        if stage is not None and not isinstance(loader, AsyncVersionedLoader):
+            raise TypeError(
+                "Staging requires a loader implementing AsyncVersionedLoader"
+            )
+
+        if stage is not None and stream:
+            raise ValueError("Staging and streaming are mutually exclusive")
+
+        if presign is not None and not isinstance(loader, AsyncSigningLoader):
+            raise TypeError(
+                "Presigning requires a loader implementing AsyncSigningLoader"
+            )
+
+        self._elevenlabs = elevenlabs
+        self.loader = loader
+        self.persister = persister
+        self.logger = logger
+        self.stream = stream
+        self.cache = cache
+        self.limiter = limiter
+        self.transcoder = transcoder
+        self.metrics = metrics
+        self.single_flight: SingleFlight[bytes] | None = (
+            SingleFlight() if single_flight else None
+        )
+        self.presign = presign
+        self.scheduler = scheduler
+        self.stage = stage
+        # Of local files and transcoded audio being uploaded
+        self.chunk_size = chunk_size
+
+        # Holds files shared by `share_file` when no stage is configured
+        self._scratch: AudioStage | None = None
+        self._scratch_directory: tempfile.TemporaryDirectory[str] | None = None
+        # Number of `share_file` contexts by file
+        self._shared: Counter[str] = Counter()
+
+    @property
+    def elevenlabs(self) -> "AsyncElevenLabs":
+        """The ElevenLabs client (created on first use if the executor was given a factory)."""
+
+        if callable(self._elevenlabs):
+            self._elevenlabs = self._elevenlabs()
+
+        return self._elevenlabs
+
+    @asynccontextmanager
+    async def _schedule(
+        self,
+        scheduling: SpeechToTextConvertRequestScheduling,
+    ) -> AsyncIterator[None]:
+        """Hold a slot of the scheduler (if any) for the duration of a transcription."""
+
+        if self.scheduler is None:
+            yield
+
+            return
+
+        with measure_stage(self.metrics, STAGE_QUEUE):
+            await self.scheduler.acquire(scheduling.tenant, scheduling.priority)
+
+        try:
+            yield
+        finally:
+            self.scheduler.release(scheduling.tenant)
+
+    @asynccontextmanager
+    async def _open(
+        self,
+        ref: AnyUrl | PurePosixPath,
+        transcode: bool = False,
+    ) -> AsyncIterator[AsyncFile]:
+        """Open a file for upload: blocking reads (of local files and of the transcoder) run in worker threads."""
+
+        if self.stream:
+            with measure_stage(self.metrics, STAGE_LOAD):
+                file = await cast(AsyncStreamLoader, self.loader).open(ref)
+
+            if not transcode:
+                yield file
+
+                return
+
+            assert self.transcoder is not None
+
+            # The transcoder reads the download from its own thread
+            with file.reader() as src, self.transcoder.open(src) as pcm:
+                yield AsyncFile.from_reader(
+                    pcm, _pcm_name(file.name), chunk_size=self.chunk_size
+                )
+
+            return
+
+        name = _file_name(ref)
+
+        key = await self._stage_key(ref)
+        if key is not None:
+            assert self.stage is not None
+
+            async with self._stage_file(self.stage, ref, key) as path:
+                with self._open_path(path, name, transcode) as file:
+                    yield file
+
+            return
+
+        if self._scratch is not None and str(ref) in self._shared:
+            key = await self._version_key(ref)
+
+            if key is not None and self._scratch.retained(key):
+                async with self._stage_file(self._scratch, ref, key) as path:
+                    with self._open_path(path, name, transcode) as file:
+                        yield file
+
+                return
+
         with tempfile.NamedTemporaryFile(delete=True) as temp_file:
-            self.loader.load(request.file, Path(temp_file.name))
+            with measure_stage(self.metrics, STAGE_LOAD):
+                await self.loader.load(ref, Path(temp_file.name))
 
-            try:
-                with open(temp_file.name, "rb") as file:
-                    response = self.elevenlabs.speech_to_text.convert(
-                        file=file,
-                        #
-                        model_id=request.options.model_id,
-                        enable_logging=request.options.enable_logging,
-                        language_code=optional(request.options.language_code),
-                        tag_audio_events=optional(request.options.tag_audio_events),
-                        num_speakers=optional(request.options.num_speakers),
-                        timestamps_granularity=optional(
-                            request.options.timestamps_granularity
-                        ),
-                        diarize=optional(request.options.diarize),
-                        diarization_threshold=optional(
-                            request.options.diarization_threshold
-                        ),
-                        additional_formats=optional(request.options.additional_formats),
-                        file_format=optional(request.options.file_format),
-                        temperature=optional(request.options.temperature),
-                        seed=optional(request.options.seed),
-                        # use_multi_channel=optional(request.options.use_multi_channel), # Multi channel response is not handled at the moment
-                        request_options=request.options.request_options,
+            with self._open_path(Path(temp_file.name), name, transcode) as file:
+                yield file
+
+    @contextmanager
+    def _open_path(self, path: Path, name: str, transcode: bool) -> Iterator[AsyncFile]:
+        if transcode:
+            assert self.transcoder is not None
+
+            with self.transcoder.open(path) as pcm:
+                yield AsyncFile.from_reader(
+                    pcm, _pcm_name(name), chunk_size=self.chunk_size
+                )
+
+            return
+
+        yield AsyncFile.from_path(path, name, self.chunk_size)
+
+    async def _stage_key(self, ref: AnyUrl | PurePosixPath) -> str | None:
+        """Return the stage key of the current version of a file (None if the file cannot be staged)."""
+
+        if self.stage is None:
+            return None
+
+        return await self._version_key(ref)
+
+    async def _version_key(self, ref: AnyUrl | PurePosixPath) -> str | None:
+        """Return the key of the current version of a file (None if the loader cannot tell it)."""
+
+        if not isinstance(self.loader, AsyncVersionedLoader):
+            return None
+
+        version = await self.loader.version(ref)
+        if version is None:
+            return None
+
+        return f"{ref}@{version}"
+
+    def _stage_file(
+        self,
+        stage: AudioStage,
+        ref: AnyUrl | PurePosixPath,
+        key: str,
+    ) -> AbstractAsyncContextManager[Path]:
+        """Use the staged copy of a file, downloading it if needed."""
+
+        async def load(dst: Path):
+            with measure_stage(self.metrics, STAGE_LOAD):
+                await self.loader.load(ref, dst)
+
+        return stage.open(key, load)
+
+    @asynccontextmanager
+    async def share_file(self, ref: AnyUrl | PurePosixPath) -> AsyncIterator[None]:
+        """Download a file at most once for the transcriptions run in the context (eg. the variants of a file).
+
+        Without a configured stage, the current version of the file is kept in a temporary directory until the context exits
+        (the directory is removed by `aclose`).
+        With a stage, the file is shared through the stage (see `speech_to_text_convert_variants_stage`).
+        Streamed files and files whose version the loader cannot tell are not shared.
+        """
+
+        if self.stage is not None or self.stream:
+            yield
+
+            return
+
+        key = await self._version_key(ref)
+        if key is None:
+            yield
+
+            return
+
+        if self._scratch is None:
+            self._scratch_directory = tempfile.TemporaryDirectory(
+                prefix="restate-elevenlabs-"
+            )
+            self._scratch = AudioStage(
+                self._scratch_directory.name,
+                max_size=0,
+                logger=self.logger,
+            )
+
+        self._shared[str(ref)] += 1
+
+        try:
+            with self._scratch.retain(key):
+                yield
+        finally:
+            self._shared[str(ref)] -= 1
+
+            if not self._shared[str(ref)]:
+                del self._shared[str(ref)]
+
+    async def aclose(self):
+        """Remove the temporary directory of the files shared by `share_file`."""
+
+        if self._scratch_directory is not None:
+            await asyncio.to_thread(self._scratch_directory.cleanup)
+
+            self._scratch = None
+            self._scratch_directory = None
+
+    async def _handle_response(
+        self,
+        request: SpeechToTextConvertRequestOutputMixin,
+        data: bytes,
+    ) -> SpeechToTextConvertResponse:
+        reference = None
+
+        if request.output.merge_channels:
+            data = _merge_channels(data)
+
+        if request.output.destination:
+            with measure_stage(self.metrics, STAGE_PERSIST):
+                if request.output.separate_additional_formats:
+                    data = await self._persist_additional_formats(
+                        request.output,
+                        data,
                     )
-                    assert isinstance(response, SpeechToTextChunkResponseModel)
 
-                    return_ = self._handle_response(request, response)
+                reference = await self._persist(request.output, data)
+
+            if self.metrics is not None:
+                self.metrics.transfer(DIRECTION_PERSIST, reference.size)
+
+        with measure_stage(self.metrics, STAGE_CONVERT):
+            return _build_response(request, data, reference)
+
+    async def _persist_additional_formats(
+        self,
+        output: SpeechToTextConvertRequestOutput,
+        data: bytes,
+    ) -> bytes:
+        data, files = _split_additional_formats(output, data)
+
+        await asyncio.gather(
+            *(
+                self.persister.persist(destination, content)
+                for destination, content in files
+            )
+        )
+
+        if self.metrics is not None:
+            for _, content in files:
+                self.metrics.transfer(DIRECTION_PERSIST, len(content))
+
+        return data
+
+    async def _persist(
+        self,
+        output: SpeechToTextConvertRequestOutput,
+        data: bytes,
+    ) -> SpeechToTextConvertResultReference:
+        assert output.destination is not None
+
+        if output.format == "json" and output.compression is None:
+            await self.persister.persist(output.destination, data)
 
-                    if return_:
-                        return SpeechToTextConvertResponse.model_validate(
-                            response.model_dump()
-                        )
+            return _build_reference(output, data, len(data), _digest(data))
 
-                    return SpeechToTextConvertResponse()
+        chunks = encode_response(data, output.format, output.compression)
+
+        if not isinstance(self.persister, AsyncStreamPersister):
+            encoded = await asyncio.to_thread(b"".join, chunks)
+            await self.persister.persist(output.destination, encoded)
+
+            return _build_reference(output, data, len(encoded), _digest(encoded))
+
+        digest = hashlib.sha256()
+        size = 0
+
+        # Encoding (eg. compression) runs in a worker thread, one chunk at a time
+        async def stream() -> AsyncIterator[bytes]:
+            nonlocal size
+
+            while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                digest.update(chunk)
+                size += len(chunk)
+
+                yield chunk
+
+        await self.persister.persist_stream(output.destination, stream())
+
+        return _build_reference(output, data, size, f"sha256:{digest.hexdigest()}")
+
+    async def _call(self, call: Callable[..., Awaitable[T]], **kwargs: Any) -> T:
+        async with self.limiter.acquire() if self.limiter else nullcontext():
+            try:
+                with (
+                    measure_call(self.metrics, OPERATION_ELEVENLABS),
+                    measure_request(self.metrics, kwargs.get("file")) as file,
+                ):
+                    if file is not None:
+                        kwargs["file"] = file
+
+                    response = await call(**kwargs)
             except ApiError as err:
+                if err.status_code == 429 and self.limiter is not None:
+                    self.limiter.backoff(parse_retry_after(err.headers))
+
                 if _is_terminal(err):
                     raise _convert_api_error(err) from err
 
                 raise err
 
-    def speech_to_text_convert_file_async(
+            if self.limiter is not None:
+                self.limiter.success()
+
+            return response
+
+    async def _speech_to_text_convert(
+        self,
+        options: SpeechToTextConvertAsyncRequestOptions,
+        **kwargs: Any,
+    ) -> SpeechToTextConvertAsyncResponse:
+        """Start an async transcription (completed through a webhook)."""
+
+        data = await self._call(
+            speech_to_text_convert_async,
+            client=self.elevenlabs,
+            **kwargs,
+            **_convert_options(options),
+        )
+
+        return SpeechToTextConvertAsyncResponse.model_validate_json(data)
+
+    async def _convert(
+        self,
+        options: SpeechToTextConvertRequestOptions,
+        **kwargs: Any,
+    ) -> bytes:
+        """Transcribe synchronously, returning the JSON response of ElevenLabs as is."""
+
+        data = await self._call(
+            speech_to_text_convert_async,
+            client=self.elevenlabs,
+            **kwargs,
+            **_convert_options(options),
+        )
+        record_response(self.metrics, data)
+
+        return data
+
+    async def _coalesce(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[bytes]],
+    ) -> bytes:
+        """Share the transcription with identical requests in flight (if enabled)."""
+
+        if self.single_flight is None:
+            return await call()
+
+        if key in self.single_flight:
+            self.logger.info("Joining transcription in flight", extra={"key": key})
+
+        return await self.single_flight.do(key, call)
+
+    async def _cache_get(self, key: str | None) -> bytes | None:
+        if self.cache is None or key is None:
+            return None
+
+        with measure_stage(self.metrics, STAGE_CACHE):
+            data = await self.cache.get(key)
+
+        if self.metrics is not None:
+            self.metrics.cache_lookup(CACHE_TRANSCRIPTION, data is not None)
+
+        if data is not None:
+            self.logger.info("Transcription cache hit", extra={"key": key})
+
+        return data
+
+    async def _cache_set(self, key: str | None, data: bytes):
+        if self.cache is None or key is None:
+            return
+
+        with measure_stage(self.metrics, STAGE_CACHE):
+            await self.cache.set(key, data)
+
+    async def _file_cache_key(
+        self,
+        request: SpeechToTextConvertFileRequest,
+    ) -> str | None:
+        if self.cache is None:
+            return None
+
+        return await self._file_key(request)
+
+    async def _file_key(self, request: SpeechToTextConvertFileRequest) -> str | None:
+        """Key a file transcription by object version, or return None when the loader cannot tell it."""
+
+        if not isinstance(self.loader, AsyncVersionedLoader):
+            return None
+
+        version = await self.loader.version(request.file)
+        if version is None:
+            return None
+
+        return cache_key(f"{request.file}@{version}", request.options)
+
+    async def speech_to_text_convert_url(
+        self, request: SpeechToTextConvertUrlRequest
+    ) -> SpeechToTextConvertResponse:
+        self.logger.info("Transcribing URL", extra={"url": str(request.url)})
+
+        data = await self._coalesce(
+            cache_key(request.url, request.options),
+            lambda: self._transcribe_url(request),
+        )
+
+        return await self._handle_response(request, data)
+
+    async def _transcribe_url(self, request: SpeechToTextConvertUrlRequest) -> bytes:
+        key = cache_key(request.url, request.options) if self.cache else None
+
+        data = await self._cache_get(key)
+        if data is None:
+            async with self._schedule(request.scheduling):
+                data = await self._convert(
+                    request.options,
+                    cloud_storage_url=request.url,
+                )
+
+            await self._cache_set(key, data)
+
+        return data
+
+    async def speech_to_text_convert_url_async(
+        self,
+        request: SpeechToTextConvertUrlAsyncRequest,
+    ) -> SpeechToTextConvertAsyncResponse:
+        self.logger.info("Transcribing URL", extra={"url": str(request.url)})
+
+        async with self._schedule(request.scheduling):
+            return await self._speech_to_text_convert(
+                request.options,
+                cloud_storage_url=request.url,
+            )
+
+    async def speech_to_text_convert_file(
+        self, request: SpeechToTextConvertFileRequest
+    ) -> SpeechToTextConvertResponse:
+        self.logger.info("Transcribing file", extra={"file": str(request.file)})
+
+        # Files are only cached and shared by version, as the object may change between requests
+        key = (
+            await self._file_key(request)
+            if self.cache is not None or self.single_flight is not None
+            else None
+        )
+
+        if key is None:
+            data = await self._transcribe_file(request, None)
+        else:
+            data = await self._coalesce(
+                key, lambda: self._transcribe_file(request, key)
+            )
+
+        return await self._handle_response(request, data)
+
+    async def _transcribe_file(
+        self,
+        request: SpeechToTextConvertFileRequest,
+        key: str | None,
+    ) -> bytes:
+        data = await self._cache_get(key)
+        if data is not None:
+            return data
+
+        async with self._schedule(request.scheduling):
+            return await self._transcribe_file_uncached(request, key)
+
+    async def _transcribe_file_uncached(
+        self,
+        request: SpeechToTextConvertFileRequest,
+        key: str | None,
+    ) -> bytes:
+        url = await self._sign(request.file)
+        if url is not None:
+            data = await self._convert(request.options, cloud_storage_url=url)
+            await self._cache_set(key, data)
+
+            return data
+
+        options, transcode = _transcode_options(self.transcoder, request.options)
+        data = None
+
+        async with self._open(request.file, transcode) as file:
+            # Fall back to a content hash when the loader cannot tell the object version
+            if self.cache is not None and key is None and file.path is not None:
+                digest = await asyncio.to_thread(_file_digest, file.path)
+                key = cache_key(digest, request.options)
+                data = await self._cache_get(key)
+
+            if data is None:
+                data = await self._convert(options, file=file)
+                await self._cache_set(key, data)
+
+        return data
+
+    async def speech_to_text_convert_file_stage(
+        self,
+        request: SpeechToTextConvertFileRequest,
+    ) -> SpeechToTextConvertFileStaged:
+        """Download a file into the stage (if enabled), so that retries of its transcription do not download it again.
+
+        Files that will not be downloaded for the transcription (cached or presigned) are not staged.
+        """
+
+        if self.stage is None:
+            return SpeechToTextConvertFileStaged()
+
+        if await self._cache_get(await self._file_cache_key(request)) is not None:
+            return SpeechToTextConvertFileStaged()
+
+        return await self._stage(request.file)
+
+    async def speech_to_text_convert_variants_stage(
+        self,
+        request: SpeechToTextConvertVariantsRequest,
+    ) -> SpeechToTextConvertFileStaged:
+        """Download the file of a variants request into the stage (if enabled), so that the variants share a single download."""
+
+        if self.stage is None or request.file is None:
+            return SpeechToTextConvertFileStaged()
+
+        return await self._stage(request.file)
+
+    async def _stage(
+        self, ref: AnyUrl | PurePosixPath
+    ) -> SpeechToTextConvertFileStaged:
+        # Presigned files are downloaded by ElevenLabs
+        if (
+            self.presign is not None
+            and isinstance(self.loader, AsyncSigningLoader)
+            and await self.loader.sign(ref, self.presign) is not None
+        ):
+            return SpeechToTextConvertFileStaged()
+
+        key = await self._stage_key(ref)
+        if key is None:
+            return SpeechToTextConvertFileStaged()
+
+        self.logger.info("Staging file", extra={"file": str(ref)})
+
+        assert self.stage is not None
+
+        async with self._stage_file(self.stage, ref, key) as path:
+            return SpeechToTextConvertFileStaged(key=key, size=path.stat().st_size)
+
+    async def _sign(self, ref: AnyUrl | PurePosixPath) -> str | None:
+        if self.presign is None or not isinstance(self.loader, AsyncSigningLoader):
+            return None
+
+        url = await self.loader.sign(ref, self.presign)
+
+        if url is not None:
+            self.logger.info(
+                "Transcribing file through a presigned URL",
+                extra={"file": str(ref)},
+            )
+
+        return url
+
+    async def speech_to_text_convert_file_async(
         self,
         request: SpeechToTextConvertFileAsyncRequest,
     ) -> SpeechToTextConvertAsyncResponse:
         self.logger.info("Transcribing file", extra={"file": str(request.file)})
 
-        with tempfile.NamedTemporaryFile(delete=True) as temp_file:
-            self.loader.load(request.file, Path(temp_file.name))
+        async with self._schedule(request.scheduling):
+            url = await self._sign(request.file)
+            if url is not None:
+                return await self._speech_to_text_convert(
+                    request.options,
+                    cloud_storage_url=url,
+                )
 
-            try:
-                with open(temp_file.name, "rb") as file:
-                    response = self.elevenlabs.speech_to_text.convert(
-                        file=file,
-                        #
-                        webhook=True,
-                        webhook_id=request.options.webhook_id,
-                        webhook_metadata=request.options.webhook_metadata,
-                        #
-                        model_id=request.options.model_id,
-                        enable_logging=request.options.enable_logging,
-                        language_code=optional(request.options.language_code),
-                        tag_audio_events=optional(request.options.tag_audio_events),
-                        num_speakers=optional(request.options.num_speakers),
-                        timestamps_granularity=optional(
-                            request.options.timestamps_granularity
-                        ),
-                        diarize=optional(request.options.diarize),
-                        diarization_threshold=optional(
-                            request.options.diarization_threshold
-                        ),
-                        additional_formats=optional(request.options.additional_formats),
-                        file_format=optional(request.options.file_format),
-                        temperature=optional(request.options.temperature),
-                        seed=optional(request.options.seed),
-                        # use_multi_channel=optional(request.options.use_multi_channel), # Multi channel response is not handled at the moment
-                        request_options=request.options.request_options,
-                    )
-                    assert isinstance(response, SpeechToTextWebhookResponseModel)
+            options, transcode = _transcode_options(self.transcoder, request.options)
+
+            async with self._open(request.file, transcode) as file:
+                return await self._speech_to_text_convert(options, file=file)
+
+    async def speech_to_text_convert_webhook(
+        self,
+        request: SpeechToTextConvertWebhookRequest,
+    ) -> SpeechToTextConvertResponse:
+        """Handle a transcription received through a webhook according to the output configuration of the request."""
+
+        self.logger.info(
+            "Handling webhook transcription",
+            extra={"transcription_id": request.transcription.transcription_id},
+        )
+
+        return await self._handle_response(
+            request,
+            _dump_response(request.transcription),
+        )
+
+    async def speech_to_text_get_transcript(
+        self,
+        request: SpeechToTextGetTranscriptRequest,
+    ) -> SpeechToTextConvertResponse:
+        self.logger.info(
+            "Fetching transcript",
+            extra={"transcription_id": request.transcription_id},
+        )
+
+        data = await self._call(
+            speech_to_text_get_transcript_async,
+            client=self.elevenlabs,
+            transcription_id=request.transcription_id,
+            request_options=request.request_options,
+        )
+        record_response(self.metrics, data)
+
+        return await self._handle_response(request, data)
 
-                return SpeechToTextConvertAsyncResponse.model_validate(
-                    response.model_dump(),
+    async def speech_to_text_convert_file_segments(
+        self, request: SpeechToTextConvertFileRequest
+    ) -> SpeechToTextConvertFileSegments:
+        """Split a file into segments according to the segmentation settings of the request."""
+
+        assert request.segmentation is not None
+
+        if not isinstance(self.loader, AsyncRangeLoader):
+            raise TerminalError(
+                "Segmentation requires a loader implementing AsyncRangeLoader"
+            )
+
+        size = await self.loader.size(request.file)
+
+        return _plan_segments(size, request.segmentation)
+
+    async def speech_to_text_convert_file_segment(
+        self,
+        request: SpeechToTextConvertFileRequest,
+        segment: SpeechToTextConvertFileSegment,
+    ) -> SpeechToTextConvertResponse:
+        """Transcribe a single segment of a file.
+
+        Timestamps in the response are relative to the start of the file.
+        """
+
+        self.logger.info(
+            "Transcribing file segment",
+            extra={"file": str(request.file), "segment": segment.index},
+        )
+
+        async with self._schedule(request.scheduling):
+            with measure_stage(self.metrics, STAGE_LOAD):
+                data = await cast(AsyncRangeLoader, self.loader).read_range(
+                    request.file,
+                    segment.offset,
+                    segment.offset + segment.length,
                 )
-            except ApiError as err:
-                if _is_terminal(err):
-                    raise _convert_api_error(err) from err
 
-                raise err
+            response = SpeechToTextConvertResponse.model_validate_json(
+                await self._convert(
+                    request.options,
+                    file=(f"segment-{segment.index}.pcm", data),
+                )
+            )
 
+        if response.words:
+            response.words = [
+                _shift_word(word, segment.start) for word in response.words
+            ]
+
+        return response
+
+    async def speech_to_text_convert_file_merge(
+        self,
+        request: SpeechToTextConvertFileRequest,
+        segments: SpeechToTextConvertFileSegments,
+        responses: list[SpeechToTextConvertResponse],
+    ) -> SpeechToTextConvertResponse:
+        """Merge the transcriptions of the segments of a file into a single transcription."""
+
+        data = _dump_response(_merge_segments(segments, responses))
+
+        return await self._handle_response(request, data)
+
+    async def text_to_speech_convert(
+        self,
+        request: TextToSpeechConvertRequest,
+    ) -> TextToSpeechConvertResponse:
+        """Generate speech, writing the audio to the destination as it is streamed by ElevenLabs."""
+
+        self.logger.info(
+            "Generating speech",
+            extra={
+                "voice_id": request.voice_id,
+                "destination": str(request.output.destination),
+            },
+        )
+
+        digest = hashlib.sha256()
+        size = 0
+
+        async def stream() -> AsyncIterator[bytes]:
+            nonlocal size
+
+            async for chunk in self.elevenlabs.text_to_speech.stream(
+                request.voice_id,
+                text=request.text,
+                **_text_to_speech_options(request.options),
+            ):
+                digest.update(chunk)
+                size += len(chunk)
+
+                yield chunk
+
+        async def generate():
+            if isinstance(self.persister, AsyncStreamPersister):
+                await self.persister.persist_stream(
+                    request.output.destination,
+                    stream(),
+                )
+
+                return
+
+            # Without multipart uploads the audio has to be buffered
+            audio = bytearray()
+            async for chunk in stream():
+                audio += chunk
+
+            await self.persister.persist(request.output.destination, audio)
+
+        # Audio is persisted while it is downloaded: the whole generation counts as the ElevenLabs call
+        await self._call(generate)
+
+        if self.metrics is not None:
+            self.metrics.transfer(DIRECTION_DOWNLOAD, size)
+            self.metrics.transfer(DIRECTION_PERSIST, size)
+
+        return TextToSpeechConvertResponse(
+            destination=request.output.destination,
+            size=size,
+            checksum=f"sha256:{digest.hexdigest()}",
+            output_format=request.options.output_format,
+        )
+
+
+async def load_response(
+    loader: AsyncLoader,
+    reference: SpeechToTextConvertResultReference,
+) -> SpeechToTextConvertResponse:
+    """Load a transcription persisted by a reference-only call.
+
+    Raises:
+        ValueError: if the loaded file does not match the checksum of the reference.
+    """
+
+    with tempfile.NamedTemporaryFile(delete=True) as temp_file:
+        await loader.load(reference.destination, Path(temp_file.name))
+
+        data = await asyncio.to_thread(Path(temp_file.name).read_bytes)
+
+    if len(data) != reference.size or _digest(data) != reference.checksum:
+        raise ValueError(
+            f"Transcription at {reference.destination} does not match its reference"
+        )
+
+    return decode_response(data, reference.format, reference.compression)
 
-T = TypeVar("T")
 
 OMIT = cast(Any, ...)
 
@@ -253,14 +1248,387 @@ def optional(value: T | None) -> T | Optional[T]:
     return OMIT if value is None else value
 
 
+def _convert_options(options: SpeechToTextConvertRequestOptions) -> dict[str, Any]:
+    kwargs: dict[str, Any] = dict(
+        model_id=options.model_id,
+        enable_logging=options.enable_logging,
+        language_code=optional(options.language_code),
+        tag_audio_events=optional(options.tag_audio_events),
+        num_speakers=optional(options.num_speakers),
+        timestamps_granularity=optional(options.timestamps_granularity),
+        diarize=optional(options.diarize),
+        diarization_threshold=optional(options.diarization_threshold),
+        additional_formats=optional(options.additional_formats),
+        file_format=optional(options.file_format),
+        temperature=optional(options.temperature),
+        seed=optional(options.seed),
+        use_multi_channel=optional(options.use_multi_channel),
+        request_options=options.request_options,
+    )
+
+    if isinstance(options, SpeechToTextConvertAsyncRequestOptions):
+        kwargs.update(
+            webhook=True,
+            webhook_id=options.webhook_id,
+            # The client sends metadata as a form field, objects have to be encoded by hand
+            webhook_metadata=json.dumps(options.webhook_metadata)
+            if isinstance(options.webhook_metadata, dict)
+            else options.webhook_metadata,
+        )
+
+    return kwargs
+
+
+def _text_to_speech_options(
+    options: TextToSpeechConvertRequestOptions,
+) -> dict[str, Any]:
+    return dict(
+        model_id=optional(options.model_id),
+        output_format=options.output_format,
+        language_code=optional(options.language_code),
+        voice_settings=optional(options.voice_settings),
+        pronunciation_dictionary_locators=optional(
+            options.pronunciation_dictionary_locators
+        ),
+        seed=optional(options.seed),
+        previous_text=optional(options.previous_text),
+        next_text=optional(options.next_text),
+        previous_request_ids=optional(options.previous_request_ids),
+        next_request_ids=optional(options.next_request_ids),
+        apply_text_normalization=optional(options.apply_text_normalization),
+        enable_logging=options.enable_logging,
+        request_options=options.request_options,
+    )
+
+
+def _transcode_options(
+    transcoder: Transcoder | None,
+    options: SpeechToTextConvertOptionsT,
+) -> tuple[SpeechToTextConvertOptionsT, bool]:
+    """Return the options of the upload and whether the file needs to be transcoded."""
+
+    # Channels would be mixed down to mono
+    if (
+        transcoder is None
+        or options.file_format == PCM_FILE_FORMAT
+        or options.use_multi_channel
+    ):
+        return options, False
+
+    return options.model_copy(update={"file_format": PCM_FILE_FORMAT}), True
+
+
+def _should_return(request: SpeechToTextConvertRequestOutputMixin) -> bool:
+    return (
+        bool(request.output.destination)
+        if request.output.return_ is None
+        else request.output.return_
+    )
+
+
+def _build_reference(
+    output: SpeechToTextConvertRequestOutput,
+    data: bytes,
+    size: int,
+    checksum: str,
+) -> SpeechToTextConvertResultReference:
+    assert output.destination is not None
+
+    return SpeechToTextConvertResultReference(
+        destination=output.destination,
+        transcription_id=_TranscriptionId.model_validate_json(data).transcription_id,
+        size=size,
+        checksum=checksum,
+        format=output.format,
+        compression=output.compression,
+    )
+
+
+def _build_response(
+    request: SpeechToTextConvertRequestOutputMixin,
+    data: bytes,
+    reference: SpeechToTextConvertResultReference | None = None,
+) -> SpeechToTextConvertResponse:
+    if request.output.reference:
+        assert reference is not None
+
+        return SpeechToTextConvertResponse(reference=reference)
+
+    if _should_return(request):
+        return SpeechToTextConvertResponse.model_validate_json(data)
+
+    return SpeechToTextConvertResponse()
+
+
+def _split_additional_formats(
+    output: SpeechToTextConvertRequestOutput,
+    data: bytes,
+) -> tuple[bytes, list[tuple[AnyUrl | PurePosixPath, bytes]]]:
+    """Take the additional formats out of a transcription, replacing them with references to separate files.
+
+    Returns the transcription and the (decoded) files to persist next to the destination:
+    `<destination>.<extension>` (or `<destination>.channel_<index>.<extension>` for the transcripts of channels).
+    """
+
+    assert output.destination is not None
+
+    response = SpeechToTextConvertResponse.model_validate_json(data)
+    transcripts = [response, *(response.transcripts or [])]
+
+    if not any(transcript.additional_formats for transcript in transcripts):
+        return data, []
+
+    files: list[tuple[AnyUrl | PurePosixPath, bytes]] = []
+    suffixes: set[str] = set()
+
+    for transcript in transcripts:
+        prefix = (
+            f".channel_{transcript.channel_index}"
+            if transcript is not response and transcript.channel_index is not None
+            else ""
+        )
+
+        formats = list(transcript.additional_formats or [])
+
+        for index, additional_format in enumerate(formats):
+            if additional_format is None or additional_format.reference is not None:
+                continue
+
+            content = (
+                base64.b64decode(additional_format.content)
+                if additional_format.is_base_64_encoded
+                else additional_format.content.encode()
+            )
+
+            # The same format may be requested more than once (with different settings)
+            extension = additional_format.file_extension.lstrip(".")
+            suffix = f"{prefix}.{extension}"
+            if suffix in suffixes:
+                suffix = f"{prefix}.{index}.{extension}"
+            suffixes.add(suffix)
+
+            destination = _sibling(output.destination, suffix)
+            files.append((destination, content))
+
+            formats[index] = additional_format.model_copy(
+                update={
+                    "content": "",
+                    "is_base_64_encoded": False,
+                    "reference": SpeechToTextConvertAdditionalFormatReference(
+                        destination=destination,
+                        size=len(content),
+                        checksum=_digest(content),
+                    ),
+                }
+            )
+
+        transcript.additional_formats = formats
+
+    return _dump_response(response), files
+
+
+def _sibling(
+    destination: AnyUrl | PurePosixPath,
+    suffix: str,
+) -> AnyUrl | PurePosixPath:
+    if isinstance(destination, PurePosixPath):
+        return destination.with_name(destination.name + suffix)
+
+    parts = urlsplit(str(destination))
+
+    return AnyUrl(urlunsplit(parts._replace(path=parts.path + suffix)))
+
+
+def _merge_channels(data: bytes) -> bytes:
+    """Add the words of all channels of a multichannel transcription as a single list ordered by start time."""
+
+    response = SpeechToTextConvertResponse.model_validate_json(data)
+
+    if not response.transcripts:
+        return data
+
+    # Words of a channel are already ordered, so merging them is linear
+    response.words = list(
+        heapq.merge(
+            *(
+                [
+                    word.model_copy(update={"channel_index": transcript.channel_index})
+                    for word in transcript.words or []
+                ]
+                for transcript in response.transcripts
+            ),
+            key=_word_start,
+        )
+    )
+
+    return _dump_response(response)
+
+
+def _word_start(word: SpeechToTextConvertResponseWord) -> float:
+    return word.start if word.start is not None else 0.0
+
+
+class _TranscriptionId(BaseModel):
+    transcription_id: str | None = None
+
+
+# pcm_s16le_16: 16kHz, 16-bit, mono
+_PCM_SAMPLE_RATE = 16000
+_PCM_SAMPLE_WIDTH = 2
+
+
+def _plan_segments(
+    size: int,
+    segmentation: SpeechToTextConvertFileSegmentation,
+) -> SpeechToTextConvertFileSegments:
+    total = size // _PCM_SAMPLE_WIDTH
+    if total == 0:
+        raise TerminalError("Cannot segment an empty file", status_code=400)
+
+    duration = max(1, int(segmentation.duration * _PCM_SAMPLE_RATE))
+    step = max(1, duration - int(segmentation.overlap * _PCM_SAMPLE_RATE))
+
+    segments: list[SpeechToTextConvertFileSegment] = []
+    start = 0
+
+    while True:
+        end = min(start + duration, total)
+
+        segments.append(
+            SpeechToTextConvertFileSegment(
+                index=len(segments),
+                start=start / _PCM_SAMPLE_RATE,
+                offset=start * _PCM_SAMPLE_WIDTH,
+                length=(end - start) * _PCM_SAMPLE_WIDTH,
+            )
+        )
+
+        if end >= total:
+            break
+
+        start += step
+
+    return SpeechToTextConvertFileSegments(segments=segments)
+
+
+def _shift_word(
+    word: SpeechToTextConvertResponseWord,
+    offset: float,
+) -> SpeechToTextConvertResponseWord:
+    update: dict[str, Any] = {}
+
+    if word.start is not None:
+        update["start"] = word.start + offset
+
+    if word.end is not None:
+        update["end"] = word.end + offset
+
+    if word.characters:
+        update["characters"] = [
+            character.model_copy(
+                update={
+                    key: value + offset
+                    for key, value in (
+                        ("start", character.start),
+                        ("end", character.end),
+                    )
+                    if value is not None
+                }
+            )
+            for character in word.characters
+        ]
+
+    return word.model_copy(update=update)
+
+
+def _merge_segments(
+    segments: SpeechToTextConvertFileSegments,
+    responses: list[SpeechToTextConvertResponse],
+) -> SpeechToTextConvertResponse:
+    # Adjacent segments are cut in the middle of their overlap:
+    # each segment contributes the words starting between the previous and the next cut.
+    cuts: list[float] = []
+    for current, following in zip(segments.segments, segments.segments[1:]):
+        end = current.start + current.length / _PCM_SAMPLE_WIDTH / _PCM_SAMPLE_RATE
+        cuts.append((following.start + end) / 2)
+
+    words: list[SpeechToTextConvertResponseWord] = []
+
+    for index, response in enumerate(responses):
+        lower = cuts[index - 1] if index > 0 else float("-inf")
+        upper = cuts[index] if index < len(cuts) else float("inf")
+
+        # Words straddling the cut may be recognized on both sides with slightly different timestamps
+        previous_end = next(
+            (word.end or 0.0 for word in reversed(words) if word.type != "spacing"),
+            lower,
+        )
+
+        for word in response.words or []:
+            start = word.start or 0.0
+
+            if not lower <= start < upper or start < previous_end:
+                continue
+
+            if word.type == "spacing" and (not words or words[-1].type == "spacing"):
+                continue
+
+            words.append(word)
+
+    first = responses[0] if responses else SpeechToTextConvertResponse()
+
+    return SpeechToTextConvertResponse(
+        language_code=first.language_code,
+        language_probability=first.language_probability,
+        text="".join(word.text for word in words),
+        words=words,
+    )
+
+
+def _dump_response(response: BaseModel) -> bytes:
+    return response.model_dump_json().encode()
+
+
+def _digest(data: bytes) -> str:
+    return f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+
+def _file_digest(path: Path) -> str:
+    with open(path, "rb") as file:
+        return f"sha256:{hashlib.file_digest(file, 'sha256').hexdigest()}"
+
+
+def _file_name(ref: AnyUrl | PurePosixPath) -> str:
+    if isinstance(ref, AnyUrl):
+        return PurePosixPath(ref.path or "").name or "audio"
+
+    return ref.name or "audio"
+
+
+def _pcm_name(name: str) -> str:
+    return f"{PurePosixPath(name).stem or 'audio'}.pcm"
+
+
+# Client errors that may succeed when retried (same as the ones retried by the ElevenLabs client)
+_RETRYABLE_STATUS_CODES = (408, 409, 429)
+
+
 def _is_terminal(err: ApiError) -> bool:
-    # TODO: this should be better
-    return err.status_code == 400
+    if err.status_code is None:
+        return False
+
+    return (
+        400 <= err.status_code < 500 and err.status_code not in _RETRYABLE_STATUS_CODES
+    )
 
 
 def _convert_api_error(err: ApiError) -> TerminalError:
-    if isinstance(err.body, dict):
-        msg = err.body.get("detail", {}).get("message", err.body)
+    detail = err.body.get("detail") if isinstance(err.body, dict) else None
+
+    if isinstance(detail, dict):
+        msg = detail.get("message", err.body)
+    elif detail is not None:
+        msg = f"{detail}"
     else:
         msg = f"{err.body}"
 
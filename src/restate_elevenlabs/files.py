@@ -0,0 +1,103 @@
+import asyncio
+from collections.abc import AsyncIterable, AsyncIterator, Iterator
+from pathlib import Path
+from typing import BinaryIO, cast
+
+from ._readahead import DEFAULT_READ_AHEAD, ReadAheadReader
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+
+class AsyncFile:
+    """A file read as an async stream of chunks (eg. while it is still being downloaded).
+
+    Uploads stream the chunks into the request body, so sending a file never blocks the event loop.
+    A file can only be read once.
+    """
+
+    def __init__(
+        self,
+        chunks: AsyncIterable[bytes],
+        name: str,
+        size: int | None = None,
+        path: Path | None = None,
+    ):
+        self.chunks = chunks
+        self.name = name
+        self.size = size  # None if not known in advance
+        self.path = path  # the local file the chunks are read from (if any)
+
+    @classmethod
+    def from_path(
+        cls,
+        path: Path,
+        name: str | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> "AsyncFile":
+        """Read a local file, in a worker thread."""
+
+        return cls(
+            _read_path(path, chunk_size),
+            name or path.name,
+            path.stat().st_size,
+            path,
+        )
+
+    @classmethod
+    def from_reader(
+        cls,
+        reader: BinaryIO,
+        name: str,
+        size: int | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> "AsyncFile":
+        """Read a (blocking) reader, in a worker thread."""
+
+        return cls(_read(reader, chunk_size), name, size)
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return aiter(self.chunks)
+
+    def reader(self, read_ahead: int = DEFAULT_READ_AHEAD) -> BinaryIO:
+        """Return a blocking reader of the file for consumers running in other threads (eg. piping it to a transcoder).
+
+        Must be called from the event loop the file is read on, and must not be read on it.
+        """
+
+        return cast(
+            BinaryIO,
+            ReadAheadReader(
+                _iterate_blocking(self.chunks, asyncio.get_running_loop()),
+                self.size,
+                self.name,
+                read_ahead,
+            ),
+        )
+
+
+async def _read(reader: BinaryIO, chunk_size: int) -> AsyncIterator[bytes]:
+    while chunk := await asyncio.to_thread(reader.read, chunk_size):
+        yield chunk
+
+
+async def _read_path(path: Path, chunk_size: int) -> AsyncIterator[bytes]:
+    with open(path, "rb") as reader:
+        async for chunk in _read(reader, chunk_size):
+            yield chunk
+
+
+def _iterate_blocking(
+    chunks: AsyncIterable[bytes],
+    loop: asyncio.AbstractEventLoop,
+) -> Iterator[bytes]:
+    """Iterate async chunks from another thread, waiting for each one to be produced on the loop."""
+
+    iterator = aiter(chunks)
+
+    async def next_chunk() -> bytes | None:
+        return await anext(iterator, None)
+
+    while (
+        chunk := asyncio.run_coroutine_threadsafe(next_chunk(), loop).result()
+    ) is not None:
+        yield chunk
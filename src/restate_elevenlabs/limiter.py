@@ -0,0 +1,146 @@
+import asyncio
+import email.utils
+import time
+from collections.abc import AsyncIterator, Callable, Mapping
+from contextlib import asynccontextmanager
+
+
+class RateLimiter:
+    """Client-side limiter for ElevenLabs calls shared by every handler of a process.
+
+    Calls are bounded by a concurrency limit (unbounded if not set) and (optionally) a token bucket.
+    Rate limit responses pause all callers for the duration requested by the server
+    and halve the concurrency limit, which then recovers by one with each successful call.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        rate: float | None = None,
+        burst: int | None = None,
+        default_backoff: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate or 1))
+        self.default_backoff = default_backoff
+
+        self._clock = clock
+        self._limit = max_concurrency
+        self._active = 0
+        self._condition = asyncio.Condition()
+        self._paused_until = 0.0
+        self._tokens = float(self.burst)
+        self._refilled_at = clock()
+
+    @property
+    def limit(self) -> int | None:
+        """The current (adaptive) concurrency limit."""
+
+        return self._limit
+
+    @property
+    def active(self) -> int:
+        """The number of calls currently holding a slot."""
+
+        return self._active
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[None]:
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self._limit is None or self._active < self._limit
+            )
+            self._active += 1
+
+        try:
+            await self._wait_paused()
+            await self._wait_token()
+
+            yield
+        finally:
+            async with self._condition:
+                self._active -= 1
+                self._condition.notify_all()
+
+    async def _wait_paused(self):
+        while (delay := self._paused_until - self._clock()) > 0:
+            await asyncio.sleep(delay)
+
+    async def _wait_token(self):
+        if self.rate is None:
+            return
+
+        while True:
+            now = self._clock()
+            self._tokens = min(
+                float(self.burst),
+                self._tokens + (now - self._refilled_at) * self.rate,
+            )
+            self._refilled_at = now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+
+                return
+
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def success(self):
+        """Record a successful call (additive increase of the concurrency limit)."""
+
+        if self._limit is None:
+            return
+
+        if self.max_concurrency is None or self._limit < self.max_concurrency:
+            self._limit += 1
+
+    def backoff(self, delay: float | None = None):
+        """Record a rate limited call.
+
+        Pauses every caller for `delay` seconds (or the default backoff)
+        and halves the concurrency limit.
+        """
+
+        delay = self.default_backoff if delay is None else delay
+
+        self._paused_until = max(self._paused_until, self._clock() + delay)
+
+        # Without a configured limit, start from the number of calls in flight
+        limit = self._limit if self._limit is not None else max(1, self._active)
+        self._limit = max(1, limit // 2)
+
+
+def parse_retry_after(headers: Mapping[str, str] | None) -> float | None:
+    """Parse the number of seconds to wait from Retry-After style response headers."""
+
+    if not headers:
+        return None
+
+    normalized = {key.lower(): value for key, value in headers.items()}
+
+    if (retry_after_ms := normalized.get("retry-after-ms")) is not None:
+        try:
+            return max(0.0, float(retry_after_ms) / 1000)
+        except ValueError:
+            pass
+
+    retry_after = normalized.get("retry-after")
+    if retry_after is None:
+        return None
+
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        retry_date = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+
+    return max(0.0, retry_date.timestamp() - time.time())
@@ -0,0 +1,224 @@
+import re
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Iterator
+from contextlib import contextmanager
+from typing import Any, Protocol
+
+from elevenlabs.core import ApiError
+from restate.exceptions import TerminalError
+
+from .files import AsyncFile
+
+# Stages of a call
+STAGE_LOAD = "load"  # loading (or opening) the audio file
+STAGE_UPLOAD = "upload"  # sending the audio file to ElevenLabs
+STAGE_PROCESSING = "processing"  # waiting for ElevenLabs once the request is sent
+STAGE_CONVERT = "convert"  # building the result from the response
+STAGE_PERSIST = "persist"  # persisting the transcription
+STAGE_CACHE = "cache"  # cache lookups and writes
+STAGE_QUEUE = "queue"  # waiting for the scheduler to start the transcription
+
+# Directions of transferred data
+DIRECTION_UPLOAD = "upload"  # audio sent to ElevenLabs
+DIRECTION_DOWNLOAD = "download"  # responses received from ElevenLabs
+DIRECTION_PERSIST = "persist"  # transcription files written
+
+# Operation label of ElevenLabs API calls
+OPERATION_ELEVENLABS = "elevenlabs"
+
+# Caches
+CACHE_TRANSCRIPTION = "transcription"  # transcription results
+CACHE_AUDIO = "audio"  # downloaded audio files
+
+
+class Metrics(Protocol):
+    """Receives instrumentation from executors and handlers."""
+
+    def observe_stage(self, stage: str, seconds: float): ...
+
+    def observe_call(self, operation: str, seconds: float, error: str | None): ...
+
+    def in_flight(self, operation: str, delta: int): ...
+
+    def transfer(self, direction: str, size: int): ...
+
+    def audio(self, seconds: float): ...
+
+    def cache_lookup(self, cache: str, hit: bool): ...
+
+
+@contextmanager
+def measure_stage(metrics: Metrics | None, name: str) -> Iterator[None]:
+    """Time a stage of a call."""
+
+    if metrics is None:
+        yield
+
+        return
+
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        metrics.observe_stage(name, time.perf_counter() - start)
+
+
+@contextmanager
+def measure_call(metrics: Metrics | None, operation: str) -> Iterator[None]:
+    """Track an operation (a handler or an ElevenLabs call): in-flight count, duration and errors."""
+
+    if metrics is None:
+        yield
+
+        return
+
+    metrics.in_flight(operation, 1)
+    start = time.perf_counter()
+    error = None
+
+    try:
+        yield
+    except Exception as err:
+        error = classify_error(err)
+
+        raise
+    finally:
+        metrics.in_flight(operation, -1)
+        metrics.observe_call(operation, time.perf_counter() - start, error)
+
+
+@contextmanager
+def measure_request(metrics: Metrics | None, file: Any = None) -> Iterator[Any]:
+    """Instrument an ElevenLabs request, timing the upload of the file (if any) and the processing separately.
+
+    Yields the file to upload.
+    """
+
+    if metrics is None:
+        yield file
+
+        return
+
+    # Files given as content (eg. a `(name, bytes)` tuple) are uploaded as part of the processing stage
+    reader: _CountingReader | _CountingChunks | None = None
+
+    if isinstance(file, AsyncFile):
+        reader = _CountingChunks(file.chunks)
+        file = AsyncFile(reader, file.name, file.size, file.path)
+    elif hasattr(file, "read"):
+        reader = _CountingReader(file)
+        file = reader
+
+    start = time.perf_counter()
+
+    try:
+        yield file
+    finally:
+        end = time.perf_counter()
+        sent = start
+
+        if reader is not None and reader.started is not None:
+            sent = reader.finished or end
+
+            metrics.observe_stage(STAGE_UPLOAD, sent - reader.started)
+            metrics.transfer(DIRECTION_UPLOAD, reader.size)
+
+        metrics.observe_stage(STAGE_PROCESSING, end - sent)
+
+
+def record_response(metrics: Metrics | None, data: bytes):
+    """Record a transcription received from ElevenLabs."""
+
+    if metrics is None:
+        return
+
+    metrics.transfer(DIRECTION_DOWNLOAD, len(data))
+
+    duration = _audio_duration(data)
+
+    if duration is not None:
+        metrics.audio(duration)
+
+
+def classify_error(err: BaseException) -> str:
+    """Return a low-cardinality label for an error."""
+
+    if isinstance(err, TerminalError):
+        return f"terminal_{err.status_code}"
+
+    if isinstance(err, ApiError):
+        return f"http_{err.status_code}" if err.status_code else "http"
+
+    if isinstance(err, TimeoutError):
+        return "timeout"
+
+    return type(err).__name__
+
+
+_END = re.compile(rb'"end"\s*:\s*(-?[0-9][0-9.eE+-]*)')
+
+
+def _audio_duration(data: bytes) -> float | None:
+    """Return the end of the last word of a transcription without parsing it.
+
+    Words (and their characters) are ordered by time, so the last timestamped end in the JSON is the end of the audio
+    (of the last channel of multichannel transcriptions, which all have the same length).
+    Keys in strings are escaped, so they do not match.
+    """
+
+    position = len(data)
+
+    while (position := data.rfind(b'"end"', 0, position)) != -1:
+        if match := _END.match(data, position):
+            return float(match[1])
+
+    return None
+
+
+class _CountingReader:
+    """Wraps a file being uploaded to count the bytes read and to tell when the upload finished."""
+
+    def __init__(self, file: Any):
+        self._file = file
+
+        self.size = 0
+        self.started: float | None = None
+        self.finished: float | None = None
+
+    def read(self, size: int = -1) -> bytes:
+        if self.started is None:
+            self.started = time.perf_counter()
+
+        chunk = self._file.read(size)
+        self.size += len(chunk)
+
+        if not chunk or size < 0:
+            self.finished = time.perf_counter()
+
+        return chunk
+
+    def __getattr__(self, name: str) -> Any:
+        # Everything else (name, fileno, seek, tell, ...) is answered by the file itself
+        return getattr(self._file, name)
+
+
+class _CountingChunks:
+    """Async counterpart of `_CountingReader` wrapping the chunks of an `AsyncFile`."""
+
+    def __init__(self, chunks: AsyncIterable[bytes]):
+        self._chunks = chunks
+
+        self.size = 0
+        self.started: float | None = None
+        self.finished: float | None = None
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        self.started = time.perf_counter()
+
+        async for chunk in self._chunks:
+            self.size += len(chunk)
+
+            yield chunk
+
+        self.finished = time.perf_counter()
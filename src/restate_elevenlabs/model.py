@@ -1,15 +1,32 @@
 from pathlib import PurePosixPath
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Literal
 
 from elevenlabs import (
     AdditionalFormatResponseModel,
     AdditionalFormats,
+    BodyTextToSpeechStreamApplyTextNormalization,
+    PronunciationDictionaryVersionLocator,
     SpeechToTextConvertRequestFileFormat,
     SpeechToTextConvertRequestTimestampsGranularity,
-    SpeechToTextWordResponseModel,
+    TextToSpeechStreamRequestOutputFormat,
+    VoiceSettings,
 )
 from elevenlabs.core import RequestOptions
-from pydantic import AnyUrl, BaseModel, ConfigDict, Field
+from pydantic import (
+    AnyUrl,
+    BaseModel,
+    ConfigDict,
+    Field,
+    field_serializer,
+    field_validator,
+    model_validator,
+)
+
+SpeechToTextConvertOutputFormat = Literal["json", "columnar"]
+
+SpeechToTextConvertOutputCompression = Literal["gzip", "zstd"]
+
+SpeechToTextConvertPriority = Literal["interactive", "batch"]
 
 
 class SpeechToTextConvertRequestOutput(BaseModel):
@@ -25,6 +42,51 @@ class SpeechToTextConvertRequestOutput(BaseModel):
         description="Whether to return the transcription",
     )
 
+    reference: bool = Field(
+        default=False,
+        description="Return a reference to the persisted transcription instead of the transcription itself (requires destination)",
+    )
+
+    format: SpeechToTextConvertOutputFormat = Field(
+        default="json",
+        description="The format of the transcription file: 'json' (compact JSON) or 'columnar' (JSON with words stored as arrays of attributes)",
+    )
+
+    compression: SpeechToTextConvertOutputCompression | None = Field(
+        default=None,
+        description="The compression of the transcription file ('zstd' requires Python 3.14 or later)",
+    )
+
+    merge_channels: bool = Field(
+        default=False,
+        description="Add the words of all channels as a single time-ordered list to multichannel transcriptions",
+    )
+
+    separate_additional_formats: bool = Field(
+        default=False,
+        description="Persist additional formats as separate (decoded) files next to the destination (eg. '<destination>.srt'), keeping only references to them in the transcription (requires destination)",
+    )
+
+    @field_validator("compression")
+    @classmethod
+    def _check_compression(cls, value: SpeechToTextConvertOutputCompression | None):
+        from .encoding import zstd_available
+
+        if value == "zstd" and not zstd_available():
+            raise ValueError("zstd compression requires Python 3.14 or later")
+
+        return value
+
+    @model_validator(mode="after")
+    def _check_reference(self):
+        if self.reference and not self.destination:
+            raise ValueError("reference requires a destination")
+
+        if self.separate_additional_formats and not self.destination:
+            raise ValueError("separate_additional_formats requires a destination")
+
+        return self
+
 
 class SpeechToTextConvertRequestOutputMixin:
     output: SpeechToTextConvertRequestOutput = Field(
@@ -33,6 +95,25 @@ class SpeechToTextConvertRequestOutputMixin:
     )
 
 
+class SpeechToTextConvertRequestScheduling(BaseModel):
+    tenant: str | None = Field(
+        default=None,
+        description="The tenant the transcription is accounted to (transcriptions of a tenant share its concurrency quota)",
+    )
+
+    priority: SpeechToTextConvertPriority = Field(
+        default="interactive",
+        description="The priority class of the transcription: 'interactive' transcriptions are started ahead of queued 'batch' ones",
+    )
+
+
+class SpeechToTextConvertRequestSchedulingMixin:
+    scheduling: SpeechToTextConvertRequestScheduling = Field(
+        default_factory=SpeechToTextConvertRequestScheduling,
+        description="Scheduling configuration (applies when the service limits concurrent transcriptions)",
+    )
+
+
 class SpeechToTextConvertRequestOptions(BaseModel):
     model_id: str = Field(
         ...,
@@ -144,6 +225,7 @@ class SpeechToTextConvertUrlRequestMixin(BaseModel):
 class SpeechToTextConvertUrlRequest(
     SpeechToTextConvertUrlRequestMixin,
     SpeechToTextConvertRequestOutputMixin,
+    SpeechToTextConvertRequestSchedulingMixin,
 ):
     options: SpeechToTextConvertRequestOptions = Field(
         description="Transcription options",
@@ -153,6 +235,7 @@ class SpeechToTextConvertUrlRequest(
 class SpeechToTextConvertUrlAsyncRequest(
     SpeechToTextConvertUrlRequestMixin,
     SpeechToTextConvertRequestOutputMixin,
+    SpeechToTextConvertRequestSchedulingMixin,
 ):
     options: SpeechToTextConvertAsyncRequestOptions = Field(
         description="Transcription options",
@@ -179,18 +262,99 @@ class SpeechToTextConvertFileRequestMixin(BaseModel):
     )
 
 
+class SpeechToTextConvertFileSegmentation(BaseModel):
+    duration: float = Field(
+        default=600,
+        gt=0,
+        description="The length of a segment in seconds",
+    )
+
+    overlap: float = Field(
+        default=2,
+        ge=0,
+        description="The length of audio shared by adjacent segments in seconds (words in the overlap are de-duplicated)",
+    )
+
+    concurrency: int = Field(
+        default=4,
+        ge=1,
+        description="The maximum number of segments transcribed at the same time",
+    )
+
+    @model_validator(mode="after")
+    def _check_overlap(self):
+        if self.overlap >= self.duration:
+            raise ValueError("overlap must be shorter than duration")
+
+        return self
+
+
+class SpeechToTextConvertFileSegment(BaseModel):
+    index: int = Field(description="The index of the segment")
+
+    start: float = Field(description="The start of the segment in seconds")
+
+    offset: int = Field(description="The offset of the segment in the file in bytes")
+
+    length: int = Field(description="The length of the segment in bytes")
+
+
+class SpeechToTextConvertFileSegments(BaseModel):
+    segments: List[SpeechToTextConvertFileSegment] = Field(
+        description="The segments of the file, in order",
+    )
+
+
+class SpeechToTextConvertFileStaged(BaseModel):
+    key: str | None = Field(
+        default=None,
+        description="The key (object and version) of the staged file (null if the file was not staged)",
+    )
+
+    size: int | None = Field(
+        default=None,
+        description="The size of the staged file in bytes",
+    )
+
+
 class SpeechToTextConvertFileRequest(
     SpeechToTextConvertFileRequestMixin,
     SpeechToTextConvertRequestOutputMixin,
+    SpeechToTextConvertRequestSchedulingMixin,
 ):
     options: SpeechToTextConvertRequestOptions = Field(
         description="Transcription options",
     )
 
+    segmentation: SpeechToTextConvertFileSegmentation | None = Field(
+        default=None,
+        description="Split the file into overlapping segments transcribed in parallel (requires 'pcm_s16le_16' file format). Speaker IDs are assigned per segment when diarizing.",
+    )
+
+    @model_validator(mode="after")
+    def _check_segmentation(self):
+        if self.segmentation is None:
+            return self
+
+        if self.options.file_format != "pcm_s16le_16":
+            raise ValueError("segmentation requires 'pcm_s16le_16' file format")
+
+        if self.options.timestamps_granularity == "none":
+            raise ValueError("segmentation requires timestamps")
+
+        if self.options.additional_formats:
+            raise ValueError("segmentation does not support additional formats")
+
+        if self.options.use_multi_channel:
+            raise ValueError("segmentation does not support multichannel audio")
+
+        return self
+
 
 class SpeechToTextConvertFileAsyncRequest(
     SpeechToTextConvertFileRequestMixin,
     SpeechToTextConvertRequestOutputMixin,
+    SpeechToTextConvertRequestSchedulingMixin,
 ):
     options: SpeechToTextConvertAsyncRequestOptions = Field(
         description="Transcription options",
@@ -206,6 +370,24 @@ class SpeechToTextConvertFileAsyncRequest(
 # AdditionalFormatResponseModel.model_rebuild()
 
 
+class SpeechToTextConvertAdditionalFormatReference(BaseModel):
+    destination: AnyUrl | PurePosixPath = Field(
+        description="The destination the additional format was persisted to",
+        union_mode="left_to_right",
+    )
+
+    size: int = Field(description="The size of the file in bytes.")
+
+    checksum: str = Field(
+        description="The checksum of the file (eg. 'sha256:<hex digest>').",
+    )
+
+    # The ElevenLabs model holding the reference serializes it through plain Python objects
+    @field_serializer("destination")
+    def _serialize_destination(self, value: AnyUrl | PurePosixPath) -> str:
+        return str(value)
+
+
 # https://github.com/elevenlabs/elevenlabs-python/issues/694
 class SpeechToTextConvertResponseAdditionalFormat(AdditionalFormatResponseModel):
     is_base_64_encoded: bool = Field(
@@ -213,8 +395,96 @@ class SpeechToTextConvertResponseAdditionalFormat(AdditionalFormatResponseModel)
         alias="is_base64_encoded",
     )
 
+    reference: SpeechToTextConvertAdditionalFormatReference | None = Field(
+        default=None,
+        description="Reference to the file the additional format was persisted to (the content is empty then).",
+        exclude_if=lambda value: value is None,
+    )
+
 
-class SpeechToTextConvertResponse(BaseModel):
+# Plain models (instead of the ones in the ElevenLabs client) so that (de)serialization stays in pydantic-core:
+# the client models serialize through Python code, which is slow for tens of thousands of words.
+class SpeechToTextConvertResponseCharacter(BaseModel):
+    text: str = Field(description="The character that was transcribed.")
+
+    start: float | None = Field(
+        default=None,
+        description="The start time of the character in seconds.",
+    )
+
+    end: float | None = Field(
+        default=None,
+        description="The end time of the character in seconds.",
+    )
+
+
+class SpeechToTextConvertResponseWord(BaseModel):
+    text: str = Field(description="The word or sound that was transcribed.")
+
+    start: float | None = Field(
+        default=None,
+        description="The start time of the word or sound in seconds.",
+    )
+
+    end: float | None = Field(
+        default=None,
+        description="The end time of the word or sound in seconds.",
+    )
+
+    type: str = Field(
+        description="The type of the word or sound ('word', 'spacing' or 'audio_event').",
+    )
+
+    speaker_id: str | None = Field(
+        default=None,
+        description="Unique identifier for the speaker of this word.",
+    )
+
+    logprob: float = Field(
+        description="The log of the probability with which this word was predicted.",
+    )
+
+    characters: List[SpeechToTextConvertResponseCharacter] | None = Field(
+        default=None,
+        description="The characters that make up the word and their timing information.",
+    )
+
+    channel_index: int | None = Field(
+        default=None,
+        description="The channel the word was transcribed from (in merged multichannel transcriptions).",
+        exclude_if=lambda value: value is None,
+    )
+
+
+class SpeechToTextConvertResultReference(BaseModel):
+    destination: AnyUrl | PurePosixPath = Field(
+        description="The destination the transcription file was persisted to",
+        union_mode="left_to_right",
+    )
+
+    transcription_id: str | None = Field(
+        default=None,
+        description="The transcription ID of the response.",
+    )
+
+    size: int = Field(description="The size of the transcription file in bytes.")
+
+    checksum: str = Field(
+        description="The checksum of the transcription file (eg. 'sha256:<hex digest>').",
+    )
+
+    format: SpeechToTextConvertOutputFormat = Field(
+        default="json",
+        description="The format of the transcription file.",
+    )
+
+    compression: SpeechToTextConvertOutputCompression | None = Field(
+        default=None,
+        description="The compression of the transcription file.",
+    )
+
+
+class SpeechToTextConvertTranscript(BaseModel):
     language_code: str | None = Field(
         default=None,
         description="The detected language code (e.g. 'eng' for English).",
@@ -230,7 +500,7 @@ class SpeechToTextConvertResponse(BaseModel):
         description="The raw text of the transcription.",
     )
 
-    words: List[SpeechToTextWordResponseModel] | None = Field(
+    words: List[SpeechToTextConvertResponseWord] | None = Field(
         default=None,
         description="List of words with their timing information.",
     )
@@ -247,11 +517,23 @@ class SpeechToTextConvertResponse(BaseModel):
         description="Requested additional formats of the transcript.",
     )
 
+
+class SpeechToTextConvertResponse(SpeechToTextConvertTranscript):
+    transcripts: List[SpeechToTextConvertTranscript] | None = Field(
+        default=None,
+        description="The transcripts of the channels (for multichannel audio).",
+    )
+
     transcription_id: str | None = Field(
         default=None,
         description="The transcription ID of the response.",
     )
 
+    reference: SpeechToTextConvertResultReference | None = Field(
+        default=None,
+        description="Reference to the persisted transcription (when requested instead of the transcription itself).",
+    )
+
 
 class SpeechToTextConvertAsyncResponse(BaseModel):
     message: str = Field(description="The message of the webhook response.")
@@ -262,3 +544,410 @@ class SpeechToTextConvertAsyncResponse(BaseModel):
         default=None,
         description="The transcription ID of the webhook response.",
     )
+
+
+class SpeechToTextConvertWebhookData(BaseModel):
+    request_id: str = Field(description="The request ID of the transcription.")
+
+    transcription: SpeechToTextConvertResponse | None = Field(
+        default=None,
+        description="The transcription.",
+    )
+
+    webhook_metadata: str | Dict[str, Any] | None = Field(
+        default=None,
+        description="The metadata sent with the transcription request.",
+    )
+
+
+class SpeechToTextConvertWebhookEvent(BaseModel):
+    type: str = Field(description="The type of the event.")
+
+    event_timestamp: int | None = Field(
+        default=None,
+        description="The time of the event as a Unix timestamp.",
+    )
+
+    data: SpeechToTextConvertWebhookData = Field(description="The event data.")
+
+
+class SpeechToTextConvertWebhookRequest(
+    BaseModel,
+    SpeechToTextConvertRequestOutputMixin,
+):
+    transcription: SpeechToTextConvertResponse = Field(
+        description="The transcription received through the webhook",
+    )
+
+
+class SpeechToTextGetTranscriptRequest(
+    BaseModel,
+    SpeechToTextConvertRequestOutputMixin,
+):
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "transcription_id": "abc123",
+                    "output": {
+                        "destination": "s3://bucket/audio.json",
+                    },
+                },
+            ]
+        }
+    )
+
+    transcription_id: str = Field(
+        description="The ID of the transcription (returned by the async handlers)",
+    )
+
+    request_options: RequestOptions | None = Field(
+        default=None,
+        description="Request-specific configuration",
+    )
+
+
+class SpeechToTextWaitTranscriptRequest(SpeechToTextGetTranscriptRequest):
+    initial_interval: float = Field(
+        default=5,
+        gt=0,
+        description="The time to wait before checking again if the transcript is not available yet in seconds",
+    )
+
+    max_interval: float = Field(
+        default=300,
+        gt=0,
+        description="The maximum time between two checks in seconds",
+    )
+
+    multiplier: float = Field(
+        default=2,
+        ge=1,
+        description="The factor the time between checks grows by after each check",
+    )
+
+    timeout: float | None = Field(
+        default=None,
+        gt=0,
+        description="The maximum time to wait for the transcript in seconds (waits indefinitely if null)",
+    )
+
+
+class SpeechToTextConvertBatchItem(
+    BaseModel,
+    SpeechToTextConvertRequestOutputMixin,
+):
+    file: AnyUrl | PurePosixPath | None = Field(
+        default=None,
+        description="The audio file to transcribe",
+        union_mode="left_to_right",
+    )
+
+    url: str | None = Field(
+        default=None,
+        description="The HTTPS URL of the file to transcribe. URLs can be pre-signed or include authentication tokens in query parameters.",
+    )
+
+    options: SpeechToTextConvertRequestOptions | None = Field(
+        default=None,
+        description="Transcription options (overrides the shared options of the batch)",
+    )
+
+    @model_validator(mode="after")
+    def _check_source(self):
+        if (self.file is None) == (self.url is None):
+            raise ValueError("exactly one of file or url is required")
+
+        return self
+
+
+class SpeechToTextConvertBatchRequest(BaseModel):
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "items": [
+                        {
+                            "file": "s3://bucket/audio1.wav",
+                            "output": {
+                                "destination": "s3://bucket/audio1.json",
+                                "reference": True,
+                            },
+                        },
+                        {
+                            "url": "https://example.com/audio2.wav",
+                        },
+                    ],
+                    "options": {
+                        "model_id": "scribe_v1",
+                    },
+                    "concurrency": 10,
+                },
+            ]
+        }
+    )
+
+    items: List[SpeechToTextConvertBatchItem] = Field(
+        description="The files and URLs to transcribe. Persisting large batches with reference output keeps the result small.",
+    )
+
+    options: SpeechToTextConvertRequestOptions = Field(
+        description="Transcription options shared by all items",
+    )
+
+    concurrency: int = Field(
+        default=10,
+        ge=1,
+        description="The maximum number of items transcribed at the same time",
+    )
+
+    max_attempts: int | None = Field(
+        default=3,
+        ge=1,
+        description="The maximum number of attempts per item before it is reported as failed (retried indefinitely if null)",
+    )
+
+    scheduling: SpeechToTextConvertRequestScheduling = Field(
+        default_factory=lambda: SpeechToTextConvertRequestScheduling(priority="batch"),
+        description="Scheduling configuration shared by all items (batches are 'batch' priority by default)",
+    )
+
+
+class SpeechToTextConvertBatchItemResult(BaseModel):
+    response: SpeechToTextConvertResponse | None = Field(
+        default=None,
+        description="The result of the item if it succeeded.",
+    )
+
+    error: str | None = Field(
+        default=None,
+        description="The error message if the item failed.",
+    )
+
+    status_code: int | None = Field(
+        default=None,
+        description="The status code of the error if the item failed.",
+    )
+
+
+class SpeechToTextConvertBatchResponse(BaseModel):
+    results: List[SpeechToTextConvertBatchItemResult] = Field(
+        description="The results of the items, in the order of the request.",
+    )
+
+
+class SpeechToTextConvertVariant(
+    BaseModel,
+    SpeechToTextConvertRequestOutputMixin,
+):
+    options: SpeechToTextConvertRequestOptions = Field(
+        description="Transcription options of the variant",
+    )
+
+
+class SpeechToTextConvertVariantsRequest(
+    BaseModel,
+    SpeechToTextConvertRequestSchedulingMixin,
+):
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "file": "s3://bucket/audio.wav",
+                    "variants": [
+                        {
+                            "options": {
+                                "model_id": "scribe_v1",
+                                "language_code": "en",
+                            },
+                            "output": {
+                                "destination": "s3://bucket/audio.en.json",
+                            },
+                        },
+                        {
+                            "options": {
+                                "model_id": "scribe_v1",
+                                "diarize": True,
+                            },
+                            "output": {
+                                "destination": "s3://bucket/audio.diarized.json",
+                            },
+                        },
+                    ],
+                },
+            ]
+        }
+    )
+
+    file: AnyUrl | PurePosixPath | None = Field(
+        default=None,
+        description="The audio file to transcribe (downloaded once for all variants if the service stages files)",
+        union_mode="left_to_right",
+    )
+
+    url: str | None = Field(
+        default=None,
+        description="The HTTPS URL of the file to transcribe. URLs can be pre-signed or include authentication tokens in query parameters.",
+    )
+
+    variants: List[SpeechToTextConvertVariant] = Field(
+        min_length=1,
+        description="The transcriptions to make of the audio, each persisted as soon as it finishes",
+    )
+
+    concurrency: int = Field(
+        default=4,
+        ge=1,
+        description="The maximum number of variants transcribed at the same time",
+    )
+
+    max_attempts: int | None = Field(
+        default=3,
+        ge=1,
+        description="The maximum number of attempts per variant before it is reported as failed (retried indefinitely if null)",
+    )
+
+    @model_validator(mode="after")
+    def _check_source(self):
+        if (self.file is None) == (self.url is None):
+            raise ValueError("exactly one of file or url is required")
+
+        return self
+
+
+class SpeechToTextConvertVariantsResponse(BaseModel):
+    results: List[SpeechToTextConvertBatchItemResult] = Field(
+        description="The results of the variants, in the order of the request.",
+    )
+
+
+class TextToSpeechConvertRequestOptions(BaseModel):
+    model_id: str | None = Field(
+        default=None,
+        description="Identifier of the model that will be used (defaults to 'eleven_multilingual_v2').",
+    )
+
+    output_format: TextToSpeechStreamRequestOutputFormat | None = Field(
+        default=None,
+        description="Output format of the generated audio. Formatted as codec_sample_rate_bitrate (eg. 'mp3_44100_128').",
+    )
+
+    language_code: str | None = Field(
+        default=None,
+        description="Language code (ISO 639-1) used to enforce a language for the model. Currently only Turbo v2.5 and Flash v2.5 support language enforcement.",
+    )
+
+    voice_settings: VoiceSettings | None = Field(
+        default=None,
+        description="Voice settings overriding stored settings for the given voice. They are applied only on the given request.",
+    )
+
+    pronunciation_dictionary_locators: (
+        List[PronunciationDictionaryVersionLocator] | None
+    ) = Field(
+        default=None,
+        description="A list of pronunciation dictionary locators (id, version_id) to be applied to the text. They will be applied in order. You may have up to 3 locators per request.",
+    )
+
+    seed: int | None = Field(
+        default=None,
+        ge=0,
+        le=4294967295,
+        description="If specified, our system will make a best effort to sample deterministically, such that repeated requests with the same seed and parameters should return the same result. Determinism is not guaranteed.",
+    )
+
+    previous_text: str | None = Field(
+        default=None,
+        description="The text that came before the text of the current request. Can be used to improve the speech's continuity when concatenating together multiple generations.",
+    )
+
+    next_text: str | None = Field(
+        default=None,
+        description="The text that comes after the text of the current request. Can be used to improve the speech's continuity when concatenating together multiple generations.",
+    )
+
+    previous_request_ids: List[str] | None = Field(
+        default=None,
+        description="A list of request IDs of the samples generated before this generation. Can be used to improve the speech's continuity when splitting up a large task into multiple requests.",
+    )
+
+    next_request_ids: List[str] | None = Field(
+        default=None,
+        description="A list of request IDs of the samples that come after this generation.",
+    )
+
+    apply_text_normalization: BodyTextToSpeechStreamApplyTextNormalization | None = (
+        Field(
+            default=None,
+            description="This parameter controls text normalization with three modes: 'auto', 'on', and 'off'.",
+        )
+    )
+
+    enable_logging: bool | None = Field(
+        default=None,
+        description="When enable_logging is set to false zero retention mode will be used for the request. This will mean history features are unavailable for this request. Zero retention mode may only be used by enterprise customers.",
+    )
+
+    request_options: RequestOptions | None = Field(
+        default=None, description="Request-specific configuration."
+    )
+
+
+class TextToSpeechConvertRequestOutput(BaseModel):
+    destination: AnyUrl | PurePosixPath = Field(
+        description="The destination of the audio file",
+        union_mode="left_to_right",
+    )
+
+
+class TextToSpeechConvertRequest(BaseModel):
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "voice_id": "JBFqnCBsd6RMkjVDRZzb",
+                    "text": "The first move is what sets everything in motion.",
+                    "options": {
+                        "model_id": "eleven_multilingual_v2",
+                        "output_format": "mp3_44100_128",
+                    },
+                    "output": {
+                        "destination": "s3://bucket/speech.mp3",
+                    },
+                },
+            ]
+        }
+    )
+
+    voice_id: str = Field(
+        description="ID of the voice to be used. Use the Get voices endpoint list all the available voices.",
+    )
+
+    text: str = Field(description="The text that will get converted into speech.")
+
+    options: TextToSpeechConvertRequestOptions = Field(
+        default_factory=TextToSpeechConvertRequestOptions,
+        description="Generation options",
+    )
+
+    output: TextToSpeechConvertRequestOutput = Field(
+        description="Output configuration",
+    )
+
+
+class TextToSpeechConvertResponse(BaseModel):
+    destination: AnyUrl | PurePosixPath = Field(
+        description="The destination the audio file was persisted to",
+        union_mode="left_to_right",
+    )
+
+    size: int = Field(description="The size of the audio file in bytes.")
+
+    checksum: str = Field(
+        description="The checksum of the audio file (eg. 'sha256:<hex digest>').",
+    )
+
+    output_format: TextToSpeechStreamRequestOutputFormat | None = Field(
+        default=None,
+        description="The output format the audio was requested in (the default of ElevenLabs if null).",
+    )
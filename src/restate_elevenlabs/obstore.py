@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterable
+from datetime import timedelta
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING, BinaryIO, cast
+from urllib.parse import unquote
+
+import obstore
+import obstore.store
+from pydantic import AnyUrl
+
+from ._readahead import DEFAULT_READ_AHEAD, ReadAheadReader
+from .files import AsyncFile
+
+if TYPE_CHECKING:
+    from obstore.store import ClientConfig, ObjectStore
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class _StoreResolver:
+    def __init__(
+        self,
+        store: ObjectStore | None = None,
+        client_options: ClientConfig | None = None,
+    ):
+        self.store = store
+        self.client_options = client_options
+
+        self._stores: dict[str, ObjectStore] = {}
+
+    def resolve(self, ref: AnyUrl | PurePosixPath) -> tuple[ObjectStore, str]:
+        if isinstance(ref, AnyUrl) and ref.scheme == "file":
+            return self._local(), unquote(ref.path or "").lstrip("/")
+
+        if isinstance(ref, AnyUrl):
+            base = f"{ref.scheme}://{ref.host or ''}"
+            if ref.port is not None and ref.scheme in ("http", "https"):
+                base = f"{base}:{ref.port}"
+
+            # Stores are reused per bucket/host so that connection pools survive between calls
+            store = self._stores.get(base)
+            if store is None:
+                store = obstore.store.from_url(
+                    base,
+                    client_options=self.client_options,
+                )
+                self._stores[base] = store
+
+            return store, unquote(ref.path or "").lstrip("/")
+
+        if self.store is not None:
+            return self.store, str(ref).lstrip("/")
+
+        return self._local(), str(Path(ref).absolute()).lstrip("/")
+
+    def _local(self) -> ObjectStore:
+        store = self._stores.get("file://")
+        if store is None:
+            store = obstore.store.LocalStore(mkdir=True)
+            self._stores["file://"] = store
+
+        return store
+
+
+class FileLoader:
+    """Loads files from an object store.
+
+    Implements `StreamLoader`: `open` returns a reader that is fed while the object is being downloaded,
+    so no local scratch space is needed.
+    """
+
+    def __init__(
+        self,
+        store: ObjectStore | None = None,
+        client_options: ClientConfig | None = None,
+        logger: logging.Logger = _logger,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        read_ahead: int = DEFAULT_READ_AHEAD,
+    ):
+        self._resolver = _StoreResolver(store, client_options)
+        self.logger = logger
+        self.chunk_size = chunk_size
+        self.read_ahead = read_ahead
+
+    def load(self, ref: AnyUrl | PurePosixPath, dst: Path):
+        store, path = self._resolver.resolve(ref)
+
+        self.logger.debug("Loading file", extra={"ref": str(ref), "dst": str(dst)})
+
+        result = obstore.get(store, path)
+
+        with open(dst, "wb") as file:
+            for chunk in result.stream(self.chunk_size):
+                file.write(chunk)
+
+    def open(self, ref: AnyUrl | PurePosixPath) -> BinaryIO:
+        store, path = self._resolver.resolve(ref)
+
+        self.logger.debug("Streaming file", extra={"ref": str(ref)})
+
+        result = obstore.get(store, path)
+
+        return cast(
+            BinaryIO,
+            ReadAheadReader(
+                result.stream(self.chunk_size),
+                result.meta["size"],
+                PurePosixPath(path).name,
+                self.read_ahead,
+            ),
+        )
+
+
+class AsyncFileLoader:
+    """Loads files from an object store without blocking the event loop.
+
+    URL references are resolved to a store on demand,
+    paths are resolved against the default store (or the local filesystem if there is none).
+
+    Implements `AsyncStreamLoader`: the file returned by `open` yields the chunks of the download as they arrive.
+
+    Implements `AsyncRangeLoader` (used by segmented transcription) with ranged GET requests.
+
+    Implements `AsyncSigningLoader` for S3, GCS and Azure stores.
+    """
+
+    def __init__(
+        self,
+        store: ObjectStore | None = None,
+        client_options: ClientConfig | None = None,
+        logger: logging.Logger = _logger,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self._resolver = _StoreResolver(store, client_options)
+        self.logger = logger
+        self.chunk_size = chunk_size
+
+    async def load(self, ref: AnyUrl | PurePosixPath, dst: Path):
+        store, path = self._resolver.resolve(ref)
+
+        self.logger.debug("Loading file", extra={"ref": str(ref), "dst": str(dst)})
+
+        result = await obstore.get_async(store, path)
+
+        with open(dst, "wb") as file:
+            async for chunk in result.stream(self.chunk_size):
+                await asyncio.to_thread(file.write, chunk)
+
+    async def open(self, ref: AnyUrl | PurePosixPath) -> AsyncFile:
+        store, path = self._resolver.resolve(ref)
+
+        self.logger.debug("Streaming file", extra={"ref": str(ref)})
+
+        result = await obstore.get_async(store, path)
+
+        return AsyncFile(
+            result.stream(self.chunk_size),
+            PurePosixPath(path).name,
+            result.meta["size"],
+        )
+
+    async def version(self, ref: AnyUrl | PurePosixPath) -> str | None:
+        store, path = self._resolver.resolve(ref)
+
+        meta = await obstore.head_async(store, path)
+
+        return meta["version"] or meta["e_tag"]
+
+    async def size(self, ref: AnyUrl | PurePosixPath) -> int:
+        store, path = self._resolver.resolve(ref)
+
+        meta = await obstore.head_async(store, path)
+
+        return meta["size"]
+
+    async def read_range(
+        self,
+        ref: AnyUrl | PurePosixPath,
+        start: int,
+        end: int,
+    ) -> bytes:
+        store, path = self._resolver.resolve(ref)
+
+        self.logger.debug(
+            "Loading file range",
+            extra={"ref": str(ref), "start": start, "end": end},
+        )
+
+        return bytes(await obstore.get_range_async(store, path, start=start, end=end))
+
+    async def sign(
+        self,
+        ref: AnyUrl | PurePosixPath,
+        expires_in: timedelta,
+    ) -> str | None:
+        store, path = self._resolver.resolve(ref)
+
+        if not isinstance(
+            store,
+            (obstore.store.S3Store, obstore.store.GCSStore, obstore.store.AzureStore),
+        ):
+            return None
+
+        self.logger.debug("Signing file URL", extra={"ref": str(ref)})
+
+        return await obstore.sign_async(store, "GET", path, expires_in)
+
+
+class AsyncFilePersister:
+    """Persists files to an object store without blocking the event loop.
+
+    Implements `AsyncStreamPersister`.
+    """
+
+    def __init__(
+        self,
+        store: ObjectStore | None = None,
+        client_options: ClientConfig | None = None,
+        logger: logging.Logger = _logger,
+    ):
+        self._resolver = _StoreResolver(store, client_options)
+        self.logger = logger
+
+    async def persist(
+        self,
+        ref: AnyUrl | PurePosixPath,
+        src: bytes | bytearray | memoryview,
+    ):
+        store, path = self._resolver.resolve(ref)
+
+        self.logger.debug("Persisting file", extra={"ref": str(ref)})
+
+        await obstore.put_async(store, path, src)
+
+    async def persist_stream(
+        self,
+        ref: AnyUrl | PurePosixPath,
+        src: AsyncIterable[bytes],
+    ):
+        store, path = self._resolver.resolve(ref)
+
+        self.logger.debug("Persisting file stream", extra={"ref": str(ref)})
+
+        # Large streams are uploaded in parts as they are produced
+        await obstore.put_async(store, path, src)
+
+
+class ObjectStoreCache:
+    """Transcription cache backed by an object store (eg. a bucket prefix)."""
+
+    def __init__(self, store: ObjectStore, logger: logging.Logger = _logger):
+        self.store = store
+        self.logger = logger
+
+    async def get(self, key: str) -> bytes | None:
+        try:
+            result = await obstore.get_async(self.store, f"{key}.json")
+        except FileNotFoundError:
+            return None
+
+        return bytes(await result.bytes_async())
+
+    async def set(self, key: str, value: bytes):
+        await obstore.put_async(self.store, f"{key}.json", value)
@@ -0,0 +1,94 @@
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram
+
+# Transcriptions take anywhere from a few hundred milliseconds to several minutes
+_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+class PrometheusMetrics:
+    """Exports instrumentation as Prometheus metrics.
+
+    Handler metrics count invocation attempts: a handler resumed by Restate is measured again.
+    """
+
+    def __init__(
+        self,
+        registry: CollectorRegistry = REGISTRY,
+        namespace: str = "restate_elevenlabs",
+    ):
+        self.stage_duration = Histogram(
+            "stage_duration_seconds",
+            "Time spent in each stage of a transcription",
+            ["stage"],
+            namespace=namespace,
+            registry=registry,
+            buckets=_BUCKETS,
+        )
+
+        self.call_duration = Histogram(
+            "call_duration_seconds",
+            "Duration of handler invocations and ElevenLabs calls",
+            ["operation"],
+            namespace=namespace,
+            registry=registry,
+            buckets=_BUCKETS,
+        )
+
+        self.errors = Counter(
+            "errors",
+            "Failed handler invocations and ElevenLabs calls by error class",
+            ["operation", "error"],
+            namespace=namespace,
+            registry=registry,
+        )
+
+        self.calls_in_flight = Gauge(
+            "in_flight",
+            "Handler invocations and ElevenLabs calls in progress",
+            ["operation"],
+            namespace=namespace,
+            registry=registry,
+        )
+
+        self.bytes = Counter(
+            "bytes",
+            "Bytes uploaded to ElevenLabs, downloaded from ElevenLabs and persisted",
+            ["direction"],
+            namespace=namespace,
+            registry=registry,
+        )
+
+        self.audio_duration = Counter(
+            "audio_duration_seconds",
+            "Duration of the transcribed audio",
+            namespace=namespace,
+            registry=registry,
+        )
+
+        self.cache_lookups = Counter(
+            "cache_lookups",
+            "Cache lookups by cache and result (hit or miss)",
+            ["cache", "result"],
+            namespace=namespace,
+            registry=registry,
+        )
+
+    def observe_stage(self, stage: str, seconds: float):
+        self.stage_duration.labels(stage).observe(seconds)
+
+    def observe_call(self, operation: str, seconds: float, error: str | None):
+        self.call_duration.labels(operation).observe(seconds)
+
+        if error is not None:
+            self.errors.labels(operation, error).inc()
+
+    def in_flight(self, operation: str, delta: int):
+        self.calls_in_flight.labels(operation).inc(delta)
+
+    def transfer(self, direction: str, size: int):
+        self.bytes.labels(direction).inc(size)
+
+    def audio(self, seconds: float):
+        self.audio_duration.inc(seconds)
+
+    def cache_lookup(self, cache: str, hit: bool):
+        self.cache_lookups.labels(cache, "hit" if hit else "miss").inc()
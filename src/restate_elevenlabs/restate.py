@@ -1,23 +1,43 @@
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from contextlib import nullcontext
 from datetime import timedelta
 
 import restate
+from pydantic import ValidationError
+from restate.serde import BytesSerde
 
-from .executor import Executor
+from .executor import AsyncExecutor, Executor
+from .metrics import Metrics, measure_call
 from .model import (
     SpeechToTextConvertAsyncResponse,
+    SpeechToTextConvertBatchItemResult,
+    SpeechToTextConvertBatchRequest,
+    SpeechToTextConvertBatchResponse,
     SpeechToTextConvertFileAsyncRequest,
     SpeechToTextConvertFileRequest,
     SpeechToTextConvertResponse,
     SpeechToTextConvertUrlAsyncRequest,
     SpeechToTextConvertUrlRequest,
+    SpeechToTextConvertVariantsRequest,
+    SpeechToTextConvertVariantsResponse,
+    SpeechToTextConvertWebhookEvent,
+    SpeechToTextConvertWebhookRequest,
+    SpeechToTextGetTranscriptRequest,
+    SpeechToTextWaitTranscriptRequest,
+    TextToSpeechConvertRequest,
+    TextToSpeechConvertResponse,
 )
+from .webhook import parse_webhook_metadata, verify_signature, with_webhook_metadata
 
 
 def create_service(
-    executor: Executor,
+    executor: Executor | AsyncExecutor,
     service_name: str = "ElevenLabs",
     inactivity_timeout: timedelta | None = None,
     abort_timeout: timedelta | None = None,
+    metrics: Metrics | None = None,
+    webhook_secret: str | None = None,
 ) -> restate.Service:
     service = restate.Service(
         service_name,
@@ -26,55 +46,515 @@ def create_service(
         abort_timeout=abort_timeout,
     )
 
-    register_service(executor, service)
+    register_service(executor, service, metrics, webhook_secret)
 
     return service
 
 
 def register_service(
-    executor: Executor,
+    executor: Executor | AsyncExecutor,
     service: restate.Service,
+    metrics: Metrics | None = None,
+    webhook_secret: str | None = None,
+):
+    """Register the handlers of the service.
+
+    The handlers completing async transcriptions through ElevenLabs webhooks are registered
+    only if a webhook secret is given.
+    """
+
+    if isinstance(executor, Executor):
+        _register_handlers(
+            _ThreadedExecutor(executor), service, metrics, webhook_secret
+        )
+    else:
+        _register_handlers(executor, service, metrics, webhook_secret)
+
+
+def _register_handlers(
+    executor: "AsyncExecutor | _ThreadedExecutor",
+    service: restate.Service,
+    metrics: Metrics | None,
+    webhook_secret: str | None,
 ):
     @service.handler("speechToTextConvertUrl")
     async def speech_to_text_convert_url(
         ctx: restate.Context,
         request: SpeechToTextConvertUrlRequest,
     ) -> SpeechToTextConvertResponse:
-        return await ctx.run_typed(
-            "speech_to_text_convert_url",
-            executor.speech_to_text_convert_url,
-            request=request,
-        )
+        with measure_call(metrics, "speechToTextConvertUrl"):
+            return await ctx.run_typed(
+                "speech_to_text_convert_url",
+                executor.speech_to_text_convert_url,
+                request=request,
+            )
 
     @service.handler("speechToTextConvertUrlAsync")
     async def speech_to_text_convert_url_async(
         ctx: restate.Context,
         request: SpeechToTextConvertUrlAsyncRequest,
     ) -> SpeechToTextConvertAsyncResponse:
-        return await ctx.run_typed(
-            "speech_to_text_convert_url_async",
-            executor.speech_to_text_convert_url_async,
-            request=request,
-        )
+        with measure_call(metrics, "speechToTextConvertUrlAsync"):
+            return await ctx.run_typed(
+                "speech_to_text_convert_url_async",
+                executor.speech_to_text_convert_url_async,
+                request=with_webhook_metadata(request),
+            )
 
     @service.handler("speechToTextConvertFile")
     async def speech_to_text_convert_file(
         ctx: restate.Context,
         request: SpeechToTextConvertFileRequest,
     ) -> SpeechToTextConvertResponse:
-        return await ctx.run_typed(
-            "speech_to_text_convert_file",
-            executor.speech_to_text_convert_file,
-            request=request,
-        )
+        with measure_call(metrics, "speechToTextConvertFile"):
+            if request.segmentation is not None:
+                return await _speech_to_text_convert_file_segmented(
+                    ctx, executor, request
+                )
+
+            # Downloaded in a step of its own, so that a failed upload is retried without downloading the file again
+            if isinstance(executor, AsyncExecutor) and executor.stage is not None:
+                await ctx.run_typed(
+                    "speech_to_text_convert_file_stage",
+                    executor.speech_to_text_convert_file_stage,
+                    request=request,
+                )
+
+            return await ctx.run_typed(
+                "speech_to_text_convert_file",
+                executor.speech_to_text_convert_file,
+                request=request,
+            )
 
     @service.handler("speechToTextConvertFileAsync")
     async def speech_to_text_convert_file_async(
         ctx: restate.Context,
         request: SpeechToTextConvertFileAsyncRequest,
     ) -> SpeechToTextConvertAsyncResponse:
-        return await ctx.run_typed(
-            "speech_to_text_convert_file_async",
-            executor.speech_to_text_convert_file_async,
+        with measure_call(metrics, "speechToTextConvertFileAsync"):
+            return await ctx.run_typed(
+                "speech_to_text_convert_file_async",
+                executor.speech_to_text_convert_file_async,
+                request=with_webhook_metadata(request),
+            )
+
+    @service.handler("speechToTextConvertBatch")
+    async def speech_to_text_convert_batch(
+        ctx: restate.Context,
+        request: SpeechToTextConvertBatchRequest,
+    ) -> SpeechToTextConvertBatchResponse:
+        with measure_call(metrics, "speechToTextConvertBatch"):
+            options = restate.RunOptions[SpeechToTextConvertResponse](
+                max_attempts=request.max_attempts,
+            )
+
+            def start(index: int) -> restate.RestateDurableFuture:
+                item = request.items[index]
+
+                if item.url is not None:
+                    return ctx.run_typed(
+                        f"speech_to_text_convert_url[{index}]",
+                        executor.speech_to_text_convert_url,
+                        options,
+                        request=SpeechToTextConvertUrlRequest.model_validate(
+                            {
+                                "url": item.url,
+                                "options": item.options or request.options,
+                                "output": item.output,
+                                "scheduling": request.scheduling,
+                            }
+                        ),
+                    )
+
+                assert item.file is not None
+
+                return ctx.run_typed(
+                    f"speech_to_text_convert_file[{index}]",
+                    executor.speech_to_text_convert_file,
+                    options,
+                    request=SpeechToTextConvertFileRequest.model_validate(
+                        {
+                            "file": item.file,
+                            "options": item.options or request.options,
+                            "output": item.output,
+                            "scheduling": request.scheduling,
+                        }
+                    ),
+                )
+
+            return SpeechToTextConvertBatchResponse(
+                results=await _collect_results(
+                    len(request.items),
+                    start,
+                    request.concurrency,
+                ),
+            )
+
+    @service.handler("speechToTextConvertVariants")
+    async def speech_to_text_convert_variants(
+        ctx: restate.Context,
+        request: SpeechToTextConvertVariantsRequest,
+    ) -> SpeechToTextConvertVariantsResponse:
+        with measure_call(metrics, "speechToTextConvertVariants"):
+            # Downloaded once in a step of its own: the variants transcribe the staged copy
+            if (
+                request.file is not None
+                and isinstance(executor, AsyncExecutor)
+                and executor.stage is not None
+            ):
+                await ctx.run_typed(
+                    "speech_to_text_convert_variants_stage",
+                    executor.speech_to_text_convert_variants_stage,
+                    request=request,
+                )
+
+            options = restate.RunOptions[SpeechToTextConvertResponse](
+                max_attempts=request.max_attempts,
+            )
+
+            def start(index: int) -> restate.RestateDurableFuture:
+                variant = request.variants[index]
+
+                if request.url is not None:
+                    return ctx.run_typed(
+                        f"speech_to_text_convert_url[{index}]",
+                        executor.speech_to_text_convert_url,
+                        options,
+                        request=SpeechToTextConvertUrlRequest.model_validate(
+                            {
+                                "url": request.url,
+                                "options": variant.options,
+                                "output": variant.output,
+                                "scheduling": request.scheduling,
+                            }
+                        ),
+                    )
+
+                assert request.file is not None
+
+                return ctx.run_typed(
+                    f"speech_to_text_convert_file[{index}]",
+                    executor.speech_to_text_convert_file,
+                    options,
+                    request=SpeechToTextConvertFileRequest.model_validate(
+                        {
+                            "file": request.file,
+                            "options": variant.options,
+                            "output": variant.output,
+                            "scheduling": request.scheduling,
+                        }
+                    ),
+                )
+
+            # Without a stage, the variants share a temporary copy of the file (within this attempt of the invocation)
+            shared = (
+                executor.share_file(request.file)
+                if request.file is not None and isinstance(executor, AsyncExecutor)
+                else nullcontext()
+            )
+
+            async with shared:
+                results = await _collect_results(
+                    len(request.variants),
+                    start,
+                    request.concurrency,
+                )
+
+            return SpeechToTextConvertVariantsResponse(results=results)
+
+    @service.handler("speechToTextGetTranscript")
+    async def speech_to_text_get_transcript(
+        ctx: restate.Context,
+        request: SpeechToTextGetTranscriptRequest,
+    ) -> SpeechToTextConvertResponse:
+        with measure_call(metrics, "speechToTextGetTranscript"):
+            return await ctx.run_typed(
+                "speech_to_text_get_transcript",
+                executor.speech_to_text_get_transcript,
+                request=request,
+            )
+
+    @service.handler("speechToTextWaitTranscript")
+    async def speech_to_text_wait_transcript(
+        ctx: restate.Context,
+        request: SpeechToTextWaitTranscriptRequest,
+    ) -> SpeechToTextConvertResponse:
+        with measure_call(metrics, "speechToTextWaitTranscript"):
+            interval = request.initial_interval
+            waited = 0.0
+            attempt = 0
+
+            # Checks back on a durable timer, so the invocation suspends while waiting
+            while True:
+                try:
+                    return await ctx.run_typed(
+                        f"speech_to_text_get_transcript[{attempt}]",
+                        executor.speech_to_text_get_transcript,
+                        request=request,
+                    )
+                except restate.TerminalError as err:
+                    # The transcript is not found until the transcription finishes
+                    if err.status_code != 404:
+                        raise
+
+                if request.timeout is not None and waited >= request.timeout:
+                    raise restate.TerminalError(
+                        f"Transcript {request.transcription_id} is not available after {waited:g} seconds",
+                        status_code=404,
+                    )
+
+                if request.timeout is not None:
+                    interval = min(interval, request.timeout - waited)
+
+                await ctx.sleep(timedelta(seconds=interval))
+
+                waited += interval
+                interval = min(interval * request.multiplier, request.max_interval)
+                attempt += 1
+
+    @service.handler("textToSpeechConvert")
+    async def text_to_speech_convert(
+        ctx: restate.Context,
+        request: TextToSpeechConvertRequest,
+    ) -> TextToSpeechConvertResponse:
+        with measure_call(metrics, "textToSpeechConvert"):
+            if not isinstance(executor, AsyncExecutor):
+                raise restate.TerminalError("Text to speech requires an AsyncExecutor")
+
+            # Only the reference to the audio file is journaled
+            return await ctx.run_typed(
+                "text_to_speech_convert",
+                executor.text_to_speech_convert,
+                request=request,
+            )
+
+    if webhook_secret is not None:
+        _register_webhook_handlers(executor, service, metrics, webhook_secret)
+
+
+def _register_webhook_handlers(
+    executor: "AsyncExecutor | _ThreadedExecutor",
+    service: restate.Service,
+    metrics: Metrics | None,
+    webhook_secret: str,
+):
+    @service.handler("speechToTextConvertUrlAwait")
+    async def speech_to_text_convert_url_await(
+        ctx: restate.Context,
+        request: SpeechToTextConvertUrlAsyncRequest,
+    ) -> SpeechToTextConvertResponse:
+        with measure_call(metrics, "speechToTextConvertUrlAwait"):
+            awakeable_id, transcription = ctx.awakeable(
+                type_hint=SpeechToTextConvertResponse
+            )
+
+            await ctx.run_typed(
+                "speech_to_text_convert_url_async",
+                executor.speech_to_text_convert_url_async,
+                request=with_webhook_metadata(request, awakeable_id),
+            )
+
+            return await transcription
+
+    @service.handler("speechToTextConvertFileAwait")
+    async def speech_to_text_convert_file_await(
+        ctx: restate.Context,
+        request: SpeechToTextConvertFileAsyncRequest,
+    ) -> SpeechToTextConvertResponse:
+        with measure_call(metrics, "speechToTextConvertFileAwait"):
+            awakeable_id, transcription = ctx.awakeable(
+                type_hint=SpeechToTextConvertResponse
+            )
+
+            await ctx.run_typed(
+                "speech_to_text_convert_file_async",
+                executor.speech_to_text_convert_file_async,
+                request=with_webhook_metadata(request, awakeable_id),
+            )
+
+            return await transcription
+
+    @service.handler("speechToTextConvertWebhook", input_serde=BytesSerde())
+    async def speech_to_text_convert_webhook(ctx: restate.Context, request: bytes):
+        with measure_call(metrics, "speechToTextConvertWebhook"):
+            # Verified in a step: the signature expires, but retries of the invocation must not fail on it
+            await ctx.run_typed(
+                "verify_webhook_signature",
+                verify_signature,
+                body=request,
+                headers=ctx.request().headers,
+                secret=webhook_secret,
+            )
+
+            try:
+                event = SpeechToTextConvertWebhookEvent.model_validate_json(request)
+            except ValidationError as err:
+                raise restate.TerminalError(
+                    f"Invalid webhook event: {err}",
+                    status_code=400,
+                ) from err
+
+            if (
+                event.type != "speech_to_text_transcription"
+                or event.data.transcription is None
+            ):
+                return
+
+            metadata = parse_webhook_metadata(event.data.webhook_metadata)
+
+            # Transcriptions requested by other clients of the account are acknowledged and ignored
+            if metadata is None:
+                return
+
+            awakeable_id, output = metadata
+            response = event.data.transcription
+
+            if output.destination:
+                response = await ctx.run_typed(
+                    "speech_to_text_convert_webhook",
+                    executor.speech_to_text_convert_webhook,
+                    request=SpeechToTextConvertWebhookRequest.model_validate(
+                        {"transcription": response, "output": output}
+                    ),
+                )
+
+            if awakeable_id is not None:
+                ctx.resolve_awakeable(awakeable_id, response)
+
+
+async def _speech_to_text_convert_file_segmented(
+    ctx: restate.Context,
+    executor: "AsyncExecutor | _ThreadedExecutor",
+    request: SpeechToTextConvertFileRequest,
+) -> SpeechToTextConvertResponse:
+    if not isinstance(executor, AsyncExecutor):
+        raise restate.TerminalError("Segmentation requires an AsyncExecutor")
+
+    assert request.segmentation is not None
+
+    segments = await ctx.run_typed(
+        "speech_to_text_convert_file_segments",
+        executor.speech_to_text_convert_file_segments,
+        request=request,
+    )
+
+    def start(index: int) -> restate.RestateDurableFuture:
+        return ctx.run_typed(
+            f"speech_to_text_convert_file_segment[{index}]",
+            executor.speech_to_text_convert_file_segment,
             request=request,
+            segment=segments.segments[index],
+        )
+
+    responses: list[SpeechToTextConvertResponse | None] = [None] * len(
+        segments.segments
+    )
+
+    async for index, future in _run_bounded(
+        len(segments.segments),
+        start,
+        request.segmentation.concurrency,
+    ):
+        responses[index] = await future
+
+    return await ctx.run_typed(
+        "speech_to_text_convert_file_merge",
+        executor.speech_to_text_convert_file_merge,
+        request=request,
+        segments=segments,
+        responses=[response for response in responses if response is not None],
+    )
+
+
+async def _collect_results(
+    count: int,
+    start: Callable[[int], restate.RestateDurableFuture],
+    concurrency: int,
+) -> list[SpeechToTextConvertBatchItemResult]:
+    """Run transcription steps with bounded concurrency, reporting failed ones instead of failing the invocation."""
+
+    results: list[SpeechToTextConvertBatchItemResult | None] = [None] * count
+
+    async for index, future in _run_bounded(count, start, concurrency):
+        try:
+            results[index] = SpeechToTextConvertBatchItemResult(
+                response=await future,
+            )
+        except restate.TerminalError as err:
+            results[index] = SpeechToTextConvertBatchItemResult(
+                error=err.message,
+                status_code=err.status_code,
+            )
+
+    return [result for result in results if result is not None]
+
+
+async def _run_bounded(
+    count: int,
+    start: Callable[[int], restate.RestateDurableFuture],
+    concurrency: int,
+) -> AsyncIterator[tuple[int, restate.RestateDurableFuture]]:
+    """Start `count` durable steps with at most `concurrency` in flight, yielding them as they complete."""
+
+    pending: dict[restate.RestateDurableFuture, int] = {}
+    next_index = 0
+
+    # Steps are always started in order, so the journal is the same on replay
+    while next_index < count or pending:
+        while next_index < count and len(pending) < concurrency:
+            pending[start(next_index)] = next_index
+            next_index += 1
+
+        completed, _ = await restate.wait_completed(*pending)
+
+        for future in completed:
+            yield pending.pop(future), future
+
+
+class _ThreadedExecutor:
+    """Runs the blocking calls of an `Executor` in worker threads, so that handlers await both executors the same way."""
+
+    def __init__(self, executor: Executor):
+        self.executor = executor
+
+    async def speech_to_text_convert_url(
+        self, request: SpeechToTextConvertUrlRequest
+    ) -> SpeechToTextConvertResponse:
+        return await asyncio.to_thread(
+            self.executor.speech_to_text_convert_url, request
+        )
+
+    async def speech_to_text_convert_url_async(
+        self, request: SpeechToTextConvertUrlAsyncRequest
+    ) -> SpeechToTextConvertAsyncResponse:
+        return await asyncio.to_thread(
+            self.executor.speech_to_text_convert_url_async, request
+        )
+
+    async def speech_to_text_convert_file(
+        self, request: SpeechToTextConvertFileRequest
+    ) -> SpeechToTextConvertResponse:
+        return await asyncio.to_thread(
+            self.executor.speech_to_text_convert_file, request
+        )
+
+    async def speech_to_text_convert_file_async(
+        self, request: SpeechToTextConvertFileAsyncRequest
+    ) -> SpeechToTextConvertAsyncResponse:
+        return await asyncio.to_thread(
+            self.executor.speech_to_text_convert_file_async, request
+        )
+
+    async def speech_to_text_convert_webhook(
+        self, request: SpeechToTextConvertWebhookRequest
+    ) -> SpeechToTextConvertResponse:
+        return await asyncio.to_thread(
+            self.executor.speech_to_text_convert_webhook, request
+        )
+
+    async def speech_to_text_get_transcript(
+        self, request: SpeechToTextGetTranscriptRequest
+    ) -> SpeechToTextConvertResponse:
+        return await asyncio.to_thread(
+            self.executor.speech_to_text_get_transcript, request
         )
@@ -0,0 +1,152 @@
+import asyncio
+import heapq
+import itertools
+from collections.abc import Mapping
+
+# Relative share of capacity of each priority class while both have transcriptions queued
+DEFAULT_WEIGHTS: Mapping[str, float] = {"interactive": 8, "batch": 1}
+
+
+class Scheduler:
+    """Fair scheduler of transcriptions shared by every handler of a process.
+
+    Bounds the number of transcriptions running at the same time, in total and per tenant.
+    Queued transcriptions start in start-time fair queueing order: every (tenant, priority) flow advances
+    its virtual time by 1 / weight with each transcription, so interactive transcriptions overtake a backlog
+    of batch ones (which still get their share) and a tenant submitting lots of work cannot starve the others.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        tenant_concurrency: int | None = None,
+        tenant_quotas: Mapping[str, int] | None = None,
+        weights: Mapping[str, float] = DEFAULT_WEIGHTS,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        if tenant_concurrency is not None and tenant_concurrency < 1:
+            raise ValueError("tenant_concurrency must be at least 1")
+
+        if any(weight <= 0 for weight in weights.values()):
+            raise ValueError("weights must be positive")
+
+        self.max_concurrency = max_concurrency
+        self.tenant_concurrency = tenant_concurrency
+        self.tenant_quotas = dict(tenant_quotas or {})
+        self.weights = dict(weights)
+
+        self._active = 0
+        self._tenants_active: dict[str | None, int] = {}
+        self._queues: dict[
+            str | None, list[tuple[float, int, asyncio.Future[None]]]
+        ] = {}
+        self._finish: dict[tuple[str | None, str], float] = {}
+        self._virtual_time = 0.0
+        self._sequence = itertools.count()
+
+    @property
+    def active(self) -> int:
+        """The number of transcriptions currently holding a slot."""
+
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        """The number of transcriptions waiting for a slot."""
+
+        return sum(
+            not future.done() for queue in self._queues.values() for *_, future in queue
+        )
+
+    def quota(self, tenant: str | None) -> int | None:
+        """The maximum number of transcriptions of a tenant running at the same time."""
+
+        if tenant is not None and tenant in self.tenant_quotas:
+            return self.tenant_quotas[tenant]
+
+        return self.tenant_concurrency
+
+    async def acquire(self, tenant: str | None = None, priority: str = "interactive"):
+        """Wait for a slot (release it with `release`)."""
+
+        try:
+            weight = self.weights[priority]
+        except KeyError:
+            raise ValueError(f"Unknown priority: {priority}") from None
+
+        flow = (tenant, priority)
+        start = max(self._virtual_time, self._finish.get(flow, 0.0))
+        self._finish[flow] = start + 1 / weight
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._queues.setdefault(tenant, []),
+            (start, next(self._sequence), future),
+        )
+
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been granted just before the caller was cancelled
+            if future.done() and not future.cancelled():
+                self.release(tenant)
+            else:
+                self._dispatch()
+
+            raise
+
+    def release(self, tenant: str | None = None):
+        self._active -= 1
+        self._tenants_active[tenant] -= 1
+
+        if not self._tenants_active[tenant]:
+            del self._tenants_active[tenant]
+
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._active < self.max_concurrency:
+            head: tuple[float, int, str | None] | None = None
+
+            for tenant, queue in list(self._queues.items()):
+                # Drop callers cancelled while waiting
+                while queue and queue[0][2].done():
+                    heapq.heappop(queue)
+
+                if not queue:
+                    del self._queues[tenant]
+
+                    continue
+
+                quota = self.quota(tenant)
+                if quota is not None and self._tenants_active.get(tenant, 0) >= quota:
+                    continue
+
+                start, sequence, _ = queue[0]
+                if head is None or (start, sequence) < head[:2]:
+                    head = (start, sequence, tenant)
+
+            if head is None:
+                break
+
+            start, _, future = heapq.heappop(self._queues[head[2]])
+            if not self._queues[head[2]]:
+                del self._queues[head[2]]
+
+            self._virtual_time = max(self._virtual_time, start)
+            self._active += 1
+            self._tenants_active[head[2]] = self._tenants_active.get(head[2], 0) + 1
+
+            future.set_result(None)
+
+        # Forget flows that are not ahead of the virtual time (they start from it anyway)
+        if not self._queues:
+            self._finish = {
+                flow: finish
+                for flow, finish in self._finish.items()
+                if finish > self._virtual_time
+            }
@@ -0,0 +1,38 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Coalesces concurrent calls with the same key into a single call.
+
+    Callers arriving while a call is in flight wait for (and share) its result instead of starting their own.
+    The call runs in its own task, so a cancelled caller (eg. a suspended invocation) does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Task[T]] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(call())
+            task.add_done_callback(lambda done: self._done(key, done))
+
+            self._calls[key] = task
+
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Task[T]):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+        # Mark the error as retrieved in case every caller has been cancelled
+        if not task.cancelled():
+            task.exception()
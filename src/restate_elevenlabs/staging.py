@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+
+from .metrics import CACHE_AUDIO, Metrics
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 10 * 1024 * 1024 * 1024
+
+_TEMP_PREFIX = ".staging-"
+
+
+class AudioStage:
+    """Local LRU cache of downloaded audio files, bounded by their total size.
+
+    Files are keyed by object and version (eg. ETag), so a staged file can be reused as long as the object does not change:
+    by retries of a transcription and by transcriptions of the same object with different options.
+
+    Files are downloaded under a temporary name and renamed once complete, so a staged file is always whole.
+    Concurrent invocations share a single download, and files in use are never evicted.
+    The directory must not be shared with other processes.
+    """
+
+    def __init__(
+        self,
+        directory: Path | str,
+        max_size: int = DEFAULT_MAX_SIZE,
+        logger: logging.Logger = _logger,
+        metrics: Metrics | None = None,
+    ):
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.logger = logger
+        self.metrics = metrics
+
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._size = 0
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._users: dict[str, int] = {}
+        self._pins: dict[str, int] = {}
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._scan()
+
+    @property
+    def size(self) -> int:
+        """The total size of the staged files in bytes."""
+
+        return self._size
+
+    @asynccontextmanager
+    async def open(
+        self,
+        key: str,
+        load: Callable[[Path], Awaitable[None]],
+    ) -> AsyncIterator[Path]:
+        """Yield the staged file of a key, downloading it with `load` (called with the path to download to) if needed.
+
+        The file is not evicted until the context exits.
+        """
+
+        name = _name(key)
+
+        self._users[name] = self._users.get(name, 0) + 1
+
+        try:
+            async with self._locks.setdefault(name, asyncio.Lock()):
+                path = self._get(name)
+
+                if self.metrics is not None:
+                    self.metrics.cache_lookup(CACHE_AUDIO, path is not None)
+
+                if path is None:
+                    path = await self._put(name, load)
+
+                    self.logger.debug("Staged file", extra={"key": key})
+                else:
+                    self.logger.debug("Reusing staged file", extra={"key": key})
+
+                self._pins[name] = self._pins.get(name, 0) + 1
+        finally:
+            self._users[name] -= 1
+
+            if not self._users[name]:
+                del self._users[name]
+                del self._locks[name]
+
+        try:
+            yield path
+        finally:
+            self._unpin(name)
+
+    @contextmanager
+    def retain(self, key: str) -> Iterator[None]:
+        """Keep the file of a key from being evicted while the context is active (once it is staged by `open`)."""
+
+        name = _name(key)
+
+        self._pins[name] = self._pins.get(name, 0) + 1
+
+        try:
+            yield
+        finally:
+            self._unpin(name)
+
+    def retained(self, key: str) -> bool:
+        """Whether the file of a key is kept from being evicted (by `retain` or while it is open)."""
+
+        return _name(key) in self._pins
+
+    def _unpin(self, name: str):
+        self._pins[name] -= 1
+
+        if not self._pins[name]:
+            del self._pins[name]
+
+        self._evict()
+
+    def _get(self, name: str) -> Path | None:
+        if name not in self._entries:
+            return None
+
+        path = self.directory / name
+
+        try:
+            # The modification time keeps the order of use across restarts
+            os.utime(path)
+        except FileNotFoundError:
+            self._size -= self._entries.pop(name)
+
+            return None
+
+        self._entries.move_to_end(name)
+
+        return path
+
+    async def _put(self, name: str, load: Callable[[Path], Awaitable[None]]) -> Path:
+        path = self.directory / name
+
+        fd, temp = tempfile.mkstemp(dir=self.directory, prefix=_TEMP_PREFIX)
+        os.close(fd)
+
+        try:
+            await load(Path(temp))
+
+            os.replace(temp, path)
+        except BaseException:
+            Path(temp).unlink(missing_ok=True)
+
+            raise
+
+        self._entries[name] = path.stat().st_size
+        self._size += self._entries[name]
+
+        return path
+
+    def _evict(self):
+        for name in list(self._entries):
+            if self._size <= self.max_size:
+                break
+
+            if name in self._pins:
+                continue
+
+            (self.directory / name).unlink(missing_ok=True)
+            self._size -= self._entries.pop(name)
+
+            self.logger.debug("Evicted staged file", extra={"name": name})
+
+    def _scan(self):
+        """Pick up the files staged by a previous process (least recently used first)."""
+
+        files: list[tuple[float, str, int]] = []
+
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+
+            # Downloads interrupted by the previous process
+            if entry.name.startswith(_TEMP_PREFIX):
+                Path(entry.path).unlink(missing_ok=True)
+
+                continue
+
+            stat = entry.stat()
+            files.append((stat.st_mtime, entry.name, stat.st_size))
+
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._size += size
+
+        self._evict()
+
+
+def _name(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest()
@@ -0,0 +1,162 @@
+import logging
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, BinaryIO, ContextManager, Protocol, cast
+
+from restate.exceptions import TerminalError
+
+from ._readahead import DEFAULT_READ_AHEAD, ReadAheadReader
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# The only raw input format accepted by ElevenLabs
+PCM_FILE_FORMAT = "pcm_s16le_16"
+
+
+class Transcoder(Protocol):
+    """Decodes audio to 16kHz mono signed 16-bit little-endian PCM ('pcm_s16le_16').
+
+    The source is either a local file or a (forward-only) reader.
+    The returned reader is consumed while decoding is still in progress.
+    """
+
+    def open(self, src: Path | BinaryIO) -> ContextManager[BinaryIO]: ...
+
+
+class FfmpegTranscoder:
+    """Transcoder running an ffmpeg process.
+
+    Local files are passed to ffmpeg by path (so that formats requiring random access can be decoded),
+    readers are piped to its standard input.
+    """
+
+    def __init__(
+        self,
+        ffmpeg: str = "ffmpeg",
+        logger: logging.Logger = _logger,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        read_ahead: int = DEFAULT_READ_AHEAD,
+    ):
+        if shutil.which(ffmpeg) is None:
+            raise ValueError(f"ffmpeg executable not found: {ffmpeg}")
+
+        self.ffmpeg = ffmpeg
+        self.logger = logger
+        self.chunk_size = chunk_size
+        self.read_ahead = read_ahead
+
+    @contextmanager
+    def open(self, src: Path | BinaryIO) -> Iterator[BinaryIO]:
+        args = [
+            self.ffmpeg,
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-i",
+            str(src) if isinstance(src, Path) else "pipe:0",
+            "-vn",
+            "-ac",
+            "1",
+            "-ar",
+            "16000",
+            "-f",
+            "s16le",
+            "-acodec",
+            "pcm_s16le",
+            "pipe:1",
+        ]
+
+        self.logger.debug("Transcoding file", extra={"args": args})
+
+        # Errors are collected in a file: a full stderr pipe would block the process
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(
+                args,
+                stdin=subprocess.DEVNULL if isinstance(src, Path) else subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=stderr,
+            )
+
+            feeder = None if isinstance(src, Path) else _Feeder(src, process.stdin)
+
+            reader = ReadAheadReader(
+                self._decode(process, stderr, feeder),
+                None,
+                f"{Path(getattr(src, 'name', None) or 'audio').stem}.pcm",
+                self.read_ahead,
+            )
+
+            try:
+                yield cast(BinaryIO, reader)
+            finally:
+                reader.close()
+
+                if process.poll() is None:
+                    process.kill()
+
+                process.wait()
+
+                cast(IO[bytes], process.stdout).close()
+
+    def _decode(
+        self,
+        process: subprocess.Popen[bytes],
+        stderr: IO[bytes],
+        feeder: "_Feeder | None",
+    ) -> Iterator[bytes]:
+        stdout = cast(IO[bytes], process.stdout)
+
+        while chunk := stdout.read(self.chunk_size):
+            yield chunk
+
+        process.wait()
+
+        if feeder is not None:
+            feeder.join()
+
+            # Reading the source failed (eg. network error): let the call be retried
+            if feeder.error is not None:
+                raise feeder.error
+
+        if process.returncode != 0:
+            stderr.seek(0)
+            message = stderr.read().decode(errors="replace").strip()
+
+            raise TerminalError(
+                f"Failed to decode audio: {message or f'ffmpeg exited with {process.returncode}'}",
+                status_code=400,
+            )
+
+
+class _Feeder(threading.Thread):
+    """Copies a reader to the standard input of a process."""
+
+    def __init__(self, src: BinaryIO, dst: IO[bytes] | None):
+        super().__init__(daemon=True)
+
+        self.src = src
+        self.dst = cast(IO[bytes], dst)
+        self.error: BaseException | None = None
+
+        self.start()
+
+    def run(self):
+        try:
+            shutil.copyfileobj(self.src, self.dst)
+        except BrokenPipeError:
+            # The process exited early, its exit status tells what happened
+            pass
+        except BaseException as err:
+            self.error = err
+        finally:
+            try:
+                self.dst.close()
+            except BrokenPipeError:
+                pass
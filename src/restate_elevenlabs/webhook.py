@@ -0,0 +1,165 @@
+"""Completing async transcriptions through ElevenLabs webhooks.
+
+Async requests carry what the service needs to complete them in their webhook metadata:
+the output configuration of the request and (when a handler waits for the transcription) the ID of a Restate awakeable.
+The webhook handler persists the transcription according to the output configuration and resolves the awakeable.
+"""
+
+import hashlib
+import hmac
+import json
+import time
+from collections.abc import Mapping
+from typing import Any, TypeVar
+
+from pydantic import ValidationError
+from restate.exceptions import TerminalError
+
+from .model import (
+    SpeechToTextConvertFileAsyncRequest,
+    SpeechToTextConvertRequestOutput,
+    SpeechToTextConvertUrlAsyncRequest,
+)
+
+SIGNATURE_HEADER = "elevenlabs-signature"
+
+# The tolerance of the ElevenLabs client
+DEFAULT_TOLERANCE = 30 * 60
+
+# Webhook metadata keys (values are strings to respect the depth limit of the metadata)
+AWAKEABLE_ID_KEY = "restate_awakeable_id"
+OUTPUT_KEY = "restate_output"
+
+SpeechToTextConvertAsyncRequestT = TypeVar(
+    "SpeechToTextConvertAsyncRequestT",
+    SpeechToTextConvertUrlAsyncRequest,
+    SpeechToTextConvertFileAsyncRequest,
+)
+
+
+def verify_signature(
+    body: bytes,
+    headers: Mapping[str, str],
+    secret: str,
+    tolerance: float = DEFAULT_TOLERANCE,
+):
+    """Verify the signature of a webhook request sent by ElevenLabs.
+
+    Raises:
+        TerminalError: if the signature is missing, invalid or too old.
+    """
+
+    header = next(
+        (value for name, value in headers.items() if name.lower() == SIGNATURE_HEADER),
+        None,
+    )
+    if not header:
+        raise TerminalError("Missing webhook signature", status_code=401)
+
+    parts = dict(part.split("=", 1) for part in header.split(",") if "=" in part)
+    timestamp = parts.get("t", "")
+    signature = parts.get("v0")
+
+    if not timestamp.isdigit() or signature is None:
+        raise TerminalError("Malformed webhook signature", status_code=401)
+
+    if int(timestamp) < time.time() - tolerance:
+        raise TerminalError("Webhook signature expired", status_code=401)
+
+    expected = hmac.new(
+        secret.encode(),
+        timestamp.encode() + b"." + body,
+        hashlib.sha256,
+    ).hexdigest()
+
+    if not hmac.compare_digest(signature, expected):
+        raise TerminalError("Invalid webhook signature", status_code=401)
+
+
+def with_webhook_metadata(
+    request: SpeechToTextConvertAsyncRequestT,
+    awakeable_id: str | None = None,
+) -> SpeechToTextConvertAsyncRequestT:
+    """Add the output configuration and the awakeable to resolve to the webhook metadata of a request."""
+
+    metadata: dict[str, Any] = {}
+
+    if awakeable_id is not None:
+        metadata[AWAKEABLE_ID_KEY] = awakeable_id
+
+    if request.output.destination:
+        metadata[OUTPUT_KEY] = request.output.model_dump_json(
+            by_alias=True,
+            exclude_defaults=True,
+        )
+
+    if not metadata:
+        return request
+
+    values = _load_metadata(request.options.webhook_metadata)
+    if values is None:
+        raise TerminalError(
+            "Webhook metadata must be a JSON object to complete the request through webhooks",
+            status_code=400,
+        )
+
+    options = request.options.model_copy(update={"webhook_metadata": values | metadata})
+
+    return request.model_copy(update={"options": options})
+
+
+def parse_webhook_metadata(
+    metadata: str | Mapping[str, Any] | None,
+) -> tuple[str | None, SpeechToTextConvertRequestOutput] | None:
+    """Return the awakeable to resolve and the output configuration carried by webhook metadata.
+
+    Returns None if the metadata was not added by this service (eg. requests made by other clients of the account).
+
+    Raises:
+        TerminalError: if the metadata carries the keys of this service, but their values are malformed.
+    """
+
+    values = _load_metadata(metadata)
+    if values is None or (AWAKEABLE_ID_KEY not in values and OUTPUT_KEY not in values):
+        return None
+
+    awakeable_id = values.get(AWAKEABLE_ID_KEY)
+    if awakeable_id is not None and not isinstance(awakeable_id, str):
+        raise TerminalError(
+            f"Invalid webhook metadata: {AWAKEABLE_ID_KEY} must be a string",
+            status_code=400,
+        )
+
+    try:
+        output = (
+            SpeechToTextConvertRequestOutput.model_validate_json(values[OUTPUT_KEY])
+            if OUTPUT_KEY in values
+            else SpeechToTextConvertRequestOutput()
+        )
+    except ValidationError as err:
+        raise TerminalError(
+            f"Invalid webhook metadata: {err}",
+            status_code=400,
+        ) from err
+
+    return awakeable_id, output
+
+
+def _load_metadata(
+    metadata: str | Mapping[str, Any] | None,
+) -> dict[str, Any] | None:
+    """Return webhook metadata as a dict (None if it is not a JSON object)."""
+
+    if metadata is None:
+        return {}
+
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata) if metadata else {}
+        except json.JSONDecodeError:
+            return None
+
+        if not isinstance(metadata, dict):
+            return None
+
+    return dict(metadata)
@@ -0,0 +1,111 @@
+import asyncio
+import inspect
+import json
+from collections.abc import Callable
+from datetime import timedelta
+from typing import Any
+
+import httpx
+import pytest
+import restate
+from elevenlabs import AsyncElevenLabs
+
+
+def _transcription(words: list[tuple[str, float, float]]) -> dict[str, Any]:
+    return {
+        "language_code": "eng",
+        "language_probability": 0.98,
+        "text": " ".join(text for text, _, _ in words),
+        "words": [
+            {"text": text, "start": start, "end": end, "type": "word", "logprob": 0.0}
+            for text, start, end in words
+        ],
+        "transcription_id": "transcription",
+    }
+
+
+@pytest.fixture
+def transcription() -> Callable[[list[tuple[str, float, float]]], dict[str, Any]]:
+    """Return a builder of ElevenLabs transcription responses from (text, start, end) words."""
+
+    return _transcription
+
+
+@pytest.fixture
+def elevenlabs() -> Callable[..., AsyncElevenLabs]:
+    """Return a factory of ElevenLabs clients answering requests with a handler (a transcription by default)."""
+
+    def create(
+        handler: Callable[[httpx.Request], Any] | None = None,
+    ) -> AsyncElevenLabs:
+        async def default(request: httpx.Request) -> httpx.Response:
+            await request.aread()
+
+            return httpx.Response(
+                200,
+                content=json.dumps(_transcription([("hello", 0.0, 0.5)])),
+            )
+
+        return AsyncElevenLabs(
+            api_key="test",
+            httpx_client=httpx.AsyncClient(
+                transport=httpx.MockTransport(handler or default),
+            ),
+        )
+
+    return create
+
+
+class Context:
+    """Restate context running steps as tasks, without journaling or retries."""
+
+    def __init__(self):
+        self.steps: list[str] = []
+        self.sleeps: list[timedelta] = []
+        self.running = 0
+        self.max_running = 0
+
+    def run_typed(
+        self,
+        name: str,
+        action: Callable[..., Any],
+        options: Any = None,
+        /,
+        *args: Any,
+        **kwargs: Any,
+    ) -> "asyncio.Future[Any]":
+        self.steps.append(name)
+
+        async def run() -> Any:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+            try:
+                result = action(*args, **kwargs)
+
+                return await result if inspect.isawaitable(result) else result
+            finally:
+                self.running -= 1
+
+        return asyncio.ensure_future(run())
+
+    def sleep(
+        self, delta: timedelta, name: str | None = None
+    ) -> "asyncio.Future[None]":
+        self.sleeps.append(delta)
+
+        return asyncio.ensure_future(asyncio.sleep(0))
+
+
+@pytest.fixture
+def context(monkeypatch: pytest.MonkeyPatch) -> Context:
+    """Return a fake restate context for calling handlers directly."""
+
+    async def wait_completed(*futures: Any) -> tuple[list[Any], list[Any]]:
+        done, pending = await asyncio.wait(futures, return_when=asyncio.FIRST_COMPLETED)
+
+        return list(done), list(pending)
+
+    monkeypatch.setattr(restate, "wait_completed", wait_completed)
+
+    return Context()
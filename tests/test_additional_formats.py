@@ -0,0 +1,144 @@
+import asyncio
+import base64
+import hashlib
+import json
+from pathlib import PurePosixPath
+from typing import Any
+
+import httpx
+import obstore
+from obstore.store import MemoryStore
+from pydantic import AnyUrl
+
+from restate_elevenlabs import AsyncExecutor, SpeechToTextConvertFileRequest
+from restate_elevenlabs.executor import _sibling, _split_additional_formats
+from restate_elevenlabs.model import SpeechToTextConvertRequestOutput
+from restate_elevenlabs.obstore import AsyncFileLoader, AsyncFilePersister
+
+SRT = "1\n00:00:00,000 --> 00:00:00,500\nhello\n"
+DOCX = b"PK\x03\x04docx"
+
+
+def additional_format(extension: str, content: str | bytes) -> dict[str, Any]:
+    """Return an additional format as sent by ElevenLabs (binary formats are base64 encoded)."""
+
+    binary = isinstance(content, bytes)
+
+    return {
+        "requested_format": extension,
+        "file_extension": extension,
+        "content_type": "application/octet-stream",
+        "is_base64_encoded": binary,
+        "content": base64.b64encode(content).decode() if binary else content,
+    }
+
+
+def reference(destination: str, content: bytes) -> dict[str, Any]:
+    return {
+        "destination": destination,
+        "size": len(content),
+        "checksum": f"sha256:{hashlib.sha256(content).hexdigest()}",
+    }
+
+
+def test_sibling_path():
+    assert _sibling(PurePosixPath("out/audio.json"), ".srt") == PurePosixPath(
+        "out/audio.json.srt"
+    )
+
+
+def test_sibling_url_keeps_query():
+    assert str(_sibling(AnyUrl("s3://bucket/audio.json?region=eu"), ".srt")) == (
+        "s3://bucket/audio.json.srt?region=eu"
+    )
+
+
+def test_split_names_channels_and_repeated_formats(transcription):
+    data = json.dumps(
+        {
+            "transcripts": [
+                {
+                    **transcription([("hello", 0.0, 0.5)]),
+                    "channel_index": index,
+                    "additional_formats": [
+                        additional_format("srt", SRT),
+                        additional_format("srt", SRT),
+                    ],
+                }
+                for index in range(2)
+            ],
+        }
+    ).encode()
+
+    output = SpeechToTextConvertRequestOutput.model_validate(
+        {"destination": "audio.json", "separate_additional_formats": True}
+    )
+
+    _, files = _split_additional_formats(output, data)
+
+    assert [str(destination) for destination, _ in files] == [
+        "audio.json.channel_0.srt",
+        "audio.json.channel_0.1.srt",
+        "audio.json.channel_1.srt",
+        "audio.json.channel_1.1.srt",
+    ]
+
+
+def test_separate_additional_formats_are_persisted(elevenlabs, transcription):
+    response = {
+        **transcription([("hello", 0.0, 0.5)]),
+        "additional_formats": [
+            additional_format("srt", SRT),
+            additional_format("docx", DOCX),
+        ],
+    }
+
+    store = MemoryStore()
+    obstore.put(store, "audio.wav", b"audio")
+
+    executor = AsyncExecutor(
+        elevenlabs(lambda request: httpx.Response(200, json=response)),
+        AsyncFileLoader(store),
+        AsyncFilePersister(store),
+    )
+
+    request = SpeechToTextConvertFileRequest.model_validate(
+        {
+            "file": "audio.wav",
+            "options": {"model_id": "scribe_v1"},
+            "output": {
+                "destination": "audio.json",
+                "return": True,
+                "separate_additional_formats": True,
+            },
+        }
+    )
+
+    result = asyncio.run(executor.speech_to_text_convert_file(request))
+
+    # The files are decoded
+    assert bytes(obstore.get(store, "audio.json.srt").bytes()) == SRT.encode()
+    assert bytes(obstore.get(store, "audio.json.docx").bytes()) == DOCX
+
+    # Both the response and the persisted transcription only keep references
+    persisted = json.loads(bytes(obstore.get(store, "audio.json").bytes()))
+
+    for formats in (
+        [
+            additional.model_dump(by_alias=True)
+            for additional in result.additional_formats or []
+            if additional is not None
+        ],
+        persisted["additional_formats"],
+    ):
+        assert [
+            (
+                additional["content"],
+                additional["is_base64_encoded"],
+                additional["reference"],
+            )
+            for additional in formats
+        ] == [
+            ("", False, reference("audio.json.srt", SRT.encode())),
+            ("", False, reference("audio.json.docx", DOCX)),
+        ]
@@ -0,0 +1,68 @@
+import asyncio
+from collections.abc import Callable, Coroutine
+from typing import Any, cast
+
+import httpx
+
+from restate_elevenlabs import (
+    AsyncExecutor,
+    SpeechToTextConvertBatchRequest,
+    SpeechToTextConvertBatchResponse,
+    create_service,
+)
+from restate_elevenlabs.obstore import AsyncFileLoader, AsyncFilePersister
+
+
+def test_batch_collects_item_errors_within_concurrency(
+    context, elevenlabs, transcription
+):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        await asyncio.sleep(0.01)
+
+        if b"missing.wav" in body:
+            return httpx.Response(400, json={"detail": {"message": "File not found"}})
+
+        return httpx.Response(200, json=transcription([("hello", 0.0, 0.5)]))
+
+    executor = AsyncExecutor(
+        elevenlabs(handler),
+        AsyncFileLoader(),
+        AsyncFilePersister(),
+    )
+    batch = cast(
+        Callable[..., Coroutine[Any, Any, SpeechToTextConvertBatchResponse]],
+        create_service(executor).handlers["speechToTextConvertBatch"].fn,
+    )
+
+    request = SpeechToTextConvertBatchRequest.model_validate(
+        {
+            "items": [
+                {"url": f"https://example.com/{name}.wav", "output": {"return": True}}
+                for name in ["one", "missing", "three", "four", "five"]
+            ],
+            "options": {"model_id": "scribe_v1"},
+            "concurrency": 2,
+        }
+    )
+
+    response = asyncio.run(batch(context, request))
+
+    assert [result.status_code for result in response.results] == [
+        None,
+        400,
+        None,
+        None,
+        None,
+    ]
+    assert response.results[1].error == "File not found"
+    assert all(
+        result.response is not None and result.response.text == "hello"
+        for index, result in enumerate(response.results)
+        if index != 1
+    )
+
+    assert context.max_running == 2
+    assert context.steps == [
+        f"speech_to_text_convert_url[{index}]" for index in range(5)
+    ]
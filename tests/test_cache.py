@@ -0,0 +1,140 @@
+import asyncio
+from typing import Any
+
+import httpx
+from obstore.store import MemoryStore
+
+from restate_elevenlabs import AsyncExecutor, MemoryCache, SpeechToTextConvertUrlRequest
+from restate_elevenlabs.cache import cache_key
+from restate_elevenlabs.model import SpeechToTextConvertRequestOptions
+from restate_elevenlabs.obstore import (
+    AsyncFileLoader,
+    AsyncFilePersister,
+    ObjectStoreCache,
+)
+
+
+def request(**options: Any) -> SpeechToTextConvertUrlRequest:
+    return SpeechToTextConvertUrlRequest.model_validate(
+        {
+            "url": "https://example.com/audio.wav",
+            "options": {"model_id": "scribe_v1", **options},
+            "output": {"return": True},
+        }
+    )
+
+
+def options(**options: Any) -> SpeechToTextConvertRequestOptions:
+    return SpeechToTextConvertRequestOptions.model_validate(
+        {"model_id": "scribe_v1", **options}
+    )
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_size=3)
+
+    async def main():
+        await cache.set("a", b"a")
+        await cache.set("b", b"b")
+        await cache.set("c", b"c")
+
+        # Touch "a" so that "b" is the least recently used entry
+        assert await cache.get("a") == b"a"
+
+        await cache.set("d", b"d")
+
+        return [await cache.get(key) for key in "abcd"]
+
+    assert asyncio.run(main()) == [b"a", None, b"c", b"d"]
+
+
+def test_memory_cache_bounds_size():
+    cache = MemoryCache(max_size=4)
+
+    async def main():
+        await cache.set("a", b"aa")
+        await cache.set("b", b"bb")
+        await cache.set("c", b"ccc")
+        # Values larger than the cache are not stored
+        await cache.set("d", b"ddddd")
+
+        return [await cache.get(key) for key in "abcd"]
+
+    assert asyncio.run(main()) == [None, None, b"ccc", None]
+
+
+def test_object_store_cache():
+    cache = ObjectStoreCache(MemoryStore())
+
+    async def main():
+        assert await cache.get("key") is None
+
+        await cache.set("key", b"value")
+
+        return await cache.get("key")
+
+    assert asyncio.run(main()) == b"value"
+
+
+def test_cache_key_ignores_transport_options():
+    assert cache_key("source", options()) == cache_key(
+        "source",
+        options(request_options={"timeout_in_seconds": 10, "max_retries": 3}),
+    )
+
+
+def test_cache_key_depends_on_request_parameters():
+    keys = {
+        cache_key("source", options()),
+        cache_key(
+            "source",
+            options(request_options={"additional_headers": {"xi-api-key": "other"}}),
+        ),
+        cache_key(
+            "source",
+            options(request_options={"additional_body_parameters": {"keyterms": "a"}}),
+        ),
+        cache_key(
+            "source",
+            options(request_options={"additional_body_parameters": {"keyterms": "b"}}),
+        ),
+    }
+
+    assert len(keys) == 4
+
+
+def test_cache_hit_skips_request(elevenlabs, transcription):
+    requests: list[httpx.Request] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        requests.append(request)
+
+        return httpx.Response(200, json=transcription([("hello", 0.0, 0.5)]))
+
+    executor = AsyncExecutor(
+        elevenlabs(handler),
+        AsyncFileLoader(),
+        AsyncFilePersister(),
+        cache=MemoryCache(),
+    )
+
+    async def main():
+        first = await executor.speech_to_text_convert_url(request())
+        second = await executor.speech_to_text_convert_url(request())
+
+        assert first == second
+
+        # Different body parameters are a different transcription
+        for keyterms in ("a", "b"):
+            await executor.speech_to_text_convert_url(
+                request(
+                    request_options={
+                        "additional_body_parameters": {"keyterms": keyterms}
+                    }
+                )
+            )
+
+    asyncio.run(main())
+
+    assert len(requests) == 3
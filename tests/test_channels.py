@@ -0,0 +1,47 @@
+import json
+
+from restate_elevenlabs.executor import _merge_channels
+from restate_elevenlabs.model import SpeechToTextConvertResponse
+
+
+def test_merge_channels_orders_words_by_start(transcription):
+    channels = [
+        [("one", 0.0, 0.4), ("three", 1.0, 1.4), ("five", 2.0, 2.4)],
+        [("two", 0.5, 0.9), ("four", 1.5, 1.9), ("six", 2.0, 2.4)],
+    ]
+
+    data = json.dumps(
+        {
+            "transcripts": [
+                {**transcription(words), "channel_index": index}
+                for index, words in enumerate(channels)
+            ],
+        }
+    ).encode()
+
+    response = SpeechToTextConvertResponse.model_validate_json(_merge_channels(data))
+
+    assert response.words is not None
+    assert [(word.text, word.channel_index) for word in response.words] == [
+        ("one", 0),
+        ("two", 1),
+        ("three", 0),
+        ("four", 1),
+        # Words starting at the same time keep the order of their channels
+        ("five", 0),
+        ("six", 1),
+    ]
+
+    # The channels are kept as they are
+    assert response.transcripts is not None
+    assert [transcript.channel_index for transcript in response.transcripts] == [0, 1]
+    assert [
+        [word.text for word in transcript.words or []]
+        for transcript in response.transcripts
+    ] == [["one", "three", "five"], ["two", "four", "six"]]
+
+
+def test_merge_channels_keeps_single_channel(transcription):
+    data = json.dumps(transcription([("hello", 0.0, 0.5)])).encode()
+
+    assert _merge_channels(data) == data
@@ -0,0 +1,136 @@
+import gzip
+
+import pytest
+from pydantic import ValidationError
+
+from restate_elevenlabs.encoding import decode_response, encode_response, zstd_available
+from restate_elevenlabs.model import (
+    SpeechToTextConvertRequestOutput,
+    SpeechToTextConvertResponse,
+)
+
+COMPRESSIONS = [
+    None,
+    "gzip",
+    pytest.param(
+        "zstd",
+        marks=pytest.mark.skipif(
+            not zstd_available(), reason="zstd requires Python 3.14"
+        ),
+    ),
+]
+
+
+def word(text: str, start: float, speaker_id: str | None = "speaker_0", **kwargs):
+    return {
+        "text": text,
+        "start": start,
+        "end": start + 0.4,
+        "type": "word",
+        "speaker_id": speaker_id,
+        "logprob": -0.25,
+        **kwargs,
+    }
+
+
+RESPONSES = {
+    "words": {
+        "language_code": "eng",
+        "language_probability": 0.98,
+        "text": "hello world",
+        "words": [
+            word("hello", 0.0),
+            {"text": " ", "start": 0.4, "end": 0.5, "type": "spacing", "logprob": 0},
+            word("world", 0.5, speaker_id=None),
+        ],
+        "transcription_id": "transcription",
+    },
+    "characters": {
+        "text": "hi you",
+        "words": [
+            word(
+                "hi",
+                0.0,
+                characters=[
+                    {"text": "h", "start": 0.0, "end": 0.2},
+                    {"text": "i", "start": 0.2, "end": 0.4},
+                ],
+            ),
+            # Words without characters between words with characters
+            word("", 0.4),
+            word("you", 0.5, characters=[{"text": "you", "start": None, "end": None}]),
+        ],
+    },
+    "multichannel": {
+        "transcripts": [
+            {"text": "left", "channel_index": 0, "words": [word("left", 0.0)]},
+            {"text": "right", "channel_index": 1, "words": [word("right", 0.1)]},
+        ],
+        "words": [
+            word("left", 0.0, channel_index=0),
+            word("right", 0.1, channel_index=1),
+        ],
+    },
+    "empty": {"text": "", "words": []},
+    "no words": {"text": "hello"},
+}
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+@pytest.mark.parametrize("format", ["json", "columnar"])
+@pytest.mark.parametrize("name", RESPONSES)
+def test_round_trip(name, format, compression):
+    response = SpeechToTextConvertResponse.model_validate(RESPONSES[name])
+    data = response.model_dump_json().encode()
+
+    encoded = b"".join(encode_response(data, format, compression, chunk_size=7))
+
+    assert decode_response(encoded, format, compression) == response
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_chunk_size_does_not_change_output(compression):
+    data = SpeechToTextConvertResponse.model_validate(
+        RESPONSES["words"]
+    ).model_dump_json()
+
+    whole = b"".join(encode_response(data.encode(), compression=compression))
+    chunked = list(
+        encode_response(data.encode(), compression=compression, chunk_size=5)
+    )
+
+    assert b"".join(chunked) == whole
+
+    if compression is None:
+        assert [len(chunk) for chunk in chunked[:-1]] == [5] * (len(chunked) - 1)
+
+
+def test_gzip_output_is_standard_gzip():
+    data = SpeechToTextConvertResponse.model_validate(
+        RESPONSES["words"]
+    ).model_dump_json()
+
+    encoded = b"".join(encode_response(data.encode(), compression="gzip"))
+
+    assert gzip.decompress(encoded) == data.encode()
+
+
+def test_columnar_is_smaller_than_json():
+    response = SpeechToTextConvertResponse.model_validate(
+        {
+            "text": "",
+            "words": [word(f"word{i}", i * 0.5) for i in range(1000)],
+        }
+    )
+    data = response.model_dump_json().encode()
+
+    assert len(b"".join(encode_response(data, "columnar"))) < len(data) / 2
+
+
+@pytest.mark.skipif(zstd_available(), reason="zstd is available")
+def test_zstd_is_rejected_without_support():
+    with pytest.raises(ValidationError, match="requires Python 3.14"):
+        SpeechToTextConvertRequestOutput.model_validate({"compression": "zstd"})
+
+    with pytest.raises(ValueError, match="requires Python 3.14"):
+        list(encode_response(b"{}", compression="zstd"))
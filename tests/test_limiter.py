@@ -0,0 +1,209 @@
+import asyncio
+import email.utils
+import time
+
+import httpx
+import obstore
+import pytest
+from elevenlabs.core.api_error import ApiError
+from obstore.store import MemoryStore
+from restate.exceptions import TerminalError
+
+from restate_elevenlabs import (
+    AsyncExecutor,
+    RateLimiter,
+    SpeechToTextConvertFileRequest,
+)
+from restate_elevenlabs.executor import _is_terminal
+from restate_elevenlabs.limiter import parse_retry_after
+from restate_elevenlabs.obstore import AsyncFileLoader, AsyncFilePersister
+
+
+@pytest.mark.parametrize(
+    ("headers", "expected"),
+    [
+        (None, None),
+        ({}, None),
+        ({"Retry-After": "2"}, 2.0),
+        ({"retry-after": "1.5"}, 1.5),
+        ({"Retry-After": "-3"}, 0.0),
+        ({"Retry-After-Ms": "250"}, 0.25),
+        # The millisecond header is more precise
+        ({"retry-after-ms": "250", "retry-after": "1"}, 0.25),
+        ({"retry-after-ms": "soon", "retry-after": "1"}, 1.0),
+        ({"Retry-After": "soon"}, None),
+    ],
+)
+def test_parse_retry_after(headers, expected):
+    assert parse_retry_after(headers) == expected
+
+
+def test_parse_retry_after_date():
+    retry_at = email.utils.formatdate(time.time() + 30, usegmt=True)
+
+    assert parse_retry_after({"Retry-After": retry_at}) == pytest.approx(30, abs=2)
+
+    past = email.utils.formatdate(time.time() - 30, usegmt=True)
+
+    assert parse_retry_after({"Retry-After": past}) == 0.0
+
+
+@pytest.mark.parametrize(
+    ("status_code", "terminal"),
+    [
+        (None, False),
+        (400, True),
+        (401, True),
+        (404, True),
+        (422, True),
+        (408, False),
+        (409, False),
+        (429, False),
+        (500, False),
+        (503, False),
+    ],
+)
+def test_is_terminal(status_code, terminal):
+    assert _is_terminal(ApiError(status_code=status_code, body=None)) is terminal
+
+
+def test_backoff_halves_limit_and_success_recovers_it():
+    limiter = RateLimiter(max_concurrency=8, default_backoff=0)
+
+    limiter.backoff()
+    assert limiter.limit == 4
+
+    limiter.backoff()
+    limiter.backoff()
+    limiter.backoff()
+    assert limiter.limit == 1
+
+    for _ in range(10):
+        limiter.success()
+
+    assert limiter.limit == 8
+
+
+def test_backoff_without_limit_starts_from_calls_in_flight():
+    async def main():
+        limiter = RateLimiter(default_backoff=0)
+        release = asyncio.Event()
+
+        async def call():
+            async with limiter.acquire():
+                await release.wait()
+
+        tasks = [asyncio.create_task(call()) for _ in range(6)]
+        await asyncio.sleep(0)
+
+        assert limiter.active == 6
+
+        limiter.backoff()
+        assert limiter.limit == 3
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+
+
+def test_concurrency_limit_is_enforced():
+    async def main():
+        limiter = RateLimiter(max_concurrency=2)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+
+            async with limiter.acquire():
+                peak = max(peak, limiter.active)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(call() for _ in range(6)))
+
+        assert peak == 2
+        assert limiter.active == 0
+
+    asyncio.run(main())
+
+
+def test_backoff_pauses_every_caller():
+    async def main():
+        limiter = RateLimiter()
+        limiter.backoff(0.1)
+
+        start = time.monotonic()
+
+        async def call() -> float:
+            async with limiter.acquire():
+                return time.monotonic() - start
+
+        waited = await asyncio.gather(call(), call())
+
+        assert min(waited) >= 0.1
+
+    asyncio.run(main())
+
+
+def request() -> SpeechToTextConvertFileRequest:
+    return SpeechToTextConvertFileRequest.model_validate(
+        {
+            "file": "audio.wav",
+            "options": {"model_id": "scribe_v1"},
+            "output": {"return": True},
+        }
+    )
+
+
+def executor(elevenlabs, limiter: RateLimiter, status_code: int, headers=None):
+    store = MemoryStore()
+    obstore.put(store, "audio.wav", b"audio")
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await request.aread()
+
+        return httpx.Response(
+            status_code, headers=headers, json={"detail": "rate limited"}
+        )
+
+    return AsyncExecutor(
+        elevenlabs(handler),
+        AsyncFileLoader(store),
+        AsyncFilePersister(store),
+        stream=True,
+        limiter=limiter,
+    )
+
+
+def test_rate_limited_call_backs_off_and_is_retried_by_restate(elevenlabs):
+    limiter = RateLimiter(max_concurrency=4)
+    rate_limited = executor(elevenlabs, limiter, 429, {"Retry-After": "0.2"})
+
+    with pytest.raises(ApiError) as err:
+        asyncio.run(rate_limited.speech_to_text_convert_file(request()))
+
+    # Not terminal: the invocation is retried
+    assert not isinstance(err.value, TerminalError)
+    assert err.value.status_code == 429
+    assert limiter.limit == 2
+
+    start = time.monotonic()
+
+    async def call():
+        async with limiter.acquire():
+            pass
+
+    asyncio.run(call())
+
+    assert time.monotonic() - start >= 0.1
+
+
+def test_client_error_is_terminal(elevenlabs):
+    limiter = RateLimiter(max_concurrency=4)
+    invalid = executor(elevenlabs, limiter, 422)
+
+    with pytest.raises(TerminalError) as err:
+        asyncio.run(invalid.speech_to_text_convert_file(request()))
+
+    assert err.value.status_code == 422
+    assert limiter.limit == 4
@@ -0,0 +1,49 @@
+import importlib
+
+import httpx
+import pytest
+
+# The app dependencies (the `app` extra)
+pytest.importorskip("pydantic_obstore")
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("structlog")
+
+
+def test_elevenlabs_client_is_created_once_on_first_use(monkeypatch):
+    monkeypatch.setenv("ELEVENLABS_API_KEY", "test")
+    monkeypatch.setenv("HTTP__MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("HTTP__READ_TIMEOUT", "30")
+
+    main = importlib.reload(importlib.import_module("src.main"))
+    executor = main.executor
+
+    # Importing the app does not create the client
+    assert executor._elevenlabs is main.create_elevenlabs
+
+    client = executor.elevenlabs
+
+    assert executor.elevenlabs is client
+
+    # Every API of the client shares one httpx client, configured from the settings
+    http_client = client._client_wrapper.httpx_client.httpx_client
+
+    assert isinstance(http_client, httpx.AsyncClient)
+    assert (
+        client.speech_to_text._raw_client._client_wrapper.httpx_client.httpx_client
+        is http_client
+    )
+    assert (
+        client.text_to_speech._raw_client._client_wrapper.httpx_client.httpx_client
+        is http_client
+    )
+
+    assert http_client.timeout == httpx.Timeout(
+        connect=10,
+        read=30,
+        write=60,
+        pool=None,
+    )
+
+    transport = http_client._transport
+    assert isinstance(transport, httpx.AsyncHTTPTransport)
+    assert transport._pool._max_connections == 7
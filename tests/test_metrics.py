@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from restate_elevenlabs.metrics import record_response
+
+
+class RecordingMetrics:
+    def __init__(self):
+        self.durations: list[float] = []
+        self.transferred: list[tuple[str, int]] = []
+
+    def observe_stage(self, stage: str, seconds: float):
+        pass
+
+    def observe_call(self, operation: str, seconds: float, error: str | None):
+        pass
+
+    def in_flight(self, operation: str, delta: int):
+        pass
+
+    def transfer(self, direction: str, size: int):
+        self.transferred.append((direction, size))
+
+    def audio(self, seconds: float):
+        self.durations.append(seconds)
+
+    def cache_lookup(self, cache: str, hit: bool):
+        pass
+
+
+def test_records_end_of_last_word(transcription):
+    data = json.dumps(
+        transcription([("hello", 0.0, 0.5), ("world", 0.6, 12.25)]), indent=2
+    ).encode()
+    metrics = RecordingMetrics()
+
+    record_response(metrics, data)
+
+    assert metrics.durations == [12.25]
+    assert metrics.transferred == [("download", len(data))]
+
+
+@pytest.mark.parametrize(
+    ("response", "duration"),
+    [
+        # Characters end with their word
+        (
+            {
+                "words": [
+                    {
+                        "text": "hi",
+                        "start": 0,
+                        "end": 1.5,
+                        "characters": [{"text": "i", "start": 1, "end": 1.5}],
+                    }
+                ]
+            },
+            1.5,
+        ),
+        # Words without timestamps
+        ({"words": [{"text": "a", "end": 2e1}, {"text": "b", "end": None}]}, 20.0),
+        # Keys in text are escaped
+        ({"text": 'the "end": 99', "words": [{"text": "a", "end": 3}]}, 3.0),
+        ({"words": [{"text": "a", "end": 3}], "text": 'the "end": 99'}, 3.0),
+        (
+            {
+                "transcripts": [
+                    {"channel_index": 0, "words": [{"text": "a", "end": 4.0}]},
+                    {"channel_index": 1, "words": [{"text": "b", "end": 4.5}]},
+                ]
+            },
+            4.5,
+        ),
+        ({"text": "", "words": []}, None),
+        ({"text": "hello"}, None),
+    ],
+)
+def test_records_audio_duration(response, duration):
+    metrics = RecordingMetrics()
+
+    record_response(metrics, json.dumps(response).encode())
+
+    assert metrics.durations == ([] if duration is None else [duration])
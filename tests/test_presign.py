@@ -0,0 +1,102 @@
+import asyncio
+from datetime import timedelta
+from pathlib import PurePosixPath
+
+import httpx
+import obstore
+from obstore.store import MemoryStore, S3Store
+
+from restate_elevenlabs import AsyncExecutor, SpeechToTextConvertFileRequest
+from restate_elevenlabs.obstore import AsyncFileLoader, AsyncFilePersister
+
+
+def s3_store() -> S3Store:
+    return S3Store(
+        "bucket",
+        region="us-east-1",
+        access_key_id="access",
+        secret_access_key="secret",
+    )
+
+
+def request() -> SpeechToTextConvertFileRequest:
+    return SpeechToTextConvertFileRequest.model_validate(
+        {
+            "file": "audio.wav",
+            "options": {"model_id": "scribe_v1"},
+            "output": {"return": True},
+        }
+    )
+
+
+def test_sign_s3_file():
+    loader = AsyncFileLoader(s3_store())
+
+    url = asyncio.run(loader.sign(PurePosixPath("audio.wav"), timedelta(minutes=5)))
+
+    assert url is not None
+
+    signed = httpx.URL(url)
+    assert signed.path.endswith("/audio.wav")
+    assert signed.params["X-Amz-Expires"] == "300"
+
+
+def test_sign_unsupported_store():
+    loader = AsyncFileLoader(MemoryStore())
+
+    assert (
+        asyncio.run(loader.sign(PurePosixPath("audio.wav"), timedelta(minutes=5)))
+        is None
+    )
+
+
+def test_presigned_file_is_sent_as_url(elevenlabs):
+    bodies: list[bytes] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(await request.aread())
+
+        return httpx.Response(200, json={"text": "hello"})
+
+    store = s3_store()
+    executor = AsyncExecutor(
+        elevenlabs(handler),
+        AsyncFileLoader(store),
+        AsyncFilePersister(store),
+        presign=timedelta(hours=1),
+    )
+
+    asyncio.run(executor.speech_to_text_convert_file(request()))
+
+    [body] = bodies
+
+    assert b'name="file"' not in body
+    assert b'name="cloud_storage_url"' in body
+    assert b"/bucket/audio.wav?" in body
+    assert b"X-Amz-Signature=" in body
+
+
+def test_presign_falls_back_to_upload(elevenlabs):
+    bodies: list[bytes] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(await request.aread())
+
+        return httpx.Response(200, json={"text": "hello"})
+
+    store = MemoryStore()
+    obstore.put(store, "audio.wav", b"audio")
+
+    executor = AsyncExecutor(
+        elevenlabs(handler),
+        AsyncFileLoader(store),
+        AsyncFilePersister(store),
+        presign=timedelta(hours=1),
+    )
+
+    asyncio.run(executor.speech_to_text_convert_file(request()))
+
+    [body] = bodies
+
+    assert b'name="cloud_storage_url"' not in body
+    assert b'name="file"' in body
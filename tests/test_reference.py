@@ -0,0 +1,80 @@
+import asyncio
+from pathlib import PurePosixPath
+
+import obstore
+import pytest
+from obstore.store import MemoryStore
+
+from restate_elevenlabs import (
+    AsyncExecutor,
+    SpeechToTextConvertFileRequest,
+    SpeechToTextConvertResponse,
+    load_response,
+)
+from restate_elevenlabs.obstore import AsyncFileLoader, AsyncFilePersister
+
+
+def request(**output: object) -> SpeechToTextConvertFileRequest:
+    return SpeechToTextConvertFileRequest.model_validate(
+        {
+            "file": "audio.wav",
+            "options": {"model_id": "scribe_v1"},
+            "output": {
+                "destination": "transcription.json",
+                "reference": True,
+                **output,
+            },
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "output",
+    [{}, {"format": "columnar", "compression": "gzip"}],
+    ids=["json", "columnar-gzip"],
+)
+def test_reference_round_trip(elevenlabs, output):
+    store = MemoryStore()
+    obstore.put(store, "audio.wav", b"audio")
+
+    loader = AsyncFileLoader(store)
+    executor = AsyncExecutor(elevenlabs(), loader, AsyncFilePersister(store))
+
+    async def main() -> SpeechToTextConvertResponse:
+        response = await executor.speech_to_text_convert_file(request(**output))
+
+        # Only the reference is returned
+        assert response.words is None
+        assert response.reference is not None
+        assert response.reference.destination == PurePosixPath("transcription.json")
+        assert response.reference.checksum.startswith("sha256:")
+
+        return await load_response(loader, response.reference)
+
+    response = asyncio.run(main())
+
+    assert response.text == "hello"
+    assert [word.text for word in response.words or []] == ["hello"]
+
+
+def test_reference_checksum_mismatch(elevenlabs):
+    store = MemoryStore()
+    obstore.put(store, "audio.wav", b"audio")
+
+    loader = AsyncFileLoader(store)
+    executor = AsyncExecutor(elevenlabs(), loader, AsyncFilePersister(store))
+
+    async def main():
+        response = await executor.speech_to_text_convert_file(request())
+        assert response.reference is not None
+
+        # The transcription was overwritten since the reference was returned
+        data = bytes(
+            await (await obstore.get_async(store, "transcription.json")).bytes_async()
+        )
+        obstore.put(store, "transcription.json", data.replace(b"hello", b"jello"))
+
+        await load_response(loader, response.reference)
+
+    with pytest.raises(ValueError, match="does not match its reference"):
+        asyncio.run(main())
@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+from restate_elevenlabs import Scheduler
+
+
+async def grant_order(
+    scheduler: Scheduler,
+    requests: list[tuple[str, str]],
+) -> list[tuple[str, str]]:
+    """Queue requests behind a running transcription and return the order they are granted a slot in.
+
+    Each granted transcription finishes before the next one is granted (the scheduler must have a single slot).
+    """
+
+    await scheduler.acquire("holder")
+
+    order: list[tuple[str, str]] = []
+
+    async def wait(tenant: str, priority: str):
+        await scheduler.acquire(tenant, priority)
+        order.append((tenant, priority))
+
+    tasks = [asyncio.create_task(wait(*request)) for request in requests]
+    await asyncio.sleep(0)
+
+    assert scheduler.queued == len(requests)
+
+    running = "holder"
+    for _ in requests:
+        scheduler.release(running)
+        await asyncio.sleep(0)
+
+        running = order[-1][0]
+
+    await asyncio.gather(*tasks)
+
+    return order
+
+
+def test_interactive_overtakes_batch_backlog():
+    requests = [("tenant", "batch")] * 9 + [("tenant", "interactive")] * 9
+
+    order = asyncio.run(grant_order(Scheduler(max_concurrency=1), requests))
+    priorities = [priority for _, priority in order]
+
+    # Interactive transcriptions get 8 slots for each batch one, but batch ones are not starved
+    assert priorities[:10].count("interactive") == 8
+    assert priorities[:2].count("batch") == 1
+
+
+def test_tenants_share_capacity():
+    requests = [("a", "batch")] * 6 + [("b", "batch")] * 2
+
+    order = asyncio.run(grant_order(Scheduler(max_concurrency=1), requests))
+    tenants = [tenant for tenant, _ in order]
+
+    # The transcriptions of b are interleaved with the backlog of a instead of waiting for it
+    assert tenants[:4] == ["a", "b", "a", "b"]
+    assert tenants[4:] == ["a"] * 4
+
+
+def test_equal_flows_are_first_come_first_served():
+    requests = [("a", "interactive"), ("b", "interactive"), ("c", "interactive")]
+
+    order = asyncio.run(grant_order(Scheduler(max_concurrency=1), requests))
+
+    assert order == requests
+
+
+def test_tenant_quota_overrides_tenant_concurrency():
+    scheduler = Scheduler(
+        max_concurrency=4, tenant_concurrency=2, tenant_quotas={"a": 1}
+    )
+
+    assert scheduler.quota("a") == 1
+    assert scheduler.quota("b") == 2
+    assert scheduler.quota(None) == 2
+
+
+def test_tenant_quota_lets_other_tenants_run():
+    async def main():
+        scheduler = Scheduler(max_concurrency=3, tenant_quotas={"a": 1})
+
+        granted: list[str] = []
+
+        async def wait(tenant: str):
+            await scheduler.acquire(tenant)
+            granted.append(tenant)
+
+        # The queued transcriptions of a (over quota) do not hold the free slots back from b
+        tasks = [asyncio.create_task(wait(tenant)) for tenant in "aaabb"]
+        await asyncio.sleep(0)
+
+        assert granted == ["a", "b", "b"]
+        assert scheduler.active == 3
+        assert scheduler.queued == 2
+
+        scheduler.release("b")
+        await asyncio.sleep(0)
+
+        # Still over quota
+        assert granted == ["a", "b", "b"]
+
+        scheduler.release("a")
+        await asyncio.sleep(0)
+
+        assert granted == ["a", "b", "b", "a"]
+
+        scheduler.release("a")
+        await asyncio.sleep(0)
+
+        assert granted == ["a", "b", "b", "a", "a"]
+
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_does_not_take_a_slot():
+    async def main():
+        scheduler = Scheduler(max_concurrency=1)
+        await scheduler.acquire("a")
+
+        cancelled = asyncio.create_task(scheduler.acquire("b"))
+        waiting = asyncio.create_task(scheduler.acquire("c"))
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        await asyncio.sleep(0)
+
+        scheduler.release("a")
+        await waiting
+
+        assert scheduler.active == 1
+        assert scheduler.queued == 0
+
+        scheduler.release("c")
+
+        assert scheduler.active == 0
+
+    asyncio.run(main())
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError, match="Unknown priority"):
+        asyncio.run(Scheduler(max_concurrency=1).acquire(priority="urgent"))
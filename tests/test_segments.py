@@ -0,0 +1,166 @@
+import asyncio
+import json
+import re
+
+import httpx
+import obstore
+import pytest
+from obstore.store import MemoryStore
+from restate.exceptions import TerminalError
+
+from restate_elevenlabs import (
+    AsyncExecutor,
+    SpeechToTextConvertFileRequest,
+    SpeechToTextConvertResponse,
+)
+from restate_elevenlabs.executor import _merge_segments, _plan_segments
+from restate_elevenlabs.model import SpeechToTextConvertFileSegmentation
+from restate_elevenlabs.obstore import AsyncFileLoader, AsyncFilePersister
+
+# pcm_s16le_16
+BYTES_PER_SECOND = 16000 * 2
+
+# A word every second of a 20 s recording
+DURATION = 20
+WORDS = [(f"word{second}", second + 0.1, second + 0.5) for second in range(DURATION)]
+
+
+def segmentation(
+    duration: float, overlap: float
+) -> SpeechToTextConvertFileSegmentation:
+    return SpeechToTextConvertFileSegmentation(duration=duration, overlap=overlap)
+
+
+@pytest.mark.parametrize(
+    ("size", "duration", "overlap"),
+    [
+        (DURATION * BYTES_PER_SECOND, 6, 2),
+        (DURATION * BYTES_PER_SECOND + 1, 6, 2),
+        (DURATION * BYTES_PER_SECOND, 5, 0),
+        (DURATION * BYTES_PER_SECOND, 60, 2),
+        (2, 6, 2),
+    ],
+)
+def test_plan_segments_covers_file(size, duration, overlap):
+    segments = _plan_segments(size, segmentation(duration, overlap)).segments
+
+    assert segments[0].offset == 0
+    assert segments[-1].offset + segments[-1].length == size - size % 2
+
+    for segment in segments:
+        # Segments are cut on sample boundaries and start at their offset
+        assert segment.offset % 2 == 0 and segment.length % 2 == 0
+        assert segment.start == segment.offset / BYTES_PER_SECOND
+        assert segment.length <= duration * BYTES_PER_SECOND
+
+    for current, following in zip(segments, segments[1:]):
+        assert following.index == current.index + 1
+        assert current.offset + current.length - following.offset == pytest.approx(
+            overlap * BYTES_PER_SECOND
+        )
+
+
+@pytest.mark.parametrize("size", [0, 1])
+def test_plan_segments_rejects_empty_file(size):
+    with pytest.raises(TerminalError) as err:
+        _plan_segments(size, segmentation(6, 2))
+
+    assert err.value.status_code == 400
+
+
+def transcribe_segment(start: float, end: float, words=WORDS) -> list:
+    """The words ElevenLabs recognizes in a segment, with timestamps relative to the segment."""
+
+    return [
+        (text, word_start - start, word_end - start)
+        for text, word_start, word_end in words
+        if word_start >= start and word_end <= end
+    ]
+
+
+@pytest.mark.parametrize(("duration", "overlap"), [(6, 2), (5, 1.5), (4, 0)])
+def test_merge_segments_keeps_each_word_once(transcription, duration, overlap):
+    segments = _plan_segments(
+        DURATION * BYTES_PER_SECOND, segmentation(duration, overlap)
+    )
+
+    responses = []
+    for segment in segments.segments:
+        end = segment.start + segment.length / BYTES_PER_SECOND
+
+        # Overlapping segments recognize the words of the overlap twice
+        responses.append(
+            SpeechToTextConvertResponse.model_validate(
+                transcription(
+                    [
+                        (text, word_start + segment.start, word_end + segment.start)
+                        for text, word_start, word_end in transcribe_segment(
+                            segment.start, end
+                        )
+                    ]
+                )
+            )
+        )
+
+    merged = _merge_segments(segments, responses)
+
+    assert [(word.text, word.start, word.end) for word in merged.words or []] == [
+        (text, pytest.approx(start), pytest.approx(end)) for text, start, end in WORDS
+    ]
+
+
+def test_segments_are_transcribed_with_file_timestamps(elevenlabs, transcription):
+    store = MemoryStore()
+    obstore.put(store, "audio.pcm", bytes(DURATION * BYTES_PER_SECOND))
+
+    request = SpeechToTextConvertFileRequest.model_validate(
+        {
+            "file": "audio.pcm",
+            "options": {"model_id": "scribe_v1", "file_format": "pcm_s16le_16"},
+            "output": {"return": True},
+            "segmentation": {"duration": 6, "overlap": 2},
+        }
+    )
+    assert request.segmentation is not None
+    segments = _plan_segments(DURATION * BYTES_PER_SECOND, request.segmentation)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        match = re.search(rb'filename="segment-(\d+)\.pcm"', body)
+        assert match is not None
+
+        segment = segments.segments[int(match[1])]
+        start = segment.start
+        end = start + segment.length / BYTES_PER_SECOND
+
+        return httpx.Response(
+            200,
+            content=json.dumps(transcription(transcribe_segment(start, end))),
+        )
+
+    executor = AsyncExecutor(
+        elevenlabs(handler),
+        AsyncFileLoader(store),
+        AsyncFilePersister(store),
+    )
+
+    async def main() -> SpeechToTextConvertResponse:
+        planned = await executor.speech_to_text_convert_file_segments(request)
+        assert planned == segments
+
+        responses = await asyncio.gather(
+            *(
+                executor.speech_to_text_convert_file_segment(request, segment)
+                for segment in planned.segments
+            )
+        )
+
+        return await executor.speech_to_text_convert_file_merge(
+            request, planned, list(responses)
+        )
+
+    response = asyncio.run(main())
+
+    assert [(word.text, word.start, word.end) for word in response.words or []] == [
+        (text, pytest.approx(start), pytest.approx(end)) for text, start, end in WORDS
+    ]
@@ -0,0 +1,68 @@
+import asyncio
+from typing import Any
+
+import httpx
+import obstore
+from obstore.store import MemoryStore
+
+from restate_elevenlabs import AsyncExecutor, SpeechToTextConvertFileRequest
+from restate_elevenlabs.obstore import AsyncFileLoader, AsyncFilePersister
+
+
+def request(**options: Any) -> SpeechToTextConvertFileRequest:
+    return SpeechToTextConvertFileRequest.model_validate(
+        {
+            "file": "audio.wav",
+            "options": {"model_id": "scribe_v1", **options},
+            "output": {"return": True},
+        }
+    )
+
+
+def test_single_flight_shares_file_by_version_and_request_options(
+    elevenlabs, transcription
+):
+    store = MemoryStore()
+    obstore.put(store, "audio.wav", b"first")
+
+    bodies: list[bytes] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(await request.aread())
+        await asyncio.sleep(0.05)
+
+        return httpx.Response(200, json=transcription([("hello", 0.0, 0.5)]))
+
+    executor = AsyncExecutor(
+        elevenlabs(handler),
+        AsyncFileLoader(store),
+        AsyncFilePersister(store),
+        single_flight=True,
+    )
+
+    def keyterms(value: str) -> SpeechToTextConvertFileRequest:
+        return request(
+            request_options={"additional_body_parameters": {"keyterms": value}}
+        )
+
+    async def main():
+        # Identical requests share a transcription, different body parameters do not
+        await asyncio.gather(
+            executor.speech_to_text_convert_file(keyterms("a")),
+            executor.speech_to_text_convert_file(keyterms("a")),
+            executor.speech_to_text_convert_file(keyterms("b")),
+        )
+        assert len(bodies) == 2
+
+        # A new version of the object is transcribed again
+        obstore.put(store, "audio.wav", b"second")
+
+        await asyncio.gather(
+            executor.speech_to_text_convert_file(keyterms("a")),
+            executor.speech_to_text_convert_file(keyterms("a")),
+        )
+        assert len(bodies) == 3
+
+    asyncio.run(main())
+
+    assert b"second" in bodies[-1]
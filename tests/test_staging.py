@@ -0,0 +1,168 @@
+import asyncio
+from collections.abc import Callable, Coroutine
+from pathlib import Path, PurePosixPath
+from typing import Any, cast
+
+import httpx
+import obstore
+import pytest
+from elevenlabs.core.api_error import ApiError
+from obstore.store import MemoryStore
+from pydantic import AnyUrl
+
+from restate_elevenlabs import (
+    AsyncExecutor,
+    AudioStage,
+    SpeechToTextConvertFileRequest,
+    SpeechToTextConvertResponse,
+    create_service,
+)
+from restate_elevenlabs.obstore import AsyncFileLoader, AsyncFilePersister
+
+
+class Loads:
+    """Download of files of a given size, counting calls."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.calls = 0
+
+    async def __call__(self, dst: Path):
+        self.calls += 1
+
+        dst.write_bytes(b"\0" * self.size)
+
+
+def staged(stage: AudioStage) -> int:
+    return sum(1 for _ in stage.directory.iterdir())
+
+
+def test_unpinned_files_are_evicted_over_max_size(tmp_path):
+    stage = AudioStage(tmp_path, max_size=10)
+    load = Loads(6)
+
+    async def main():
+        async with stage.open("a", load) as path:
+            assert path.read_bytes() == b"\0" * 6
+
+        # Reused while it fits
+        async with stage.open("a", load):
+            pass
+
+        assert load.calls == 1
+
+        async with stage.open("b", load):
+            # Files in use are not evicted
+            assert staged(stage) == 2
+
+        assert staged(stage) == 1
+        assert stage.size == 6
+
+        # The least recently used file was evicted
+        async with stage.open("a", load):
+            pass
+
+        assert load.calls == 3
+
+    asyncio.run(main())
+
+
+def test_retained_files_survive_eviction(tmp_path):
+    stage = AudioStage(tmp_path, max_size=10)
+    load = Loads(6)
+
+    async def main():
+        with stage.retain("a"):
+            assert stage.retained("a")
+
+            async with stage.open("a", load):
+                pass
+
+            async with stage.open("b", load):
+                pass
+
+            # The newer, unpinned file is evicted instead
+            async with stage.open("a", load):
+                pass
+
+            assert load.calls == 2
+            assert stage.size == 6
+
+        assert not stage.retained("a")
+
+        # Released files are evicted once they no longer fit
+        async with stage.open("c", load):
+            pass
+
+        assert load.calls == 3
+        assert stage.size == 6
+
+        async with stage.open("a", load):
+            pass
+
+        assert load.calls == 4
+
+    asyncio.run(main())
+
+
+class CountingLoader(AsyncFileLoader):
+    def __init__(self, store: MemoryStore):
+        super().__init__(store)
+        self.loads = 0
+
+    async def load(self, ref: AnyUrl | PurePosixPath, dst: Path):
+        self.loads += 1
+
+        await super().load(ref, dst)
+
+
+def test_convert_file_retries_use_staged_file(
+    context, elevenlabs, transcription, tmp_path
+):
+    responses = [
+        httpx.Response(503, json={"detail": "Busy"}),
+        httpx.Response(200, json=transcription([("hello", 0.0, 0.5)])),
+    ]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await request.aread()
+
+        return responses.pop(0)
+
+    store = MemoryStore()
+    obstore.put(store, "audio.wav", b"audio" * 1000)
+
+    loader = CountingLoader(store)
+    executor = AsyncExecutor(
+        elevenlabs(handler),
+        loader,
+        AsyncFilePersister(store),
+        stage=AudioStage(tmp_path),
+    )
+    convert = cast(
+        Callable[..., Coroutine[Any, Any, SpeechToTextConvertResponse]],
+        create_service(executor).handlers["speechToTextConvertFile"].fn,
+    )
+
+    request = SpeechToTextConvertFileRequest.model_validate(
+        {
+            "file": "audio.wav",
+            "options": {"model_id": "scribe_v1"},
+            "output": {"return": True},
+        }
+    )
+
+    # The upload fails after the file was staged
+    with pytest.raises(ApiError):
+        asyncio.run(convert(context, request))
+
+    assert context.steps == [
+        "speech_to_text_convert_file_stage",
+        "speech_to_text_convert_file",
+    ]
+
+    # The retried upload does not download the file again
+    response = asyncio.run(convert(context, request))
+
+    assert response.text == "hello"
+    assert loader.loads == 1
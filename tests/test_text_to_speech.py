@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+from pathlib import PurePosixPath
+
+import httpx
+import obstore
+import pytest
+import restate
+from elevenlabs.core.api_error import ApiError
+from obstore.store import MemoryStore
+from pydantic import AnyUrl
+
+from restate_elevenlabs import AsyncExecutor, TextToSpeechConvertRequest
+from restate_elevenlabs.obstore import AsyncFileLoader, AsyncFilePersister
+
+AUDIO = bytes(range(256)) * 64
+
+
+class BufferingPersister:
+    """Persister without streaming support."""
+
+    def __init__(self):
+        self.files: dict[str, bytes] = {}
+
+    async def persist(
+        self,
+        ref: AnyUrl | PurePosixPath,
+        src: bytes | bytearray | memoryview,
+    ):
+        self.files[str(ref)] = bytes(src)
+
+
+def request() -> TextToSpeechConvertRequest:
+    return TextToSpeechConvertRequest.model_validate(
+        {
+            "voice_id": "voice",
+            "text": "hello",
+            "options": {"output_format": "mp3_44100_128"},
+            "output": {"destination": "speech.mp3"},
+        }
+    )
+
+
+def stream_audio(request: httpx.Request) -> httpx.Response:
+    assert request.url.path == "/v1/text-to-speech/voice/stream"
+
+    return httpx.Response(200, content=AUDIO)
+
+
+def test_speech_is_streamed_to_destination(elevenlabs):
+    store = MemoryStore()
+    executor = AsyncExecutor(
+        elevenlabs(stream_audio),
+        AsyncFileLoader(store),
+        AsyncFilePersister(store),
+    )
+
+    response = asyncio.run(executor.text_to_speech_convert(request()))
+
+    assert response.destination == PurePosixPath("speech.mp3")
+    assert response.size == len(AUDIO)
+    assert response.checksum == f"sha256:{hashlib.sha256(AUDIO).hexdigest()}"
+    assert response.output_format == "mp3_44100_128"
+
+    assert bytes(obstore.get(store, "speech.mp3").bytes()) == AUDIO
+
+
+def test_speech_is_buffered_without_stream_persister(elevenlabs):
+    persister = BufferingPersister()
+    executor = AsyncExecutor(elevenlabs(stream_audio), AsyncFileLoader(), persister)
+
+    response = asyncio.run(executor.text_to_speech_convert(request()))
+
+    assert response.size == len(AUDIO)
+    assert persister.files == {"speech.mp3": AUDIO}
+
+
+def test_client_errors_are_terminal(elevenlabs):
+    executor = AsyncExecutor(
+        elevenlabs(
+            lambda request: httpx.Response(
+                400,
+                json={"detail": {"message": "Voice not found"}},
+            )
+        ),
+        AsyncFileLoader(),
+        AsyncFilePersister(MemoryStore()),
+    )
+
+    with pytest.raises(restate.TerminalError, match="Voice not found") as info:
+        asyncio.run(executor.text_to_speech_convert(request()))
+
+    assert info.value.status_code == 400
+
+
+def test_server_errors_are_retried(elevenlabs):
+    executor = AsyncExecutor(
+        elevenlabs(lambda request: httpx.Response(503, json={"detail": "Busy"})),
+        AsyncFileLoader(),
+        AsyncFilePersister(MemoryStore()),
+    )
+
+    with pytest.raises(ApiError) as info:
+        asyncio.run(executor.text_to_speech_convert(request()))
+
+    assert info.value.status_code == 503
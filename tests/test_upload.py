@@ -0,0 +1,223 @@
+import asyncio
+import email.parser
+import email.policy
+import json
+import time
+from collections.abc import AsyncIterator
+from pathlib import Path, PurePosixPath
+from typing import cast
+
+import httpx
+import obstore
+import pytest
+from elevenlabs.core.api_error import ApiError
+from obstore.store import MemoryStore
+from pydantic import AnyUrl
+
+from restate_elevenlabs import AsyncExecutor, AsyncFile, SpeechToTextConvertFileRequest
+from restate_elevenlabs.obstore import AsyncFileLoader, AsyncFilePersister
+
+AUDIO = bytes(range(256)) * 1024
+
+
+class SlowLoader:
+    """Streaming loader producing chunks slower than they are uploaded."""
+
+    def __init__(self, chunks: int, delay: float):
+        self.chunks = chunks
+        self.delay = delay
+
+    async def open(self, ref: AnyUrl | PurePosixPath) -> AsyncFile:
+        async def chunks() -> AsyncIterator[bytes]:
+            for _ in range(self.chunks):
+                await asyncio.sleep(self.delay)
+
+                yield b"\0" * 1024
+
+        return AsyncFile(chunks(), "audio.wav", self.chunks * 1024)
+
+    async def load(self, ref: AnyUrl | PurePosixPath, dst: Path):
+        raise AssertionError("Streamed files are not downloaded")
+
+
+def request(file: str = "audio.wav") -> SpeechToTextConvertFileRequest:
+    return SpeechToTextConvertFileRequest.model_validate(
+        {
+            "file": file,
+            "options": {"model_id": "scribe_v1", "diarize": True},
+            "output": {"return": True},
+        }
+    )
+
+
+def parse_form(request: httpx.Request, body: bytes) -> dict[str, bytes]:
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f"Content-Type: {request.headers['Content-Type']}\r\n\r\n".encode() + body
+    )
+
+    return {
+        str(part.get_param("name", header="Content-Disposition")): cast(
+            bytes, part.get_payload(decode=True)
+        )
+        for part in message.iter_parts()
+    }
+
+
+def test_slow_stream_does_not_block_event_loop(elevenlabs):
+    executor = AsyncExecutor(
+        elevenlabs(),
+        SlowLoader(chunks=10, delay=0.05),
+        AsyncFilePersister(MemoryStore()),
+        stream=True,
+    )
+
+    async def main() -> float:
+        stalled = 0.0
+        done = False
+
+        async def tick():
+            nonlocal stalled
+
+            while not done:
+                start = time.perf_counter()
+                await asyncio.sleep(0.001)
+                stalled = max(stalled, time.perf_counter() - start)
+
+        ticker = asyncio.create_task(tick())
+
+        try:
+            response = await executor.speech_to_text_convert_file(request())
+        finally:
+            done = True
+            await ticker
+
+        assert response.text == "hello"
+
+        return stalled
+
+    assert asyncio.run(main()) < 0.04
+
+
+def test_stream_upload_sends_object(elevenlabs):
+    store = MemoryStore()
+    obstore.put(store, "audio.wav", AUDIO)
+
+    requests: list[tuple[httpx.Request, bytes]] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append((request, await request.aread()))
+
+        return httpx.Response(
+            200,
+            json={"text": "hello", "language_code": "eng", "language_probability": 1},
+        )
+
+    executor = AsyncExecutor(
+        elevenlabs(handler),
+        AsyncFileLoader(store, chunk_size=4096),
+        AsyncFilePersister(store),
+        stream=True,
+    )
+
+    asyncio.run(executor.speech_to_text_convert_file(request()))
+
+    [(sent, body)] = requests
+    form = parse_form(sent, body)
+
+    assert int(sent.headers["Content-Length"]) == len(body)
+    assert form["file"] == AUDIO
+    assert form["model_id"] == b"scribe_v1"
+    assert form["diarize"] == b"true"
+
+
+def test_file_upload_sends_local_copy(elevenlabs, tmp_path):
+    requests: list[tuple[httpx.Request, bytes]] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append((request, await request.aread()))
+
+        return httpx.Response(200, content=json.dumps({"text": "hello"}))
+
+    source = tmp_path / "audio.wav"
+    source.write_bytes(AUDIO)
+
+    executor = AsyncExecutor(
+        elevenlabs(handler),
+        AsyncFileLoader(),
+        AsyncFilePersister(),
+    )
+
+    asyncio.run(executor.speech_to_text_convert_file(request(str(source))))
+
+    [(sent, body)] = requests
+
+    assert int(sent.headers["Content-Length"]) == len(body)
+    assert parse_form(sent, body)["file"] == AUDIO
+    assert b'filename="audio.wav"' in body
+
+
+def test_stream_upload_goes_through_client(elevenlabs):
+    """The streamed body is sent through the HTTP layer of the ElevenLabs client (authentication, request options)."""
+
+    store = MemoryStore()
+    obstore.put(store, "audio.wav", AUDIO)
+
+    requests: list[tuple[httpx.Request, bytes]] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append((request, await request.aread()))
+
+        return httpx.Response(503, json={"detail": "Busy"})
+
+    executor = AsyncExecutor(
+        elevenlabs(handler),
+        AsyncFileLoader(store, chunk_size=4096),
+        AsyncFilePersister(store),
+        stream=True,
+    )
+
+    streamed = SpeechToTextConvertFileRequest.model_validate(
+        {
+            "file": "audio.wav",
+            "options": {
+                "model_id": "scribe_v1",
+                "enable_logging": False,
+                "additional_formats": [{"format": "srt"}],
+                "request_options": {
+                    "additional_headers": {"x-tenant": "tenant"},
+                    "additional_body_parameters": {"keyterms": ["one", "two"]},
+                },
+            },
+            "output": {"return": True},
+        }
+    )
+
+    with pytest.raises(ApiError):
+        asyncio.run(executor.speech_to_text_convert_file(streamed))
+
+    # The body can only be sent once, so the client does not retry
+    [(sent, body)] = requests
+
+    assert sent.url.path == "/v1/speech-to-text"
+    assert sent.url.params["enable_logging"] == "false"
+    assert sent.headers["xi-api-key"] == "test"
+    assert sent.headers["x-tenant"] == "tenant"
+
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f"Content-Type: {sent.headers['Content-Type']}\r\n\r\n".encode() + body
+    )
+    parts = [
+        (
+            str(part.get_param("name", header="Content-Disposition")),
+            cast(bytes, part.get_payload(decode=True)),
+        )
+        for part in message.iter_parts()
+    ]
+
+    assert parts == [
+        ("model_id", b"scribe_v1"),
+        ("keyterms", b"one"),
+        ("keyterms", b"two"),
+        ("additional_formats", b'[{"format": "srt"}]'),
+        ("file", AUDIO),
+    ]
@@ -0,0 +1,87 @@
+import asyncio
+from pathlib import Path, PurePosixPath
+
+import obstore
+from obstore.store import MemoryStore
+from pydantic import AnyUrl
+
+from restate_elevenlabs import AsyncExecutor, SpeechToTextConvertFileRequest
+from restate_elevenlabs.obstore import AsyncFileLoader, AsyncFilePersister
+
+
+class CountingLoader(AsyncFileLoader):
+    def __init__(self, store: MemoryStore):
+        super().__init__(store)
+        self.loads = 0
+
+    async def load(self, ref: AnyUrl | PurePosixPath, dst: Path):
+        self.loads += 1
+
+        await super().load(ref, dst)
+
+
+def request(language_code: str) -> SpeechToTextConvertFileRequest:
+    return SpeechToTextConvertFileRequest.model_validate(
+        {
+            "file": "audio.wav",
+            "options": {"model_id": "scribe_v1", "language_code": language_code},
+            "output": {"return": True},
+        }
+    )
+
+
+def test_shared_file_is_downloaded_once_without_stage(elevenlabs):
+    store = MemoryStore()
+    obstore.put(store, "audio.wav", b"audio" * 1000)
+
+    loader = CountingLoader(store)
+    executor = AsyncExecutor(elevenlabs(), loader, AsyncFilePersister(store))
+
+    async def main():
+        async with executor.share_file(PurePosixPath("audio.wav")):
+            # Concurrent and sequential variants
+            await asyncio.gather(
+                executor.speech_to_text_convert_file(request("en")),
+                executor.speech_to_text_convert_file(request("de")),
+            )
+            await executor.speech_to_text_convert_file(request("fr"))
+
+        assert loader.loads == 1
+
+        # The temporary copy is removed once the variants are done
+        assert executor._scratch is not None
+        assert not any(executor._scratch.directory.iterdir())
+
+        await executor.speech_to_text_convert_file(request("es"))
+
+        assert loader.loads == 2
+
+    asyncio.run(main())
+
+
+def test_shared_file_is_keyed_by_version(elevenlabs):
+    store = MemoryStore()
+    obstore.put(store, "audio.wav", b"first")
+
+    loader = CountingLoader(store)
+    executor = AsyncExecutor(elevenlabs(), loader, AsyncFilePersister(store))
+
+    async def main():
+        async with executor.share_file(PurePosixPath("audio.wav")):
+            await executor.speech_to_text_convert_file(request("en"))
+
+            # A new version of the object is not served from the shared copy
+            obstore.put(store, "audio.wav", b"second")
+
+            await executor.speech_to_text_convert_file(request("de"))
+
+        assert loader.loads == 2
+
+        assert executor._scratch is not None
+        directory = executor._scratch.directory
+
+        await executor.aclose()
+
+        assert not directory.exists()
+
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+import asyncio
+from collections.abc import Callable, Coroutine
+from datetime import timedelta
+from typing import Any, cast
+
+import httpx
+import pytest
+import restate
+
+from restate_elevenlabs import (
+    AsyncExecutor,
+    SpeechToTextConvertResponse,
+    SpeechToTextWaitTranscriptRequest,
+    create_service,
+)
+from restate_elevenlabs.obstore import AsyncFileLoader, AsyncFilePersister
+
+
+def wait_handler(
+    executor: AsyncExecutor,
+) -> Callable[..., Coroutine[Any, Any, SpeechToTextConvertResponse]]:
+    return cast(
+        Callable[..., Coroutine[Any, Any, SpeechToTextConvertResponse]],
+        create_service(executor).handlers["speechToTextWaitTranscript"].fn,
+    )
+
+
+def request(**fields: Any) -> SpeechToTextWaitTranscriptRequest:
+    return SpeechToTextWaitTranscriptRequest.model_validate(
+        {
+            "transcription_id": "transcription",
+            "output": {"return": True},
+            "initial_interval": 5,
+            "multiplier": 2,
+            **fields,
+        }
+    )
+
+
+def not_found() -> httpx.Response:
+    return httpx.Response(404, json={"detail": {"message": "Transcript not found"}})
+
+
+def test_wait_transcript_checks_back_until_available(
+    context, elevenlabs, transcription
+):
+    responses = [
+        not_found(),
+        not_found(),
+        httpx.Response(200, json=transcription([("hello", 0.0, 0.5)])),
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path.endswith("/transcripts/transcription")
+
+        return responses.pop(0)
+
+    executor = AsyncExecutor(
+        elevenlabs(handler),
+        AsyncFileLoader(),
+        AsyncFilePersister(),
+    )
+
+    response = asyncio.run(
+        wait_handler(executor)(context, request(max_interval=8)),
+    )
+
+    assert response.text == "hello"
+    assert context.steps == [
+        f"speech_to_text_get_transcript[{attempt}]" for attempt in range(3)
+    ]
+    # The interval grows up to the maximum
+    assert context.sleeps == [timedelta(seconds=5), timedelta(seconds=8)]
+
+
+def test_wait_transcript_gives_up_after_timeout(context, elevenlabs):
+    executor = AsyncExecutor(
+        elevenlabs(lambda request: not_found()),
+        AsyncFileLoader(),
+        AsyncFilePersister(),
+    )
+
+    with pytest.raises(restate.TerminalError, match="after 12 seconds") as info:
+        asyncio.run(wait_handler(executor)(context, request(timeout=12)))
+
+    assert info.value.status_code == 404
+    assert len(context.steps) == 3
+    # The last interval is cut short by the timeout
+    assert context.sleeps == [timedelta(seconds=5), timedelta(seconds=7)]
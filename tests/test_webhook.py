@@ -0,0 +1,118 @@
+import hashlib
+import hmac
+import json
+import time
+from pathlib import PurePosixPath
+
+import pytest
+from restate.exceptions import TerminalError
+
+from restate_elevenlabs import SpeechToTextConvertUrlAsyncRequest
+from restate_elevenlabs.webhook import (
+    AWAKEABLE_ID_KEY,
+    OUTPUT_KEY,
+    parse_webhook_metadata,
+    verify_signature,
+    with_webhook_metadata,
+)
+
+SECRET = "whsec_test"
+BODY = b'{"type": "speech_to_text_transcription", "data": {}}'
+
+
+def sign(body: bytes, timestamp: int, secret: str = SECRET) -> dict[str, str]:
+    signature = hmac.new(
+        secret.encode(),
+        f"{timestamp}.".encode() + body,
+        hashlib.sha256,
+    ).hexdigest()
+
+    return {"ElevenLabs-Signature": f"t={timestamp},v0={signature}"}
+
+
+def async_request(**options) -> SpeechToTextConvertUrlAsyncRequest:
+    return SpeechToTextConvertUrlAsyncRequest.model_validate(
+        {
+            "url": "https://example.com/audio.wav",
+            "options": {"model_id": "scribe_v1", "webhook": True, **options},
+            "output": {"destination": "transcripts/audio.json"},
+        }
+    )
+
+
+def test_verify_signature_accepts_valid_signature():
+    verify_signature(BODY, sign(BODY, int(time.time())), SECRET)
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        sign(BODY + b" ", int(time.time())),
+        sign(BODY, int(time.time()), secret="other"),
+        {},
+        {"ElevenLabs-Signature": "t=now,v0=abc"},
+    ],
+    ids=["tampered body", "other secret", "missing", "malformed"],
+)
+def test_verify_signature_rejects_invalid_signature(headers):
+    with pytest.raises(TerminalError) as err:
+        verify_signature(BODY, headers, SECRET)
+
+    assert err.value.status_code == 401
+
+
+def test_verify_signature_rejects_stale_timestamp():
+    headers = sign(BODY, int(time.time()) - 3600)
+
+    with pytest.raises(TerminalError, match="expired"):
+        verify_signature(BODY, headers, SECRET)
+
+    verify_signature(BODY, headers, SECRET, tolerance=7200)
+
+
+def test_webhook_metadata_round_trip():
+    request = with_webhook_metadata(
+        async_request(webhook_metadata='{"job": "42"}'), "awakeable"
+    )
+
+    metadata = request.options.webhook_metadata
+    assert isinstance(metadata, dict)
+    assert metadata["job"] == "42"
+
+    # ElevenLabs sends the metadata back as it was given
+    parsed = parse_webhook_metadata(json.dumps(metadata))
+
+    assert parsed is not None
+    awakeable_id, output = parsed
+    assert awakeable_id == "awakeable"
+    assert output.destination == PurePosixPath("transcripts/audio.json")
+
+
+@pytest.mark.parametrize(
+    "metadata",
+    [None, "", "job-42", "[1, 2]", '"job-42"', '{"job": "42"}', {"job": "42"}],
+)
+def test_foreign_webhook_metadata_is_ignored(metadata):
+    assert parse_webhook_metadata(metadata) is None
+
+
+@pytest.mark.parametrize(
+    "metadata",
+    [
+        {OUTPUT_KEY: "not json"},
+        {OUTPUT_KEY: '{"format": "xml"}'},
+        {AWAKEABLE_ID_KEY: ["awakeable"]},
+    ],
+)
+def test_malformed_webhook_metadata_fails(metadata):
+    with pytest.raises(TerminalError) as err:
+        parse_webhook_metadata(json.dumps(metadata))
+
+    assert err.value.status_code == 400
+
+
+def test_plain_string_metadata_cannot_carry_webhook_metadata():
+    with pytest.raises(TerminalError) as err:
+        with_webhook_metadata(async_request(webhook_metadata="job-42"), "awakeable")
+
+    assert err.value.status_code == 400